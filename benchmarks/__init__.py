@@ -0,0 +1,7 @@
+"""
+Benchmarks for the strategy's computational kernels. They run main.py on the LEAN stand-in
+(lean_standin), so they need nothing beyond a plain Python install.
+
+Usage:
+    python -m benchmarks.run [--quick] [--update-baseline] [--tolerance 0.2]
+"""
@@ -0,0 +1,194 @@
+"""
+Benchmark cases. Each case has a setup that builds its state outside the timed region and a run
+that performs a known number of operations against that state.
+"""
+from datetime import datetime, timedelta
+import random
+
+import lean_standin
+
+lean_standin.install()
+
+from AlgorithmImports import AverageTrueRange, DonchianChannel, MovingAverageType, Slice, Symbol, TradeBar, TradeBars
+from lean_standin.data import RandomWalkBars
+from lean_standin.engine import Backtest, PushSlice
+from main import TurtleTradingStrategy
+
+START = datetime(2010, 1, 4)
+STARTING_CASH = 1000000
+
+
+class Case:
+    def __init__(self, name, setup, run, operations):
+        """
+        Args:
+            name (str): Case name, including its size parameter
+            setup (callable): Builds the state passed to run; not timed
+            run (callable): Performs `operations` operations on the state
+            operations (int): Operations per run, used to report throughput per operation
+        """
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.operations = operations
+
+
+def _strategy(symbol_count=1):
+    """A strategy initialised on the stand-in with quiet logging and symbol_count tickers."""
+    strategy = TurtleTradingStrategy()
+    strategy.LogEnabled = False
+    strategy.Initialize()
+    for index in range(1, symbol_count):
+        strategy.AddTradingSymbol(f"SYM{index:05d}")
+    return strategy
+
+
+def _random_walk_bars(symbols, days, seed=7):
+    """Pre-generate `days` daily slices of random-walk bars for the given symbols."""
+    rng = random.Random(seed)
+    prices = {symbol: 50 + rng.random() * 100 for symbol in symbols}
+    slices = []
+    for day in range(days):
+        time = START + timedelta(days=day)
+        bars = TradeBars()
+        for symbol in symbols:
+            open_price = prices[symbol]
+            close = max(1.0, open_price * (1 + rng.gauss(0.0005, 0.02)))
+            high = max(open_price, close) * (1 + rng.random() * 0.01)
+            low = min(open_price, close) * (1 - rng.random() * 0.01)
+            bars[symbol] = TradeBar(time, symbol, open_price, high, low, close, 1000000)
+            prices[symbol] = close
+        slices.append(Slice(time + timedelta(days=1), bars))
+    return slices
+
+
+def drawdown_map_cases(levels_list):
+    cases = []
+    for levels in levels_list:
+        min_value = STARTING_CASH * 0.8 ** levels
+
+        def setup(min_value=min_value):
+            strategy = _strategy()
+            strategy.drawdown_map = strategy.CreateDrawdownMap(STARTING_CASH, min_value)
+            rng = random.Random(levels)
+            values = [STARTING_CASH * rng.uniform(0.8 ** levels, 1.0) for _ in range(1000)]
+            return strategy, min_value, values
+
+        def create(state):
+            strategy, min_value, _ = state
+            for _ in range(100):
+                strategy.CreateDrawdownMap(STARTING_CASH, min_value)
+
+        def lookup(state):
+            strategy, _, values = state
+            for value in values:
+                strategy.LookupEffectiveValue(value)
+
+        cases.append(Case(f"drawdown_map.create[levels={levels}]", setup, create, 100))
+        cases.append(Case(f"drawdown_map.lookup[levels={levels}]", setup, lookup, 1000))
+    return cases
+
+
+def indicator_cases(symbol_counts, bars=5):
+    cases = []
+    for count in symbol_counts:
+        def setup(count=count):
+            symbols = [Symbol(f"SYM{index:05d}") for index in range(count)]
+            indicators = [(DonchianChannel(55), DonchianChannel(20), AverageTrueRange(20, MovingAverageType.Simple))
+                          for _ in symbols]
+            slices = _random_walk_bars(symbols, bars)
+            return symbols, indicators, slices
+
+        def run(state):
+            symbols, indicators, slices = state
+            for slice in slices:
+                for symbol, (entry, exit, atr) in zip(symbols, indicators):
+                    bar = slice.Bars[symbol]
+                    entry.Update(bar)
+                    exit.Update(bar)
+                    atr.Update(bar)
+
+        cases.append(Case(f"indicators.update[symbols={count}]", setup, run, count * bars))
+    return cases
+
+
+def ondata_cases(symbol_counts, days=20, warm_up_days=60):
+    cases = []
+    for count in symbol_counts:
+        def setup(count=count):
+            strategy = _strategy(count)
+            slices = _random_walk_bars(strategy.symbols, warm_up_days + days)
+            strategy.IsWarmingUp = True
+            for slice in slices[:warm_up_days]:
+                PushSlice(strategy, slice)
+            strategy.IsWarmingUp = False
+            return strategy, slices[warm_up_days:]
+
+        def run(state):
+            strategy, slices = state
+            for slice in slices:
+                PushSlice(strategy, slice)
+
+        cases.append(Case(f"ondata.dispatch[symbols={count}]", setup, run, count * days))
+    return cases
+
+
+def order_path_cases(iterations=200):
+    def setup():
+        strategy = _strategy()
+        symbol = strategy.symbols[0]
+        for slice in _random_walk_bars([symbol], 60):
+            PushSlice(strategy, slice)
+        return strategy, symbol
+
+    def enter_and_exit(state):
+        # The trade log and order list are cleared per operation so each one starts from the same
+        # state; otherwise their growth is charged to whichever operation resizes them.
+        strategy, symbol = state
+        for _ in range(iterations):
+            strategy.EnterLong(symbol)
+            strategy.Liquidate(symbol)
+            strategy.CleanupPosition(symbol)
+            strategy.daily_trades.clear()
+            strategy.Orders.clear()
+
+    def position_size(state):
+        strategy, symbol = state
+        equity = strategy.Securities[symbol]
+        stop_price = equity.Price * 0.95
+        for _ in range(iterations):
+            strategy.CalculatePositionSize(equity, stop_price)
+
+    def available_value(state):
+        strategy, _ = state
+        for _ in range(iterations):
+            strategy.GetAvailablePortfolioValue()
+
+    return [
+        Case("order_path.enter_long_and_exit", setup, enter_and_exit, iterations),
+        Case("order_path.calculate_position_size", setup, position_size, iterations),
+        Case("order_path.get_available_portfolio_value", setup, available_value, iterations),
+    ]
+
+
+def backtest_cases(years_list):
+    cases = []
+    for years in years_list:
+        def setup(years=years):
+            return RandomWalkBars(["AAPL"], START.date() - timedelta(days=90), 365 * years + 90)
+
+        def run(history, years=years):
+            Backtest(TurtleTradingStrategy, history, end=START.date() + timedelta(days=365 * years), log=False)
+
+        # Operations are simulated calendar days, warm-up included
+        cases.append(Case(f"backtest.days[years={years}]", setup, run, 365 * years + 55))
+    return cases
+
+
+def all_cases(quick=False):
+    """Every benchmark case; quick mode keeps the smaller sizes for a fast smoke run."""
+    if quick:
+        return (drawdown_map_cases([10, 50]) + indicator_cases([1, 100]) + ondata_cases([1, 10])
+                + order_path_cases() + backtest_cases([1]))
+    return (drawdown_map_cases([10, 50, 200]) + indicator_cases([1, 100, 1000, 10000])
+            + ondata_cases([1, 100, 1000]) + order_path_cases() + backtest_cases([1, 10]))
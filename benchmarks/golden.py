@@ -0,0 +1,235 @@
+"""
+Golden-run regression gate: replays a fixed set of scenarios through the strategy on the LEAN
+stand-in and compares compact fingerprints against benchmarks/golden.json.
+
+Each scenario's fingerprint has two parts:
+    behavior    - a hash of the order sequence, equity checkpoints quantized to whole dollars every
+                  CHECKPOINT_DAYS trading days, and summary statistics
+    performance - median wall time and tracemalloc peak for the run
+
+Behavior must match exactly (equity within EQUITY_TOLERANCE, for floating-point differences across
+platforms); performance fails when it grows beyond the given tolerance.
+
+Usage:
+    python -m benchmarks.golden [--update] [--filter NAME] [--time-tolerance 0.5] [--memory-tolerance 0.2]
+"""
+from datetime import date, timedelta
+import argparse
+import hashlib
+import json
+import math
+import os
+import statistics
+import time
+import tracemalloc
+
+import lean_standin
+
+lean_standin.install()
+
+from lean_standin.data import RandomWalkBars
+from lean_standin.engine import Backtest
+from main import TurtleTradingStrategy
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden.json")
+START = date(2010, 1, 1)
+CHECKPOINT_DAYS = 21       # About one checkpoint per trading month
+EQUITY_TOLERANCE = 1e-6    # Relative; checkpoints are whole dollars, so this only absorbs platform float drift
+TIMING_REPEATS = 3
+
+
+class Scenario:
+    def __init__(self, name, tickers, years, seed, drift=0.0005, volatility=0.02):
+        """
+        Args:
+            name (str): Scenario name, the key in golden.json
+            tickers (list[str]): Symbols to trade; the first must be the strategy's own symbol
+            years (int): Years simulated after the start date
+            seed (int): Random-walk seed
+            drift (float): Mean daily return
+            volatility (float): Daily return standard deviation
+        """
+        self.name = name
+        self.tickers = tickers
+        self.years = years
+        self.seed = seed
+        self.drift = drift
+        self.volatility = volatility
+
+    def History(self):
+        warm_up = timedelta(days=90)
+        return RandomWalkBars(self.tickers, START - warm_up, 365 * self.years + warm_up.days, self.seed,
+                              self.drift, self.volatility)
+
+    def Strategy(self):
+        """The strategy class for this scenario, trading every ticker in the scenario."""
+        extra_tickers = self.tickers[1:]
+
+        class ScenarioStrategy(TurtleTradingStrategy):
+            def Initialize(self):
+                super().Initialize()
+                for ticker in extra_tickers:
+                    self.AddTradingSymbol(ticker)
+
+        return ScenarioStrategy
+
+    def Run(self, history):
+        return Backtest(self.Strategy(), history, end=START + timedelta(days=365 * self.years), log=False)
+
+
+SCENARIOS = [
+    Scenario("uptrend", ["AAPL"], 10, seed=7, drift=0.0008),
+    Scenario("sideways", ["AAPL"], 10, seed=11, drift=0.0, volatility=0.015),
+    Scenario("downtrend", ["AAPL"], 10, seed=13, drift=-0.0006),
+    Scenario("volatile", ["AAPL"], 10, seed=17, drift=0.0003, volatility=0.04),
+    Scenario("basket", ["AAPL"] + [f"SYM{index:02d}" for index in range(1, 10)], 5, seed=19),
+]
+
+
+def OrderHash(orders):
+    """Hash of the order sequence: time, symbol, quantity and fill price rounded to 1e-6."""
+    digest = hashlib.sha256()
+    for order in orders:
+        digest.update(f"{order.Time.isoformat()},{order.Symbol},{order.Quantity},{order.AverageFillPrice:.6f}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def BehaviorFingerprint(result):
+    """
+    Returns:
+        dict: order_hash, orders, checkpoints ([iso date, whole dollars]), final_equity, max_drawdown and sharpe
+    """
+    values = [value for _, value in result.Equity]
+    checkpoints = [[day.isoformat(), round(value)] for day, value in result.Equity[CHECKPOINT_DAYS - 1::CHECKPOINT_DAYS]]
+
+    peak, max_drawdown = values[0], 0.0
+    for value in values:
+        peak = max(peak, value)
+        max_drawdown = max(max_drawdown, 1 - value / peak)
+
+    returns = [current / previous - 1 for previous, current in zip(values, values[1:])]
+    deviation = statistics.stdev(returns) if len(returns) > 1 else 0.0
+    sharpe = statistics.fmean(returns) / deviation * math.sqrt(252) if deviation > 0 else 0.0
+
+    return {
+        "order_hash": OrderHash(result.Orders),
+        "orders": len(result.Orders),
+        "checkpoints": checkpoints,
+        "final_equity": round(values[-1]),
+        "max_drawdown": round(max_drawdown, 6),
+        "sharpe": round(sharpe, 4),
+    }
+
+
+def PerformanceFingerprint(scenario, history):
+    """
+    Returns:
+        dict: wall_seconds (median of TIMING_REPEATS runs) and peak_bytes (one run under tracemalloc)
+    """
+    timings = []
+    for _ in range(TIMING_REPEATS):
+        started = time.perf_counter()
+        scenario.Run(history)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        scenario.Run(history)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"wall_seconds": round(statistics.median(timings), 4), "peak_bytes": peak}
+
+
+def Fingerprint(scenario, measure_performance=True):
+    history = scenario.History()
+    fingerprint = {"behavior": BehaviorFingerprint(scenario.Run(history))}
+    if measure_performance:
+        fingerprint["performance"] = PerformanceFingerprint(scenario, history)
+    return fingerprint
+
+
+def CompareBehavior(actual, expected):
+    """
+    Returns:
+        list[str]: Differences between two behavior fingerprints, naming the first diverging checkpoint
+    """
+    differences = []
+    if actual["order_hash"] != expected["order_hash"]:
+        differences.append(f"order sequence changed ({expected['orders']} -> {actual['orders']} orders)")
+    for (day, value), (expected_day, expected_value) in zip(actual["checkpoints"], expected["checkpoints"]):
+        if day != expected_day or abs(value - expected_value) > abs(expected_value) * EQUITY_TOLERANCE:
+            differences.append(f"equity diverges at {expected_day}: ${expected_value:,} -> ${value:,} on {day}")
+            break
+    if len(actual["checkpoints"]) != len(expected["checkpoints"]):
+        differences.append(f"{len(expected['checkpoints'])} -> {len(actual['checkpoints'])} checkpoints")
+    for key in ("final_equity", "max_drawdown", "sharpe"):
+        if not math.isclose(actual[key], expected[key], rel_tol=EQUITY_TOLERANCE, abs_tol=1e-4):
+            differences.append(f"{key} {expected[key]} -> {actual[key]}")
+    return differences
+
+
+def ComparePerformance(actual, expected, time_tolerance, memory_tolerance):
+    """
+    Returns:
+        list[str]: Budgets exceeded beyond the tolerances (relative growth)
+    """
+    differences = []
+    if actual["wall_seconds"] > expected["wall_seconds"] * (1 + time_tolerance):
+        differences.append(f"wall time {expected['wall_seconds']:.3f}s -> {actual['wall_seconds']:.3f}s")
+    if actual["peak_bytes"] > expected["peak_bytes"] * (1 + memory_tolerance):
+        differences.append(f"peak memory {expected['peak_bytes']:,} B -> {actual['peak_bytes']:,} B")
+    return differences
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay the golden scenarios and compare their fingerprints")
+    parser.add_argument("--update", action="store_true", help="Store these fingerprints as the new golden set")
+    parser.add_argument("--filter", default="", help="Only run scenarios whose name contains this text")
+    parser.add_argument("--behavior-only", action="store_true", help="Skip the timing and memory runs")
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="Allowed relative wall-time growth")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2, help="Allowed relative peak-memory growth")
+    arguments = parser.parse_args(argv)
+
+    golden = {}
+    if os.path.exists(GOLDEN_PATH):
+        with open(GOLDEN_PATH) as handle:
+            golden = json.load(handle)
+
+    failures = 0
+    for scenario in SCENARIOS:
+        if arguments.filter not in scenario.name:
+            continue
+        fingerprint = Fingerprint(scenario, measure_performance=not arguments.behavior_only)
+        behavior, performance = fingerprint["behavior"], fingerprint.get("performance")
+        summary = (f"{scenario.name:<10} {behavior['orders']:>5} orders  final ${behavior['final_equity']:>14,}  "
+                   f"hash {behavior['order_hash']}")
+        if performance:
+            summary += f"  {performance['wall_seconds']:.3f}s  {performance['peak_bytes'] / 1e6:.1f} MB peak"
+        print(summary)
+
+        if arguments.update:
+            golden[scenario.name] = {**golden.get(scenario.name, {}), **fingerprint}
+            continue
+        expected = golden.get(scenario.name)
+        if expected is None:
+            print(f"  no golden fingerprint; run with --update to record one")
+            continue
+        differences = CompareBehavior(behavior, expected["behavior"])
+        if performance and "performance" in expected:
+            differences += ComparePerformance(performance, expected["performance"], arguments.time_tolerance,
+                                              arguments.memory_tolerance)
+        for difference in differences:
+            print(f"  FAIL {difference}")
+        failures += bool(differences)
+
+    if arguments.update:
+        with open(GOLDEN_PATH, "w") as handle:
+            json.dump(golden, handle, indent=1, sort_keys=True)
+        print(f"Golden fingerprints updated: {GOLDEN_PATH}")
+        return 0
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,140 @@
+"""
+Run the benchmark cases, append the results to benchmarks/history.jsonl and compare them with the
+stored baseline in benchmarks/baseline.json.
+
+Usage:
+    python -m benchmarks.run [--quick] [--update-baseline] [--tolerance 0.2] [--filter NAME]
+"""
+from datetime import datetime
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+from benchmarks.cases import all_cases
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.path.join(BENCHMARK_DIR, "history.jsonl")
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+MIN_TIMED_SECONDS = 0.2  # Repeat each case until at least this much time has been measured
+
+
+def measure(case, repeats=5):
+    """
+    Measure one case's throughput and allocations.
+
+    Throughput is the median of `repeats` timed runs (each repeated until MIN_TIMED_SECONDS have
+    passed); allocations come from a separate run under tracemalloc so tracing doesn't skew timings.
+
+    Returns:
+        dict: ops_per_sec, peak_bytes_per_op and retained_bytes_per_op
+    """
+    state = case.setup()
+    case.run(state)  # Warm caches and lazily created state
+
+    rates = []
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            loops, elapsed = 0, 0.0
+            while elapsed < MIN_TIMED_SECONDS:
+                start = time.perf_counter()
+                case.run(state)
+                elapsed += time.perf_counter() - start
+                loops += 1
+            rates.append(loops * case.operations / elapsed)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        case.run(state)
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ops_per_sec": statistics.median(rates),
+        "peak_bytes_per_op": (peak - before) / case.operations,
+        "retained_bytes_per_op": (after - before) / case.operations,
+    }
+
+
+def find_regressions(results, baseline, tolerance):
+    """
+    Compare results with the baseline.
+
+    Returns:
+        list[str]: One message per case that got slower, or allocates more, beyond the tolerance
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result["ops_per_sec"] < expected["ops_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['ops_per_sec']:,.0f} ops/s vs baseline {expected['ops_per_sec']:,.0f}")
+        # Allow a small absolute slack so near-zero allocation cases don't flap
+        if result["peak_bytes_per_op"] > expected["peak_bytes_per_op"] * (1 + tolerance) + 64:
+            regressions.append(f"{name}: {result['peak_bytes_per_op']:,.0f} peak B/op vs baseline "
+                               f"{expected['peak_bytes_per_op']:,.0f}")
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARK_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the strategy's computational kernels")
+    parser.add_argument("--quick", action="store_true", help="Only the smaller sizes")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown/allocation growth")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    arguments = parser.parse_args(argv)
+
+    results = {}
+    for case in all_cases(arguments.quick):
+        if arguments.filter not in case.name:
+            continue
+        results[case.name] = measure(case)
+        result = results[case.name]
+        print(f"{case.name:<48} {result['ops_per_sec']:>14,.0f} ops/s {result['peak_bytes_per_op']:>10,.0f} peak B/op "
+              f"{result['retained_bytes_per_op']:>10,.0f} retained B/op")
+
+    with open(HISTORY_PATH, "a") as handle:
+        handle.write(json.dumps({"time": datetime.now().isoformat(timespec="seconds"), "revision": _git_revision(),
+                                 "python": platform.python_version(), "machine": platform.machine(),
+                                 "results": results}) + "\n")
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as handle:
+            baseline = json.load(handle)
+
+    if arguments.update_baseline:
+        baseline.update(results)
+        with open(BASELINE_PATH, "w") as handle:
+            json.dump(baseline, handle, indent=2, sort_keys=True)
+        print(f"Baseline updated with {len(results)} cases")
+        return 0
+
+    regressions = find_regressions(results, baseline, arguments.tolerance)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
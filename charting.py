@@ -0,0 +1,159 @@
+# region imports
+from AlgorithmImports import *
+from array import array
+from datetime import datetime, timedelta
+# endregion
+
+_EPOCH = datetime(1970, 1, 1)  # Naive epoch so algorithm (exchange) times round-trip unchanged
+
+
+def LargestTriangleThreeBuckets(times, values, count, threshold):
+    """
+    Pick the indices of the points that best preserve the shape of a series (Steinarsson's LTTB).
+
+    The first and last points are always kept; every bucket in between contributes the point that
+    forms the largest triangle with the previously kept point and the average of the next bucket.
+
+    Args:
+        times (array): Point x values
+        values (array): Point y values
+        count (int): Number of valid points at the start of the arrays
+        threshold (int): Number of points to keep (at least 3)
+
+    Returns:
+        list[int]: Ascending indices of the points to keep
+    """
+    if threshold >= count or threshold < 3:
+        return list(range(count))
+
+    selected = [0]
+    bucket_size = (count - 2) / (threshold - 2)
+    previous = 0
+
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # Average of the next bucket (just the last point for the final bucket)
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        if next_start >= next_end:
+            next_start, next_end = count - 1, count
+        span = next_end - next_start
+        average_time = sum(times[next_start:next_end]) / span
+        average_value = sum(values[next_start:next_end]) / span
+
+        previous_time, previous_value = times[previous], values[previous]
+        best_area, best_index = -1.0, start
+        for index in range(start, end):
+            area = abs((previous_time - average_time) * (values[index] - previous_value)
+                       - (previous_time - times[index]) * (average_value - previous_value))
+            if area > best_area:
+                best_area, best_index = area, index
+
+        selected.append(best_index)
+        previous = best_index
+
+    selected.append(count - 1)
+    return selected
+
+
+class SeriesBuffer:
+    """
+    Preallocated buffer of (time, value) points. When it fills up it compacts itself in place to
+    half its capacity with LTTB, so memory stays fixed however long the run is.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))   # array[float] - seconds since the naive epoch
+        self.values = array("d", bytes(8 * capacity))  # array[float] - point values
+        self.count = 0                                 # int - number of valid points
+
+    def Append(self, seconds, value):
+        """Add a point, compacting first if the buffer is full."""
+        if self.count == self.capacity:
+            self.Compact(self.capacity // 2)
+        self.times[self.count] = seconds
+        self.values[self.count] = value
+        self.count += 1
+
+    def Compact(self, threshold):
+        """Downsample the buffered points in place to at most threshold points."""
+        keep = LargestTriangleThreeBuckets(self.times, self.values, self.count, threshold)
+        for target, source in enumerate(keep):
+            self.times[target] = self.times[source]
+            self.values[target] = self.values[source]
+        self.count = len(keep)
+
+    def Points(self, threshold):
+        """Return up to threshold shape-preserving (seconds, value) points without modifying the buffer."""
+        keep = LargestTriangleThreeBuckets(self.times, self.values, self.count, threshold)
+        return [(self.times[index], self.values[index]) for index in keep]
+
+    def Clear(self):
+        self.count = 0
+
+
+class TurtleCharts:
+    """
+    Collects the Turtle-specific series (N, effective equity, units on, stop distance) in fixed
+    buffers and emits only LTTB-reduced points to LEAN's charts, instead of a Plot call per bar.
+    """
+
+    SIZING_CHART = "Turtle Sizing"      # Actual vs drawdown-map effective equity
+    EXPOSURE_CHART = "Turtle Exposure"  # Units on across the portfolio
+    N_CHART = "Turtle N"                # ATR (N) per symbol
+    STOP_CHART = "Turtle Stop Distance" # Distance from price to stop, in N, per invested symbol
+
+    def __init__(self, algorithm, capacity=4000, points=1000, max_symbol_series=10):
+        """
+        Args:
+            algorithm: The QCAlgorithm the charts are added to
+            capacity (int): Points buffered per series before compacting
+            points (int): Points emitted per series
+            max_symbol_series (int): Cap on per-symbol series, to stay within LEAN's series limits
+        """
+        self.algorithm = algorithm
+        self.capacity = capacity
+        self.points = points
+        self.max_symbol_series = max_symbol_series
+        self.buffers = {}          # Dictionary[(str, str), SeriesBuffer] - Buffers keyed by (chart, series)
+        self.symbol_series = set() # Set[str] - Symbols that already own per-symbol series
+        self.charts = {}           # Dictionary[str, Chart] - LEAN charts, registered up front
+        self.series = {}           # Dictionary[(str, str), Series] - LEAN series created on first flush
+
+        for name in (self.SIZING_CHART, self.EXPOSURE_CHART, self.N_CHART, self.STOP_CHART):
+            chart = Chart(name)
+            self.charts[name] = chart
+            algorithm.AddChart(chart)
+
+    def Record(self, chart, series, time, value):
+        """Buffer one point; nothing is sent to LEAN until Flush."""
+        key = (chart, series)
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = self.buffers[key] = SeriesBuffer(self.capacity)
+        buffer.Append((time - _EPOCH).total_seconds(), float(value))
+
+    def RecordSymbol(self, chart, symbol, time, value):
+        """Buffer a per-symbol point, ignoring symbols beyond max_symbol_series."""
+        name = str(symbol)
+        if name not in self.symbol_series:
+            if len(self.symbol_series) >= self.max_symbol_series:
+                return
+            self.symbol_series.add(name)
+        self.Record(chart, name, time, value)
+
+    def Flush(self):
+        """Downsample every buffer and add the reduced points to the LEAN charts."""
+        for (chart_name, series_name), buffer in self.buffers.items():
+            if buffer.count == 0:
+                continue
+            series = self.series.get((chart_name, series_name))
+            if series is None:
+                series = self.series[(chart_name, series_name)] = Series(series_name, SeriesType.Line, 0)
+                self.charts[chart_name].AddSeries(series)
+            for seconds, value in buffer.Points(self.points):
+                series.AddPoint(_EPOCH + timedelta(seconds=seconds), value)
+            buffer.Clear()
@@ -0,0 +1,157 @@
+# region imports
+import numpy as np
+# endregion
+
+_ADD_REMOVE = np.array([[1.0], [-1.0]])  # Signs of the entering and leaving return vectors in the rank-2 update
+
+
+class CorrelationEngine:
+    """
+    Rolling correlation matrix of the universe's daily close-to-close returns over the last `window`
+    bars, kept incrementally: a ring buffer holds the returns, with running sums and a running
+    cross-product matrix. Each bar adds its return vector's outer product and subtracts that of the
+    bar leaving the window, one O(n²) rank-2 update instead of an O(n² × window) recomputation, and
+    the sums are recomputed exactly from the buffer once per window so rounding doesn't accumulate.
+
+    Clusters are the connected components of the symbols correlated at or above a threshold (union-
+    find over the matrix's pairs): closely correlated clusters from `close_threshold`, loosely from
+    the lower `loose_threshold`. Each is named after its first symbol, in the order symbols were added.
+
+    A symbol without a bar in a slice counts as unchanged that day. Nothing is persisted: after a
+    restart the matrix is ready again once `window` bars have been seen.
+    """
+
+    def __init__(self, window=60, close_threshold=0.7, loose_threshold=0.4, capacity=8):
+        """
+        Args:
+            window (int): Returns in the rolling window, in bars
+            close_threshold (float): Correlation at or above which two symbols are closely correlated
+            loose_threshold (float): Correlation at or above which two symbols are loosely correlated
+            capacity (int): Symbols the arrays are sized for at first; they double as symbols are added
+        """
+        if window < 2 or not close_threshold >= loose_threshold:
+            raise ValueError(f"Correlation needs a window of 2 bars or more and a close threshold at or above the loose one, "
+                             f"got {window}, {close_threshold}, {loose_threshold}")
+        self.window = window
+        self.close_threshold = close_threshold
+        self.loose_threshold = loose_threshold
+        self.symbols = []                                # List[Symbol] - symbols in matrix order
+        self.index = {}                                  # Dictionary[Symbol, int] - row and column of each symbol
+        self.returns = np.zeros((window, capacity))      # ndarray - ring buffer of return vectors, one row per bar
+        self.sums = np.zeros(capacity)                   # ndarray - sum of each symbol's returns in the window
+        self.products = np.zeros((capacity, capacity))   # ndarray - sum of each pair's return products in the window
+        self.last_close = np.full(capacity, np.nan)      # ndarray - previous close of each symbol
+        self.position = 0                                # int - ring buffer row the next bar replaces
+        self.bars = 0                                    # int - bars seen
+        self.groups = {}                                 # Dictionary[Symbol, Tuple[str, str]] - close and loose cluster of each symbol, from the last Refresh
+
+    @property
+    def IsReady(self):
+        return self.bars >= self.window
+
+    def Add(self, symbol):
+        """Add a symbol to the matrix, its returns starting with its next bar."""
+        count = len(self.symbols)
+        capacity = self.sums.shape[0]
+        if count == capacity:
+            grown = capacity * 2
+            self.returns = np.pad(self.returns, ((0, 0), (0, grown - capacity)))
+            self.sums = np.pad(self.sums, (0, grown - capacity))
+            self.products = np.pad(self.products, (0, grown - capacity))
+            self.last_close = np.pad(self.last_close, (0, grown - capacity), constant_values=np.nan)
+        self.index[symbol] = count
+        self.symbols.append(symbol)
+
+    def Update(self, slice):
+        """Push the slice's bars as one return vector, replacing the oldest in the window."""
+        count = len(self.symbols)
+        returns = np.zeros(count)
+        index, last_close = self.index, self.last_close
+        for symbol, bar in slice.Bars.items():
+            column = index.get(symbol)
+            if column is None:
+                continue
+            previous = last_close[column]
+            if previous > 0:
+                returns[column] = bar.Close / previous - 1
+            last_close[column] = bar.Close
+
+        oldest = self.returns[self.position, :count].copy()
+        self.returns[self.position, :count] = returns
+        self.sums[:count] += returns - oldest
+        update = np.stack((returns, oldest))
+        self.products[:count, :count] += update.T @ (update * _ADD_REMOVE)  # One matrix product: entering minus leaving outer product
+        self.position = (self.position + 1) % self.window
+        self.bars += 1
+        if self.position == 0:
+            # Once per window, recompute from the buffer so rounding in the updates doesn't accumulate
+            self.sums = self.returns.sum(axis=0)
+            self.products = self.returns.T @ self.returns
+
+    def Matrix(self):
+        """
+        Returns:
+            ndarray: Correlation of each pair of symbols over the window, in matrix order; 0 for a symbol
+                whose returns don't vary, 1 on the diagonal
+        """
+        count = len(self.symbols)
+        bars = min(self.bars, self.window)
+        if bars < 2:
+            return np.identity(count)
+        mean = self.sums[:count] / bars
+        covariance = self.products[:count, :count] / bars - np.outer(mean, mean)
+        deviation = np.sqrt(np.clip(np.diag(covariance), 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlation = covariance / np.outer(deviation, deviation)
+        correlation[~np.isfinite(correlation)] = 0.0
+        np.clip(correlation, -1.0, 1.0, out=correlation)
+        np.fill_diagonal(correlation, 1.0)
+        return correlation
+
+    def Refresh(self):
+        """
+        Recompute the clusters from the current matrix, once it is ready.
+
+        Returns:
+            dict: Symbol -> (close cluster, loose cluster) of each symbol whose clusters changed
+        """
+        if not self.IsReady or not self.symbols:
+            return {}
+        correlation = self.Matrix()
+        close = self._Roots(correlation, self.close_threshold)
+        loose = self._Roots(correlation, self.loose_threshold)
+        changed = {}
+        for column, symbol in enumerate(self.symbols):
+            groups = (str(self.symbols[close[column]]), str(self.symbols[loose[column]]))
+            if self.groups.get(symbol) != groups:
+                changed[symbol] = self.groups[symbol] = groups
+        return changed
+
+    def Clusters(self):
+        """
+        Returns:
+            dict: "close" and "loose" -> clusters of two or more symbols from the last Refresh, each a list of tickers
+        """
+        clusters = {"close": {}, "loose": {}}
+        for symbol in self.symbols:
+            if symbol in self.groups:
+                close, loose = self.groups[symbol]
+                clusters["close"].setdefault(close, []).append(str(symbol))
+                clusters["loose"].setdefault(loose, []).append(str(symbol))
+        return {kind: [members for members in named.values() if len(members) > 1] for kind, named in clusters.items()}
+
+    def _Roots(self, correlation, threshold):
+        """Union-find over the pairs correlated at or above `threshold`; each symbol's root is its cluster's first column."""
+        parent = list(range(len(correlation)))
+
+        def find(column):
+            while parent[column] != column:
+                parent[column] = parent[parent[column]]
+                column = parent[column]
+            return column
+
+        for first, second in zip(*np.nonzero(np.triu(correlation >= threshold, 1))):
+            first, second = find(first), find(second)
+            if first != second:
+                parent[max(first, second)] = min(first, second)
+        return [find(column) for column in range(len(parent))]
@@ -0,0 +1,110 @@
+# region imports
+from time import perf_counter_ns
+from instrumentation import LatencyHistogram
+# endregion
+
+# LEAN's scheduled-event leaky bucket (log.txt: scheduled-event-leaky-bucket-*): scheduled events may
+# use up to CAPACITY minutes of wall time, refilled by REFILL minutes every INTERVAL minutes of algorithm time
+LEAKY_BUCKET_CAPACITY_MINUTES = 120
+LEAKY_BUCKET_REFILL_MINUTES = 18
+LEAKY_BUCKET_INTERVAL_MINUTES = 1440
+
+
+class EndOfDayStage:
+    """One step of the end-of-day pipeline and its timing telemetry."""
+
+    def __init__(self, name, callback, budget_ms, deferrable=False):
+        """
+        Args:
+            name (str): Shown in the telemetry
+            callback: Called with no arguments to run the stage
+            budget_ms (float): Time the stage is expected to take; longer runs are logged as overruns
+            deferrable (bool): Whether the stage can wait for a later day when the bucket runs low
+        """
+        self.name = name
+        self.callback = callback
+        self.budget_ns = int(budget_ms * 1e6)
+        self.deferrable = deferrable
+        self.timings = LatencyHistogram()  # LatencyHistogram - duration of each run of the stage
+        self.max_ns = 0                    # int - longest run
+        self.overruns = 0                  # int - runs longer than the budget
+        self.deferrals = 0                 # int - days the stage was deferred
+
+
+class EndOfDayPipeline:
+    """
+    The end-of-day work, run as one scheduled event on trading days only and in a fixed order (added
+    order): reconciliation before the report, the report before the snapshot, the snapshot before
+    the journal is compacted.
+
+    Each stage is timed against its budget. The pipeline also mirrors LEAN's scheduled-event leaky
+    bucket, spending wall time from it and refilling it with algorithm time, so the end-of-day work
+    can never exhaust it and get the algorithm stopped: a deferrable stage (memory sampling, say)
+    only runs while the bucket still holds its budget plus the budgets of the required stages after
+    it, and is otherwise deferred to the next trading day.
+    """
+
+    def __init__(self, algorithm, capacity_minutes=LEAKY_BUCKET_CAPACITY_MINUTES,
+                 refill_minutes=LEAKY_BUCKET_REFILL_MINUTES, interval_minutes=LEAKY_BUCKET_INTERVAL_MINUTES):
+        """
+        Args:
+            algorithm: The strategy whose end-of-day work this is
+            capacity_minutes (float): Bucket size in minutes of wall time
+            refill_minutes (float): Minutes of wall time added every interval
+            interval_minutes (float): Minutes of algorithm time per refill
+        """
+        self.algorithm = algorithm
+        self.stages = []
+        self.required_after = []           # List[int] - budgets of the required stages after each stage, in ns
+        self.capacity_ns = int(capacity_minutes * 60e9)
+        self.refill_per_minute_ns = refill_minutes * 60e9 / interval_minutes
+        self.tokens_ns = self.capacity_ns  # int - wall time left in the bucket
+        self.last_time = None              # datetime - algorithm time of the previous run, for the refill
+        self.runs = 0                      # int - end-of-day runs
+        self.started_ns = 0                # int - perf_counter_ns() when the current run began
+
+    def AddStage(self, name, callback, budget_ms, deferrable=False):
+        """Append a stage; stages run in the order they are added."""
+        self.stages.append(EndOfDayStage(name, callback, budget_ms, deferrable))
+        self.required_after = [0] * len(self.stages)
+        for index in range(len(self.stages) - 2, -1, -1):
+            stage = self.stages[index + 1]
+            self.required_after[index] = self.required_after[index + 1] + (0 if stage.deferrable else stage.budget_ns)
+
+    def _Refill(self):
+        now = self.algorithm.Time
+        if self.last_time is not None:
+            minutes = (now - self.last_time).total_seconds() / 60
+            self.tokens_ns = min(self.capacity_ns, self.tokens_ns + int(minutes * self.refill_per_minute_ns))
+        self.last_time = now
+
+    def Run(self):
+        """Run the stages in order (the strategy's scheduled OnEndOfDay)."""
+        self.started_ns = perf_counter_ns()
+        self._Refill()
+        for stage, required_after in zip(self.stages, self.required_after):
+            if stage.deferrable and self.tokens_ns < stage.budget_ns + required_after:
+                stage.deferrals += 1
+                self.algorithm.Log(f"End of day: {stage.name} deferred, {self.tokens_ns / 60e9:.1f} min left in the scheduled-event bucket")
+                continue
+            stage_started_ns = perf_counter_ns()
+            stage.callback()
+            elapsed_ns = perf_counter_ns() - stage_started_ns
+            self.tokens_ns -= elapsed_ns
+            stage.timings.Record(elapsed_ns)
+            stage.max_ns = max(stage.max_ns, elapsed_ns)
+            if elapsed_ns > stage.budget_ns:
+                stage.overruns += 1
+                self.algorithm.Log(f"WARNING: End of day: {stage.name} took {elapsed_ns / 1e6:.1f}ms, "
+                                   f"over its {stage.budget_ns / 1e6:.0f}ms budget")
+
+        self.runs += 1
+
+    def LogRun(self):
+        """Log each stage's p50/p99/max against its budget, with overruns and deferrals, for the whole run."""
+        self.algorithm.Log(f"End of Day Timings ({self.runs} trading days, {self.tokens_ns / 60e9:.1f} min left in the bucket):")
+        for stage in self.stages:
+            timings = stage.timings
+            self.algorithm.Log(f"  {stage.name}: n={timings.count}, p50={timings.Percentile(0.5) / 1e6:.2f}ms, "
+                               f"p99={timings.Percentile(0.99) / 1e6:.2f}ms, max={stage.max_ns / 1e6:.2f}ms, "
+                               f"budget={stage.budget_ns / 1e6:.0f}ms, overruns={stage.overruns}, deferred={stage.deferrals}")
@@ -0,0 +1,170 @@
+# region imports
+from AlgorithmImports import *
+from array import array
+from collections import deque
+from datetime import datetime, timedelta
+import struct
+from time import perf_counter
+# endregion
+
+# ObjectStore key of the checkpoint, saved alongside the strategy state (see state_store.py)
+INDICATOR_KEY = "turtle/indicators.bin"
+
+# Binary layout: header, then per symbol the ticker (length-prefixed UTF-8), the bar count, the bar
+# dates (yyyymmdd) and the bars' open, high, low, close and volume, one bar after another
+_HEADER = struct.Struct("<4sBHI")  # magic, version, depth, symbol count
+_COUNT = struct.Struct("<H")
+_MAGIC = b"TTIC"
+_VERSION = 1
+_FIELDS = 5
+
+
+class IndicatorCheckpoint:
+    """
+    Keeps the last `depth` daily bars of every symbol and saves them to the ObjectStore, so a
+    restarted algorithm can rebuild its Donchian channels and ATRs without SetWarmUp.
+
+    LEAN's indicators are C# objects whose windows can't be serialized directly, but a DCH over N
+    bars and an SMA ATR over N true ranges are fully determined by their last N (N + 1 for the ATR)
+    bars, so replaying those bars restores them exactly. Restore replays the checkpoint, then
+    fetches only the bars missed since it with a single History request, so the time to the first
+    decision depends on the days missed rather than on the channel lengths.
+    """
+
+    def __init__(self, algorithm, depth, key=INDICATOR_KEY):
+        """
+        Args:
+            algorithm: The strategy; its symbols, entry_channels, exit_channels and atrs are restored
+            depth (int): Bars kept per symbol, at least the longest channel and the ATR period + 1
+            key (str): ObjectStore key of the checkpoint
+        """
+        self.algorithm = algorithm
+        self.depth = depth
+        self.key = key
+        self.windows = {}  # Dictionary[Symbol, Deque[(int, float, float, float, float, float)]] - last bars as (yyyymmdd, open, high, low, close, volume)
+
+    def _Window(self, symbol):
+        window = self.windows.get(symbol)
+        if window is None:
+            window = self.windows[symbol] = deque(maxlen=self.depth)
+        return window
+
+    def RecordSlice(self, slice):
+        """Add the slice's bars for the traded symbols; call for every slice, warm-up included."""
+        symbols = self.algorithm.entry_channels
+        for bar in slice.Bars.Values:
+            if bar.Symbol in symbols:
+                time = bar.Time
+                self._Window(bar.Symbol).append((time.year * 10000 + time.month * 100 + time.day, bar.Open, bar.High,
+                                                 bar.Low, bar.Close, bar.Volume))
+
+    def ToBytes(self):
+        parts = [_HEADER.pack(_MAGIC, _VERSION, self.depth, len(self.windows))]
+        for symbol, window in self.windows.items():
+            name = str(symbol).encode("utf-8")
+            parts.append(bytes((len(name),)) + name + _COUNT.pack(len(window)))
+            parts.append(array("I", [row[0] for row in window]).tobytes())
+            parts.append(array("d", [value for row in window for value in row[1:]]).tobytes())
+        return b"".join(parts)
+
+    @staticmethod
+    def FromBytes(payload):
+        """
+        Returns:
+            dict: ticker -> list of (yyyymmdd, open, high, low, close, volume), oldest first
+
+        Raises:
+            ValueError: If the payload is not a checkpoint of a supported version
+        """
+        payload = bytes(payload)
+        magic, version, _, count = _HEADER.unpack_from(payload, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Unsupported indicator checkpoint (magic={magic!r}, version={version})")
+
+        offset = _HEADER.size
+        bars = {}
+        for _ in range(count):
+            length = payload[offset]
+            ticker = payload[offset + 1:offset + 1 + length].decode("utf-8")
+            offset += 1 + length
+            (rows,) = _COUNT.unpack_from(payload, offset)
+            offset += _COUNT.size
+            days = array("I")
+            days.frombytes(payload[offset:offset + rows * days.itemsize])
+            offset += rows * days.itemsize
+            values = array("d")
+            values.frombytes(payload[offset:offset + rows * _FIELDS * values.itemsize])
+            offset += rows * _FIELDS * values.itemsize
+            bars[ticker] = [(days[row],) + tuple(values[row * _FIELDS:(row + 1) * _FIELDS]) for row in range(rows)]
+        return bars
+
+    def Save(self):
+        """Write the kept bars to the ObjectStore."""
+        self.algorithm.ObjectStore.SaveBytes(self.key, self.ToBytes())
+
+    def Restore(self):
+        """
+        Rebuild every symbol's indicators from the checkpoint plus the bars missed since it.
+
+        Returns:
+            bool: True if every symbol's indicators are ready, so warm-up can be skipped. On False the
+                indicators are left reset for a normal warm-up.
+        """
+        algorithm = self.algorithm
+        store = algorithm.ObjectStore
+        if not store.ContainsKey(self.key):
+            algorithm.Log(f"No indicator checkpoint at {self.key}; warming up")
+            return False
+
+        started = perf_counter()
+        try:
+            checkpoint = self.FromBytes(store.ReadBytes(self.key))
+        except (ValueError, struct.error) as error:
+            algorithm.Log(f"ERROR: Could not read the indicator checkpoint ({error}); warming up")
+            return False
+
+        missing = [symbol for symbol in algorithm.symbols if not checkpoint.get(str(symbol))]
+        if missing:
+            algorithm.Log(f"No checkpointed bars for {', '.join(str(symbol) for symbol in missing)}; warming up")
+            return False
+
+        self.windows = {}
+        last_days = {}
+        for symbol in algorithm.symbols:
+            rows = checkpoint[str(symbol)]
+            self._Window(symbol).extend(rows)
+            last_days[symbol] = rows[-1][0]
+
+        # One History request for everything after the oldest checkpointed day; each symbol keeps only
+        # the bars after its own last checkpointed day
+        oldest = min(last_days.values())
+        since = datetime(oldest // 10000, oldest // 100 % 100, oldest % 100) + timedelta(days=1)
+        missed = 0
+        for bars in algorithm.History[TradeBar](algorithm.symbols, since, algorithm.Time, Resolution.Daily):
+            for bar in bars.Values:
+                day = bar.Time.year * 10000 + bar.Time.month * 100 + bar.Time.day
+                if day > last_days.get(bar.Symbol, day):
+                    self._Window(bar.Symbol).append((day, bar.Open, bar.High, bar.Low, bar.Close, bar.Volume))
+                    missed += 1
+
+        ready = True
+        for symbol in algorithm.symbols:
+            indicators = (algorithm.entry_channels[symbol], algorithm.exit_channels[symbol], algorithm.atrs[symbol])
+            for day, open_price, high, low, close, volume in self.windows[symbol]:
+                bar = TradeBar(datetime(day // 10000, day // 100 % 100, day % 100), symbol, open_price, high, low,
+                               close, volume, timedelta(days=1))
+                for indicator in indicators:
+                    indicator.Update(bar)
+            ready = ready and all(indicator.IsReady for indicator in indicators)
+
+        if not ready:
+            for symbol in algorithm.symbols:
+                for indicator in (algorithm.entry_channels[symbol], algorithm.exit_channels[symbol], algorithm.atrs[symbol]):
+                    indicator.Reset()
+            self.windows = {}
+            algorithm.Log("Indicator checkpoint too short to make every indicator ready; warming up")
+            return False
+
+        algorithm.Log(f"Restored indicators for {len(algorithm.symbols)} symbols from the checkpoint plus {missed} "
+                      f"missed bars in {(perf_counter() - started) * 1000:.1f} ms; skipping warm-up")
+        return True
@@ -0,0 +1,197 @@
+# region imports
+from array import array
+from time import perf_counter_ns
+# endregion
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket histogram of nanosecond durations. Buckets are log-linear: every power of two is
+    split into SUB_BUCKETS equal slices, so any percentile is within 25% of the true value while
+    recording stays a couple of integer operations.
+    """
+
+    SUB_BITS = 2
+    SUB_BUCKETS = 1 << SUB_BITS
+    BUCKETS = 64 * SUB_BUCKETS
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * self.BUCKETS))  # array[uint64] - samples per bucket
+        self.count = 0                                     # int - total samples
+        self.total_ns = 0                                  # int - sum of all samples
+
+    @classmethod
+    def BucketIndex(cls, duration_ns):
+        """Map a duration to its bucket."""
+        if duration_ns < cls.SUB_BUCKETS:
+            return max(duration_ns, 0)
+        exponent = duration_ns.bit_length() - 1
+        return exponent * cls.SUB_BUCKETS + ((duration_ns >> (exponent - cls.SUB_BITS)) & (cls.SUB_BUCKETS - 1))
+
+    @classmethod
+    def BucketMidpoint(cls, index):
+        """Representative duration (ns) of a bucket."""
+        if index < cls.SUB_BUCKETS:
+            return float(index)
+        exponent, sub = divmod(index, cls.SUB_BUCKETS)
+        width = 1 << (exponent - cls.SUB_BITS)
+        return (cls.SUB_BUCKETS + sub) * width + width / 2
+
+    def Record(self, duration_ns):
+        self.counts[self.BucketIndex(duration_ns)] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+
+    def Percentile(self, fraction):
+        """
+        Approximate percentile.
+
+        Args:
+            fraction (float): 0.5 for p50, 0.99 for p99
+
+        Returns:
+            float: Duration in nanoseconds, 0 if nothing was recorded
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(fraction * self.count + 0.999999))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.BucketMidpoint(index)
+        return self.BucketMidpoint(self.BUCKETS - 1)
+
+    def Merge(self, other):
+        """Add another histogram's samples to this one."""
+        for index, bucket_count in enumerate(other.counts):
+            if bucket_count:
+                self.counts[index] += bucket_count
+        self.count += other.count
+        self.total_ns += other.total_ns
+
+    def Reset(self):
+        for index in range(self.BUCKETS):
+            self.counts[index] = 0
+        self.count = 0
+        self.total_ns = 0
+
+
+class HotPathTimer:
+    """
+    Opt-in timing of OnData's sections and of the order-path methods. OnData calls Start() at the
+    top of each symbol and Lap(section) at each section boundary; the order-path methods are wrapped
+    on the algorithm instance. When instrumentation is off the algorithm holds None instead of a
+    timer and no method is wrapped, so the only cost left is a falsy check per section.
+    """
+
+    SECTIONS = ("validation", "data_preparation", "signals", "entry", "exits", "stop_check", "pyramiding")
+    METHODS = ("EnterLong", "EnterShort", "AddToLong", "AddToShort", "CalculatePositionSize", "GetAvailablePortfolioValue")
+
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.mark = 0     # int - perf_counter_ns() at the previous section boundary
+        self.daily = {name: LatencyHistogram() for name in self.SECTIONS + self.METHODS}  # Reset every day
+        self.run = {name: LatencyHistogram() for name in self.SECTIONS + self.METHODS}    # Accumulates the whole run
+
+        for name in self.METHODS:
+            setattr(algorithm, name, self._Timed(name, getattr(algorithm, name)))
+
+    def _Timed(self, name, method):
+        histogram = self.daily[name]
+
+        def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.Record(perf_counter_ns() - start)
+        timed.__name__ = name
+        return timed
+
+    def Start(self):
+        """Mark the start of a symbol's pass through OnData."""
+        self.mark = perf_counter_ns()
+
+    def Lap(self, section):
+        """Record the time since the previous boundary against section."""
+        now = perf_counter_ns()
+        self.daily[section].Record(now - self.mark)
+        self.mark = now
+
+    def _Report(self, title, histograms):
+        self.algorithm.Log(title)
+        for name in self.SECTIONS + self.METHODS:
+            histogram = histograms[name]
+            if histogram.count:
+                self.algorithm.Log(f"  {name}: n={histogram.count}, p50={histogram.Percentile(0.5) / 1000:.1f}us, "
+                                   f"p99={histogram.Percentile(0.99) / 1000:.1f}us")
+
+    def LogDaily(self):
+        """Log today's p50/p99 per section, fold today into the run totals and start a new day."""
+        self._Report("Hot Path Timings (today):", self.daily)
+        for name, histogram in self.daily.items():
+            self.run[name].Merge(histogram)
+            histogram.Reset()
+
+    def LogRun(self):
+        """Log p50/p99 per section for the whole run, including the current day."""
+        for name, histogram in self.daily.items():
+            self.run[name].Merge(histogram)
+            histogram.Reset()
+        self._Report("Hot Path Timings (run):", self.run)
+
+
+class ThroughputStatistics:
+    """
+    Always-on engine throughput counters published as runtime statistics next to P&L: slices per
+    second, symbols evaluated per slice, orders per day, time in OnData and at the end of the day,
+    and warm-up duration. Recording is a counter increment and a clock read per call; the string
+    formatting happens only in Publish, which runs once per daily report.
+    """
+
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.started_ns = perf_counter_ns()  # int - when Initialize began
+        self.warm_up_ns = None               # int - wall time from Initialize to the end of warm-up
+        self.trading_started_ns = None       # int - when warm-up finished
+        self.slices = 0                      # int - slices processed after warm-up
+        self.symbols_evaluated = 0           # int - symbols that reached the signal calculation
+        self.days = 0                        # int - distinct days with slices after warm-up
+        self.last_day = None
+        self.orders = 0                      # int - filled orders
+        self.on_data_ns = 0                  # int - total time in OnData after warm-up
+        self.report_ns = 0                   # int - total time in the end-of-day pipeline
+
+    def WarmUpFinished(self):
+        now = perf_counter_ns()
+        self.warm_up_ns = now - self.started_ns
+        self.trading_started_ns = now
+
+    def RecordSlice(self, started_ns, symbols_evaluated):
+        """Count one OnData call that began at started_ns (perf_counter_ns)."""
+        self.on_data_ns += perf_counter_ns() - started_ns
+        self.slices += 1
+        self.symbols_evaluated += symbols_evaluated
+        day = self.algorithm.Time.date()
+        if day != self.last_day:
+            self.last_day = day
+            self.days += 1
+
+    def RecordReport(self, started_ns):
+        self.report_ns += perf_counter_ns() - started_ns
+
+    def RecordOrder(self):
+        self.orders += 1
+
+    def Publish(self):
+        """Set the throughput runtime statistics from the counters so far."""
+        set_statistic = self.algorithm.SetRuntimeStatistic
+        if self.trading_started_ns is not None:
+            elapsed = (perf_counter_ns() - self.trading_started_ns) / 1e9
+            set_statistic("Slices/sec", f"{self.slices / elapsed:,.0f}" if elapsed > 0 else "0")
+            set_statistic("Warm-up", f"{self.warm_up_ns / 1e9:.2f}s")
+        set_statistic("Symbols/Slice", f"{self.symbols_evaluated / self.slices:.1f}" if self.slices else "0")
+        set_statistic("Orders/Day", f"{self.orders / self.days:.2f}" if self.days else "0")
+        set_statistic("OnData Time", f"{self.on_data_ns / 1e9:.2f}s")
+        set_statistic("Report Time", f"{self.report_ns / 1e9:.2f}s")
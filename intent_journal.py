@@ -0,0 +1,187 @@
+# region imports
+import json
+import os
+# endregion
+
+# ObjectStore key of the journal file
+JOURNAL_KEY = "turtle/intents.jsonl"
+
+
+class IntentJournal:
+    """
+    Write-ahead journal for the order methods. Each entry, add or exit writes an intent line with
+    the position book it is about to set before the order is submitted, and an outcome line once
+    the book is updated. A crash between the two leaves a pending intent; on restart Replay checks
+    it against the holdings and either applies the book it recorded or abandons it, instead of
+    OnData liquidating a position that has no stop.
+
+    Lines are appended to a file in the ObjectStore (GetFilePath) and flushed to the OS as they are
+    written, which survives a process crash. fsync, which also survives losing the machine, is
+    batched: every `sync_every` records and at the end of each slice (Sync). The journal is
+    truncated whenever the strategy state is snapshotted (Compact), since the snapshot then holds
+    everything it recorded.
+
+    Intents carry absolute book values (the full entry price list, the stop, the level), so
+    applying one twice leaves the same book and Replay is idempotent.
+
+    Without `persist` the journal is only replayed: nothing is written, outcomes included, and the
+    file is not created.
+    """
+
+    def __init__(self, algorithm, replay=False, sync_every=16, key=JOURNAL_KEY, persist=True):
+        """
+        Args:
+            algorithm: The strategy whose order methods are journaled
+            replay (bool): Keep the existing journal for Replay; otherwise it is truncated
+            sync_every (int): Records between fsyncs
+            key (str): ObjectStore key of the journal file
+            persist (bool): Whether records are written; otherwise the journal is read-only
+        """
+        self.algorithm = algorithm
+        self.sync_every = sync_every
+        self.path = None    # str - journal file, None when read-only and nothing was journaled
+        self.handle = None  # file - open for appending, None when read-only
+        if persist or algorithm.ObjectStore.ContainsKey(key):
+            self.path = algorithm.ObjectStore.GetFilePath(key)
+        if persist:
+            self.handle = open(self.path, "a" if replay else "w", encoding="utf-8")
+        self.next_id = 1
+        self.unsynced = 0  # int - records flushed to the OS but not yet fsynced
+        self.pending_replay = replay  # bool - Compact waits until the journal has been replayed
+        if replay:
+            intents = self.Read()[0]
+            self.next_id = max(intents, default=0) + 1
+
+    def _Write(self, record):
+        if self.handle is None:
+            return
+        self.handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.handle.flush()
+        self.unsynced += 1
+        if self.unsynced >= self.sync_every:
+            self.Sync()
+
+    def Sync(self):
+        """fsync any records written since the last sync."""
+        if self.unsynced:
+            os.fsync(self.handle.fileno())
+            self.unsynced = 0
+
+    def RecordIntent(self, action, symbol, quantity, stop=None, entry_prices=None, level=0, last_add=None):
+        """
+        Journal an order about to be placed and the book it will leave.
+
+        Args:
+            action (str): "enter_long", "enter_short", "add_long", "add_short" or "exit"
+            symbol: Symbol being traded
+            quantity (float): Signed order quantity
+            stop (float): Stop after the order; None for exits
+            entry_prices (list[float]): Entry prices after the order
+            level (int): Pyramid level after the order; 0 for exits
+            last_add (float): Last add price after the order
+
+        Returns:
+            int: Intent id for RecordOutcome
+        """
+        intent_id = self.next_id
+        self.next_id += 1
+        self._Write({"id": intent_id, "type": "intent", "time": str(self.algorithm.Time), "action": action,
+                     "symbol": str(symbol), "quantity": quantity,
+                     "holding_before": self.algorithm.Portfolio[symbol].Quantity, "stop": stop,
+                     "entry_prices": entry_prices or [], "level": level, "last_add": last_add})
+        return intent_id
+
+    def RecordOutcome(self, intent_id, status="applied"):
+        """Journal what became of an intent: "applied", or on replay "recovered", "abandoned" or "unresolved"."""
+        self._Write({"id": intent_id, "type": "outcome", "status": status})
+
+    def Read(self):
+        """
+        Returns:
+            tuple: (intents by id, in journal order; statuses by id) from the journal file
+        """
+        intents, statuses = {}, {}
+        if self.path is None:
+            return intents, statuses
+        with open(self.path, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # A line torn by the crash; its intent was never submitted
+                if record.get("type") == "intent":
+                    intents[record["id"]] = record
+                elif record.get("type") == "outcome":
+                    statuses[record["id"]] = record["status"]
+        return intents, statuses
+
+    def _Apply(self, symbol, intent):
+        algorithm = self.algorithm
+        if intent["action"] == "exit":
+            algorithm.CleanupPosition(symbol)
+            return
+        algorithm.stop_losses[symbol] = intent["stop"]
+        algorithm.entry_prices[symbol] = list(intent["entry_prices"])
+        algorithm.pyramid_level[symbol] = intent["level"]
+        algorithm.last_add_price[symbol] = intent["last_add"]
+        algorithm.position_quantity[symbol] = intent["holding_before"] + intent["quantity"]
+        if algorithm.state_store:
+            algorithm.state_store.MarkDirty(symbol)
+
+    def Replay(self):
+        """
+        Re-apply the journal to the position book, once holdings are loaded (OnWarmupFinished).
+
+        Applied intents are re-applied in order, which is idempotent over a restored snapshot. A pending
+        intent whose order filled (the holding moved by its quantity) is applied and marked recovered;
+        one whose order never filled (the holding is unchanged) is marked abandoned; anything else is
+        logged as unresolved and left to reconciliation.
+
+        Returns:
+            dict: status -> number of pending intents resolved that way
+        """
+        algorithm = self.algorithm
+        intents, statuses = self.Read()
+        symbols = {str(symbol): symbol for symbol in algorithm.symbols}
+        resolved = {"recovered": 0, "abandoned": 0, "unresolved": 0}
+        for intent_id, intent in intents.items():
+            symbol = symbols.get(intent["symbol"])
+            status = statuses.get(intent_id)
+            if symbol is None or status in ("abandoned", "unresolved"):
+                continue
+            if status in ("applied", "recovered"):
+                self._Apply(symbol, intent)
+                continue
+
+            holding = algorithm.Portfolio[symbol].Quantity
+            if holding == intent["holding_before"] + intent["quantity"]:
+                self._Apply(symbol, intent)
+                status = "recovered"
+            elif holding == intent["holding_before"]:
+                status = "abandoned"
+            else:
+                status = "unresolved"
+                algorithm.Log(f"WARNING: Journaled {intent['action']} of {intent['quantity']} {symbol} is unresolved: holding "
+                              f"{holding}, expected {intent['holding_before']} before or {intent['holding_before'] + intent['quantity']} after")
+            self.RecordOutcome(intent_id, status)
+            resolved[status] += 1
+        self.Sync()
+        self.pending_replay = False
+
+        if any(resolved.values()):
+            algorithm.Log(f"Intent journal replayed {len(intents)} intents: {resolved['recovered']} recovered, "
+                          f"{resolved['abandoned']} abandoned, {resolved['unresolved']} unresolved")
+        return resolved
+
+    def Compact(self):
+        """Truncate the journal once the state snapshot covers everything in it."""
+        if self.pending_replay or self.handle is None:
+            return
+        self.Sync()
+        self.handle.close()
+        self.handle = open(self.path, "w", encoding="utf-8")
+
+    def Close(self):
+        if self.handle is not None:
+            self.Sync()
+            self.handle.close()
@@ -0,0 +1,140 @@
+# region imports
+from AlgorithmImports import *
+# endregion
+
+INFINITY = float("inf")
+
+
+class IntradaySlice:
+    """The part of a Slice OnData reads (Time, Bars, Keys), over bars gathered by the monitor."""
+
+    def __init__(self, time, bars):
+        self.Time = time
+        self.Bars = bars
+
+    @property
+    def Keys(self):
+        return list(self.Bars.keys())
+
+
+class IntradayMonitor:
+    """
+    Dual-rate mode: securities are subscribed at minute resolution, but the channels and ATRs are
+    updated from a daily consolidator and the full OnData evaluation runs once a day on the
+    consolidated bars, as in daily mode. In between, each minute only compares the close with
+    precomputed trigger levels:
+
+        flat   - the entry channel's high and low (breakouts)
+        long   - the higher of the stop and the exit channel's low; the next add price (last add + 1N)
+        short  - the lower of the stop and the exit channel's high; the next add price (last add - 1N)
+
+    and hands the symbols that crossed one to OnData as a slice of their minute bars. Only armed
+    symbols are compared, those within `arm_distance` N of a trigger when the levels were last
+    computed or re-armed (every `rearm_minutes`), so a quiet minute costs a few attribute checks.
+    A symbol that moves from unarmed to past its trigger between re-arms is still caught by the
+    daily evaluation at the close.
+    """
+
+    def __init__(self, algorithm, arm_distance=1.0, rearm_minutes=30):
+        """
+        Args:
+            algorithm: The strategy being monitored
+            arm_distance (float): Distance to a trigger, in N, within which a symbol is checked every minute
+            rearm_minutes (int): Minutes between re-arming scans of every symbol
+        """
+        self.algorithm = algorithm
+        self.arm_distance = arm_distance
+        self.rearm_minutes = rearm_minutes
+        self.daily_bars = TradeBars()  # TradeBars - the session's consolidated bars, delivered together at the close
+        self.triggers = {}             # Dictionary[Symbol, Tuple[float, float]] - closes at or below / at or above which a symbol is evaluated
+        self.armed = {}                # Dictionary[Symbol, Tuple[float, float]] - triggers of the symbols checked every minute
+        self.minutes_to_rearm = rearm_minutes
+        self.triggered = 0             # int - intraday evaluations handed to OnData
+
+    def Subscribe(self, symbol):
+        """Update the symbol's channels and ATR from daily bars consolidated from its minute data."""
+        self.algorithm.Consolidate(symbol, Resolution.Daily, self.OnDailyBar)
+
+    def OnDailyBar(self, bar):
+        algorithm = self.algorithm
+        symbol = bar.Symbol
+        algorithm.entry_channels[symbol].Update(bar)
+        algorithm.exit_channels[symbol].Update(bar)
+        algorithm.atrs[symbol].Update(bar)
+        self.daily_bars[symbol] = bar
+
+    def OnMinute(self, slice):
+        """
+        Returns:
+            tuple: (slice, symbols) for OnData to evaluate - the consolidated bars and every symbol once the
+                session closes, or the minute bars of the symbols past a trigger - or (None, None)
+        """
+        if self.daily_bars:
+            daily, self.daily_bars = IntradaySlice(slice.Time, self.daily_bars), TradeBars()
+            self.minutes_to_rearm = self.rearm_minutes  # Every symbol is re-armed once OnData has evaluated it
+            return daily, self.algorithm.symbols
+        if self.algorithm.IsWarmingUp:
+            return None, None
+
+        self.minutes_to_rearm -= 1
+        if self.minutes_to_rearm <= 0:
+            self.Arm(self.triggers)
+            self.minutes_to_rearm = self.rearm_minutes
+
+        crossed = None
+        bars = slice.Bars
+        for symbol, (low, high) in self.armed.items():
+            bar = bars.get(symbol)
+            if bar is not None and not low < bar.Close < high:
+                if crossed is None:
+                    crossed = TradeBars()
+                crossed[symbol] = bar
+        if crossed is None:
+            return None, None
+        self.triggered += len(crossed)
+        return IntradaySlice(slice.Time, crossed), list(crossed.keys())
+
+    def Refresh(self, symbols=None):
+        """
+        Recompute the trigger levels from the book and indicators and re-arm, after OnData has evaluated
+        the symbols (None for all of them). A level the price is already past was just declined by OnData
+        (an add short of cash, say), so it is dropped until the next day's levels rather than re-evaluated
+        every minute.
+        """
+        algorithm = self.algorithm
+        symbols = algorithm.symbols if symbols is None else symbols
+        triggers = {}
+        for symbol in symbols:
+            entry, exit, atr = algorithm.entry_channels[symbol], algorithm.exit_channels[symbol], algorithm.atrs[symbol]
+            holding = algorithm.Portfolio[symbol]
+            stop = algorithm.stop_losses.get(symbol)
+            if not (entry.IsReady and exit.IsReady and atr.IsReady) or (holding.Invested and stop is None):
+                # Left to the daily evaluation, which also liquidates a position without a stop
+                self.triggers.pop(symbol, None)
+                self.armed.pop(symbol, None)
+                continue
+            if not holding.Invested:
+                low, high = entry.Lower.Current.Value, entry.Upper.Current.Value
+            else:
+                can_add = algorithm.pyramid_level.get(symbol, algorithm.MAX_PYRAMID_LEVELS) < algorithm.MAX_PYRAMID_LEVELS
+                last_add = algorithm.last_add_price.get(symbol)
+                n = atr.Current.Value
+                if holding.IsLong:
+                    low, high = max(stop, exit.Lower.Current.Value), last_add + n if can_add and last_add is not None else INFINITY
+                else:
+                    low, high = last_add - n if can_add and last_add is not None else -INFINITY, min(stop, exit.Upper.Current.Value)
+            price = algorithm.Securities[symbol].Price
+            triggers[symbol] = (low if price > low else -INFINITY, high if price < high else INFINITY)
+        self.triggers.update(triggers)
+        self.Arm(triggers)
+
+    def Arm(self, triggers):
+        """Arm the symbols among `triggers` whose price is within arm_distance N of a trigger, and disarm the rest."""
+        algorithm = self.algorithm
+        for symbol, (low, high) in triggers.items():
+            reach = algorithm.atrs[symbol].Current.Value * self.arm_distance
+            price = algorithm.Securities[symbol].Price
+            if price - reach <= low or price + reach >= high:
+                self.armed[symbol] = (low, high)
+            else:
+                self.armed.pop(symbol, None)
@@ -0,0 +1,26 @@
+"""
+A lightweight, in-process stand-in for the parts of LEAN's AlgorithmImports the strategy uses, so
+main.py can be imported and driven on a plain Python install (benchmarks, tests, profiling).
+
+Call install() before importing main; it registers the stand-in as the AlgorithmImports module
+only when the real LEAN runtime is not available.
+"""
+import importlib.util
+import sys
+
+
+def install():
+    """
+    Make `from AlgorithmImports import *` resolve to the stand-in when LEAN isn't installed.
+
+    Returns:
+        bool: True if the stand-in was installed, False if the real AlgorithmImports is available
+    """
+    if "AlgorithmImports" in sys.modules:
+        return sys.modules["AlgorithmImports"].__name__ == "lean_standin.algorithm_imports"
+    if importlib.util.find_spec("AlgorithmImports") is not None:
+        return False
+
+    from lean_standin import algorithm_imports
+    sys.modules["AlgorithmImports"] = algorithm_imports
+    return True
@@ -0,0 +1,65 @@
+"""
+Run TurtleTradingStrategy on seeded random-walk bars with the stand-in, optionally under cProfile.
+
+Usage:
+    python -m lean_standin [--years 10] [--symbols 1] [--seed 7] [--log] [--profile [--top 25]]
+"""
+from datetime import date, timedelta
+import argparse
+import cProfile
+import pstats
+
+import lean_standin
+
+lean_standin.install()
+
+from lean_standin.data import RandomWalkBars
+from lean_standin.engine import Backtest
+from main import TurtleTradingStrategy
+
+START = date(2010, 1, 1)
+
+
+class _StrategyWithSymbols(TurtleTradingStrategy):
+    """The strategy with extra random-walk tickers added after its own symbols."""
+
+    extra_tickers = []
+
+    def Initialize(self):
+        super().Initialize()
+        for ticker in self.extra_tickers:
+            self.AddTradingSymbol(ticker)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the strategy on the LEAN stand-in")
+    parser.add_argument("--years", type=int, default=10, help="Years to simulate after the start date")
+    parser.add_argument("--symbols", type=int, default=1, help="Number of symbols to trade")
+    parser.add_argument("--seed", type=int, default=7, help="Random-walk seed")
+    parser.add_argument("--log", action="store_true", help="Keep Log output (formatting cost included)")
+    parser.add_argument("--profile", action="store_true", help="Run under cProfile and print the hottest functions")
+    parser.add_argument("--top", type=int, default=25, help="Functions to print when profiling")
+    arguments = parser.parse_args(argv)
+
+    _StrategyWithSymbols.extra_tickers = [f"SYM{index:05d}" for index in range(1, arguments.symbols)]
+    end = START + timedelta(days=365 * arguments.years)
+    history = RandomWalkBars(["AAPL"] + _StrategyWithSymbols.extra_tickers, START - timedelta(days=90),
+                             (end - START).days + 90, seed=arguments.seed)
+
+    profiler = cProfile.Profile() if arguments.profile else None
+    if profiler:
+        profiler.enable()
+    result = Backtest(_StrategyWithSymbols, history, end=end, log=arguments.log)
+    if profiler:
+        profiler.disable()
+
+    print(f"{result.CalendarDays:,} days ({result.TradingDays:,} trading) in {result.Elapsed:.2f}s: "
+          f"{result.DaysPerSecond:,.0f} days/s, {len(result.Orders):,} orders, "
+          f"final equity ${result.Equity[-1][1]:,.2f}")
+    if profiler:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(arguments.top)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
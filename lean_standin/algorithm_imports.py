@@ -0,0 +1,772 @@
+"""
+Pure-Python stand-ins for the AlgorithmImports names the strategy uses. Behaviour follows LEAN
+where the strategy depends on it (indicator definitions, holdings arithmetic) and is simplified
+everywhere else: market orders fill immediately at the security's current price with no fees.
+"""
+from collections import deque
+from datetime import datetime, time, timedelta
+import os
+import tempfile
+
+__all__ = [
+    "Resolution", "MovingAverageType", "SeriesType", "OrderStatus", "Symbol", "TradeBar", "TradeBars", "Slice",
+    "DonchianChannel", "AverageTrueRange", "SimpleMovingAverage", "Security", "SecurityHolding",
+    "SecurityManager", "SecurityPortfolioManager", "OrderTicket", "OrderEvent", "ObjectStore", "Chart",
+    "Series", "ChartPoint", "ScheduledEvent", "FuncRiskFreeRateInterestRateModel", "TradeBarConsolidator",
+    "QCAlgorithm",
+]
+
+_SESSION_CLOSE = time(16, 0)
+
+
+class Resolution:
+    Tick, Second, Minute, Hour, Daily = range(5)
+
+
+class MovingAverageType:
+    Simple, Exponential, Wilders = range(3)
+
+
+class SeriesType:
+    Line, Scatter, Candle, Bar, Flag, StackedArea, Pie, Treemap = range(8)
+
+
+class OrderStatus:
+    New, Submitted, PartiallyFilled, Filled, Canceled, NoneStatus, Invalid = range(7)
+
+
+class Symbol:
+    """Ticker-backed symbol; equal symbols hash alike so they work as dictionary keys."""
+
+    __slots__ = ("Value", "_hash")
+
+    def __init__(self, value):
+        self.Value = value.upper()
+        self._hash = hash(self.Value)  # Symbols key every per-symbol dictionary, so hash once
+
+    def __str__(self):
+        return self.Value
+
+    __repr__ = __str__
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return isinstance(other, Symbol) and other.Value == self.Value
+
+    def __lt__(self, other):
+        return self.Value < other.Value
+
+
+class TradeBar:
+    __slots__ = ("Time", "EndTime", "Symbol", "Open", "High", "Low", "Close", "Volume")
+
+    def __init__(self, time, symbol, open, high, low, close, volume, period=timedelta(days=1)):
+        self.Time = time
+        self.EndTime = time + period
+        self.Symbol = symbol
+        self.Open = open
+        self.High = high
+        self.Low = low
+        self.Close = close
+        self.Volume = volume
+
+    @property
+    def Price(self):
+        return self.Close
+
+    @property
+    def Value(self):
+        return self.Close
+
+
+class TradeBars(dict):
+    """Symbol -> TradeBar, like LEAN's TradeBars dictionary."""
+
+    @property
+    def Values(self):
+        return list(self.values())
+
+
+class Slice:
+    def __init__(self, time, bars):
+        self.Time = time
+        self.Bars = bars if isinstance(bars, TradeBars) else TradeBars(bars)
+
+    @property
+    def Keys(self):
+        return list(self.Bars.keys())
+
+    def __contains__(self, symbol):
+        return symbol in self.Bars
+
+    def __getitem__(self, symbol):
+        return self.Bars[symbol]
+
+    def ContainsKey(self, symbol):
+        return symbol in self.Bars
+
+
+class _DataPoint:
+    __slots__ = ("Time", "Value")
+
+    def __init__(self):
+        self.Time = None
+        self.Value = 0.0
+
+
+class _Indicator:
+    """Common surface of LEAN indicators: Current.Value, IsReady, Samples, Update, Reset."""
+
+    def __init__(self, name, warm_up_period):
+        self.Name = name
+        self.WarmUpPeriod = warm_up_period
+        self.Current = _DataPoint()
+        self.Samples = 0
+
+    @property
+    def IsReady(self):
+        return self.Samples >= self.WarmUpPeriod
+
+    def _Set(self, time, value):
+        self.Current.Time = time
+        self.Current.Value = value
+
+    def Reset(self):
+        self.Current = _DataPoint()
+        self.Samples = 0
+
+
+class SimpleMovingAverage(_Indicator):
+    def __init__(self, period, name=None):
+        super().__init__(name or f"SMA({period})", period)
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.sum = 0.0
+
+    def Update(self, time, value):
+        if len(self.window) == self.period:
+            self.sum -= self.window[0]
+        self.window.append(value)
+        self.sum += value
+        self.Samples += 1
+        self._Set(time, self.sum / len(self.window))
+        return self.IsReady
+
+    def Reset(self):
+        super().Reset()
+        self.window.clear()
+        self.sum = 0.0
+
+
+class _Band(_Indicator):
+    """Upper/Lower band of a Donchian channel: rolling max/min over the period via a monotonic deque."""
+
+    def __init__(self, name, period, is_upper):
+        super().__init__(name, period)
+        self.period = period
+        self.is_upper = is_upper
+        self.candidates = deque()  # (sample index, value), monotonic so the extreme is always at the left
+
+    def Update(self, time, value):
+        index = self.Samples
+        if self.is_upper:
+            while self.candidates and self.candidates[-1][1] <= value:
+                self.candidates.pop()
+        else:
+            while self.candidates and self.candidates[-1][1] >= value:
+                self.candidates.pop()
+        self.candidates.append((index, value))
+        if self.candidates[0][0] <= index - self.period:
+            self.candidates.popleft()
+        self.Samples += 1
+        self._Set(time, self.candidates[0][1])
+
+    def Reset(self):
+        super().Reset()
+        self.candidates.clear()
+
+
+class DonchianChannel(_Indicator):
+    """Highest high / lowest low over the period, including the current bar, like LEAN's DCH."""
+
+    def __init__(self, period, name=None):
+        super().__init__(name or f"DCH({period},{period})", period)
+        self.Upper = _Band("UpperBand", period, True)
+        self.Lower = _Band("LowerBand", period, False)
+
+    def Update(self, bar):
+        self.Upper.Update(bar.EndTime, bar.High)
+        self.Lower.Update(bar.EndTime, bar.Low)
+        self.Samples += 1
+        self._Set(bar.EndTime, (self.Upper.Current.Value + self.Lower.Current.Value) / 2)
+        return self.IsReady
+
+    def Reset(self):
+        super().Reset()
+        self.Upper.Reset()
+        self.Lower.Reset()
+
+
+class AverageTrueRange(_Indicator):
+    """Moving average of the true range; the first bar's true range is its high-low range."""
+
+    def __init__(self, period, moving_average_type=MovingAverageType.Simple, name=None):
+        super().__init__(name or f"ATR({period})", period)
+        if moving_average_type != MovingAverageType.Simple:
+            raise NotImplementedError("The stand-in only implements the simple moving average ATR")
+        self.TrueRange = _DataPoint()
+        self.smoother = SimpleMovingAverage(period)
+        self.previous_close = None
+
+    def Update(self, bar):
+        if self.previous_close is None:
+            true_range = bar.High - bar.Low
+        else:
+            true_range = max(bar.High - bar.Low, abs(bar.High - self.previous_close), abs(bar.Low - self.previous_close))
+        self.previous_close = bar.Close
+        self.TrueRange.Value = true_range
+        self.smoother.Update(bar.EndTime, true_range)
+        self.Samples += 1
+        self._Set(bar.EndTime, self.smoother.Current.Value)
+        return self.IsReady
+
+    @property
+    def IsReady(self):
+        return self.smoother.IsReady
+
+    def Reset(self):
+        super().Reset()
+        self.smoother.Reset()
+        self.previous_close = None
+
+
+class Security:
+    def __init__(self, symbol, resolution):
+        self.Symbol = symbol
+        self.Resolution = resolution
+        self.Price = 0.0
+        self.Open = self.High = self.Low = self.Close = 0.0
+        self.Volume = 0.0
+        self.HasData = False
+
+    def SetMarketPrice(self, bar):
+        self.Open, self.High, self.Low, self.Close, self.Volume = bar.Open, bar.High, bar.Low, bar.Close, bar.Volume
+        self.Price = bar.Close
+        self.HasData = True
+
+
+class SecurityHolding:
+    def __init__(self, security):
+        self.Security = security
+        self.Symbol = security.Symbol
+        self.Quantity = 0
+        self.AveragePrice = 0.0
+
+    @property
+    def Price(self):
+        return self.Security.Price
+
+    @property
+    def Invested(self):
+        return self.Quantity != 0
+
+    @property
+    def IsLong(self):
+        return self.Quantity > 0
+
+    @property
+    def IsShort(self):
+        return self.Quantity < 0
+
+    @property
+    def HoldingsValue(self):
+        return self.Quantity * self.Security.Price
+
+    @property
+    def AbsoluteHoldingsValue(self):
+        return abs(self.HoldingsValue)
+
+    @property
+    def AbsoluteQuantity(self):
+        return abs(self.Quantity)
+
+    @property
+    def UnrealizedProfit(self):
+        return (self.Security.Price - self.AveragePrice) * self.Quantity
+
+    def total_close_profit(self):
+        """Profit if the position were closed at the current price (the stand-in charges no fees)."""
+        return self.UnrealizedProfit
+
+    TotalCloseProfit = total_close_profit
+
+
+class SecurityManager(dict):
+    """Symbol -> Security, like LEAN's Securities collection."""
+
+
+class SecurityPortfolioManager:
+    """
+    Holdings keyed by Symbol plus cash. TotalPortfolioValue can be assigned, as the strategy's
+    self-tests do, to pin the value until cash, prices or holdings next change.
+    """
+
+    def __init__(self, securities):
+        self._securities = securities
+        self._holdings = {}
+        self._total_override = None
+        self.Cash = 0.0
+
+    def _Holding(self, symbol):
+        holding = self._holdings.get(symbol)
+        if holding is None:
+            holding = self._holdings[symbol] = SecurityHolding(self._securities[symbol])
+        return holding
+
+    def __getitem__(self, symbol):
+        return self._Holding(symbol)
+
+    def __contains__(self, symbol):
+        return symbol in self._securities
+
+    def __iter__(self):
+        return iter(self._securities)
+
+    def keys(self):
+        return list(self._securities.keys())
+
+    def items(self):
+        return [(symbol, self._Holding(symbol)) for symbol in self._securities]
+
+    @property
+    def Keys(self):
+        return self.keys()
+
+    @property
+    def Values(self):
+        return [self._Holding(symbol) for symbol in self._securities]
+
+    @property
+    def Invested(self):
+        return any(holding.Invested for holding in self._holdings.values())
+
+    @property
+    def TotalHoldingsValue(self):
+        return sum(holding.HoldingsValue for holding in self._holdings.values())
+
+    @property
+    def TotalPortfolioValue(self):
+        if self._total_override is not None:
+            return self._total_override
+        return self.Cash + self.TotalHoldingsValue
+
+    @TotalPortfolioValue.setter
+    def TotalPortfolioValue(self, value):
+        self._total_override = value
+
+    def ResetTotalPortfolioValue(self):
+        """Drop a pinned TotalPortfolioValue so it is computed from cash and holdings again (stand-in only)."""
+        self._total_override = None
+
+    def ApplyFill(self, symbol, quantity, price):
+        """Update cash and the holding for a fill (stand-in only)."""
+        holding = self._Holding(symbol)
+        self._total_override = None
+        self.Cash -= quantity * price
+
+        new_quantity = holding.Quantity + quantity
+        if new_quantity == 0:
+            holding.AveragePrice = 0.0
+        elif holding.Quantity == 0 or (holding.Quantity > 0) != (new_quantity > 0):
+            holding.AveragePrice = price  # Opened or flipped
+        elif (holding.Quantity > 0) == (quantity > 0):
+            holding.AveragePrice = (holding.AveragePrice * holding.Quantity + price * quantity) / new_quantity
+        holding.Quantity = new_quantity
+
+
+class OrderTicket:
+    def __init__(self, order_id, symbol, quantity, time, status, fill_price):
+        self.OrderId = order_id
+        self.Symbol = symbol
+        self.Quantity = quantity
+        self.Time = time
+        self.Status = status
+        self.AverageFillPrice = fill_price
+        self.QuantityFilled = quantity if status == OrderStatus.Filled else 0
+
+
+class OrderEvent:
+    def __init__(self, order_id, symbol, time, status, fill_price, fill_quantity):
+        self.OrderId = order_id
+        self.Symbol = symbol
+        self.UtcTime = time
+        self.Status = status
+        self.FillPrice = fill_price
+        self.FillQuantity = fill_quantity
+        self.OrderFee = 0.0
+
+
+class _TransactionManager:
+    """Order queries; stand-in market orders fill immediately, so there are never open orders."""
+
+    def GetOpenOrders(self, symbol=None):
+        return []
+
+
+class ObjectStore:
+    """In-memory ObjectStore; GetFilePath materialises a key as a real file in a temporary folder."""
+
+    def __init__(self):
+        self._data = {}
+        self._folder = None
+
+    def ContainsKey(self, key):
+        self._Sync(key)
+        return key in self._data
+
+    def ReadBytes(self, key):
+        self._Sync(key)
+        return self._data[key]
+
+    def Read(self, key):
+        return self.ReadBytes(key).decode("utf-8")
+
+    def SaveBytes(self, key, content):
+        self._data[key] = bytes(content)
+        if self._folder is not None and os.path.exists(self._Path(key)):
+            with open(self._Path(key), "wb") as handle:
+                handle.write(self._data[key])
+        return True
+
+    def Save(self, key, text):
+        return self.SaveBytes(key, text.encode("utf-8"))
+
+    def Delete(self, key):
+        self._data.pop(key, None)
+        if self._folder is not None and os.path.exists(self._Path(key)):
+            os.remove(self._Path(key))
+        return True
+
+    @property
+    def Keys(self):
+        return list(self._data.keys())
+
+    def _Path(self, key):
+        return os.path.join(self._folder, *key.split("/"))
+
+    def _Sync(self, key):
+        # Files written through GetFilePath are visible to the byte API, as in LEAN
+        if self._folder is not None and os.path.exists(self._Path(key)):
+            with open(self._Path(key), "rb") as handle:
+                self._data[key] = handle.read()
+
+    def GetFilePath(self, key):
+        if self._folder is None:
+            self._folder = tempfile.mkdtemp(prefix="standin-objectstore-")
+        path = self._Path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if key in self._data and not os.path.exists(path):
+            with open(path, "wb") as handle:
+                handle.write(self._data[key])
+        return path
+
+
+class ChartPoint:
+    __slots__ = ("Time", "Value")
+
+    def __init__(self, time, value):
+        self.Time = time
+        self.Value = value
+
+
+class Series:
+    def __init__(self, name, series_type=SeriesType.Line, index=0, unit="$"):
+        self.Name = name
+        self.SeriesType = series_type
+        self.Index = index
+        self.Unit = unit
+        self.Values = []
+
+    def AddPoint(self, time, value):
+        self.Values.append(ChartPoint(time, value))
+
+
+class Chart:
+    def __init__(self, name):
+        self.Name = name
+        self.Series = {}
+
+    def AddSeries(self, series):
+        self.Series[series.Name] = series
+
+
+class _DateRule:
+    def __init__(self, name, symbol=None):
+        self.Name = name
+        self.Symbol = symbol
+
+
+class _TimeRule:
+    def __init__(self, name, hour=None, minute=0):
+        self.Name = name
+        self.Hour = hour
+        self.Minute = minute
+
+
+class _DateRules:
+    def EveryDay(self, symbol=None):
+        return _DateRule("EveryDay", symbol)
+
+
+class _TimeRules:
+    def At(self, hour, minute=0, second=0):
+        return _TimeRule(f"At {hour:02d}:{minute:02d}", hour, minute)
+
+
+class ScheduledEvent:
+    def __init__(self, date_rule, time_rule, callback):
+        self.DateRule = date_rule
+        self.TimeRule = time_rule
+        self.Callback = callback
+
+
+class _ScheduleManager:
+    def __init__(self):
+        self.Events = []
+
+    def On(self, date_rule, time_rule, callback):
+        event = ScheduledEvent(date_rule, time_rule, callback)
+        self.Events.append(event)
+        return event
+
+
+class FuncRiskFreeRateInterestRateModel:
+    def __init__(self, func):
+        self.func = func
+
+    def GetInterestRate(self, time):
+        return self.func(time)
+
+
+class _Event:
+    """A C# event as seen from Python: handlers are added with += and all called in order."""
+
+    def __init__(self):
+        self.handlers = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def __call__(self, *args):
+        for handler in self.handlers:
+            handler(*args)
+
+
+class TradeBarConsolidator:
+    """
+    Daily consolidation of intraday TradeBars: a bar spanning the session is emitted through
+    DataConsolidated with the bar that ends at the 16:00 close (or, for an early close, with the
+    first bar of the next day). Only Resolution.Daily periods are supported.
+    """
+
+    def __init__(self, period):
+        if period != Resolution.Daily:
+            raise NotImplementedError("The stand-in only consolidates into daily bars")
+        self.Period = period
+        self.Consolidated = None
+        self.DataConsolidated = _Event()
+        self.working = None
+
+    def Update(self, bar):
+        working = self.working
+        if working is not None and bar.Time.date() != working.Time.date():
+            self._Emit()
+            working = None
+        if working is None:
+            self.working = TradeBar(bar.Time, bar.Symbol, bar.Open, bar.High, bar.Low, bar.Close, bar.Volume, bar.EndTime - bar.Time)
+        else:
+            working.High = max(working.High, bar.High)
+            working.Low = min(working.Low, bar.Low)
+            working.Close = bar.Close
+            working.Volume += bar.Volume
+            working.EndTime = bar.EndTime
+        if bar.EndTime.time() >= _SESSION_CLOSE:
+            self._Emit()
+
+    def _Emit(self):
+        self.Consolidated, self.working = self.working, None
+        self.DataConsolidated(self.Consolidated)
+
+
+class _History:
+    """
+    algorithm.History[TradeBar](symbols, start, end, resolution) over the bars the engine loaded:
+    a list of TradeBars per day for a list of symbols, or a list of TradeBar for one symbol, with
+    each bar's EndTime in (start, end] as in LEAN.
+    """
+
+    def __init__(self):
+        self.bars = {}  # Dictionary[Symbol, List[TradeBar]] - every bar the engine can serve, ascending
+
+    def Load(self, bars):
+        self.bars = bars
+
+    def __getitem__(self, data_type):
+        return self
+
+    def __call__(self, symbols, start, end, resolution=None):
+        if isinstance(symbols, Symbol):
+            return [bar for bar in self.bars.get(symbols, ()) if start < bar.EndTime <= end]
+        by_time = {}
+        for symbol in symbols:
+            for bar in self.bars.get(symbol, ()):
+                if start < bar.EndTime <= end:
+                    by_time.setdefault(bar.EndTime, TradeBars())[symbol] = bar
+        return [by_time[time] for time in sorted(by_time)]
+
+
+class QCAlgorithm:
+    """
+    The QCAlgorithm surface the strategy touches. Stand-in state lives in plain attributes, and a
+    few assertion helpers used by the strategy's Test_* methods are provided since LEAN has none.
+    """
+
+    def __init__(self):
+        self.Securities = SecurityManager()
+        self.Portfolio = SecurityPortfolioManager(self.Securities)
+        self.ObjectStore = ObjectStore()
+        self.Transactions = _TransactionManager()
+        self.Schedule = _ScheduleManager()
+        self.DateRules = _DateRules()
+        self.TimeRules = _TimeRules()
+        self.History = _History()
+        self.Time = datetime(1998, 1, 1)
+        self.StartDate = datetime(1998, 1, 1)
+        self.EndDate = datetime.now()
+        self.LiveMode = False
+        self.IsWarmingUp = False
+        self.WarmUpPeriod = None
+        self.Benchmark = None
+        self.RiskFreeInterestRateModel = None
+        self.Charts = {}
+        self.RuntimeStatistics = {}
+        self.Parameters = {}
+        self.Indicators = {}     # Dictionary[Symbol, List] - Indicators updated with each symbol's bars
+        self.Consolidators = {}  # Dictionary[Symbol, List[TradeBarConsolidator]] - Updated with each symbol's bars, before its indicators
+        self.Orders = []         # List[OrderTicket] - Every order placed, in order
+        self.Logs = []           # List[str] - Log messages, when LogEnabled
+        self.LogEnabled = True
+        self.Quitting = False    # bool - Set by Quit; the backtest loop stops before the next day
+
+    # Setup
+    def SetStartDate(self, year, month=None, day=None):
+        self.StartDate = year if isinstance(year, datetime) else datetime(year, month, day)
+        self.Time = self.StartDate
+
+    def SetEndDate(self, year, month=None, day=None):
+        self.EndDate = year if isinstance(year, datetime) else datetime(year, month, day)
+
+    def SetCash(self, cash):
+        self.Portfolio.Cash = float(cash)
+        self.Portfolio.ResetTotalPortfolioValue()
+
+    def SetWarmUp(self, period, resolution=None):
+        self.WarmUpPeriod = period
+
+    def SetBenchmark(self, benchmark):
+        self.Benchmark = benchmark
+
+    def SetRiskFreeInterestRateModel(self, model):
+        self.RiskFreeInterestRateModel = model
+
+    def SetParameters(self, parameters):
+        self.Parameters = dict(parameters)
+
+    def GetParameter(self, name, default_value=None):
+        return self.Parameters.get(name, default_value)
+
+    def AddEquity(self, ticker, resolution=Resolution.Minute):
+        symbol = Symbol(ticker)
+        if symbol not in self.Securities:
+            self.Securities[symbol] = Security(symbol, resolution)
+            self.Indicators[symbol] = []
+        return self.Securities[symbol]
+
+    # Indicators
+    def _Register(self, symbol, indicator):
+        self.Indicators.setdefault(symbol, []).append(indicator)
+        return indicator
+
+    def DCH(self, symbol, period, resolution=None):
+        return self._Register(symbol, DonchianChannel(period))
+
+    def ATR(self, symbol, period, moving_average_type=MovingAverageType.Simple, resolution=None):
+        return self._Register(symbol, AverageTrueRange(period, moving_average_type))
+
+    def Consolidate(self, symbol, period, handler):
+        consolidator = TradeBarConsolidator(period)
+        consolidator.DataConsolidated += handler
+        self.Consolidators.setdefault(symbol, []).append(consolidator)
+        return consolidator
+
+    # Orders
+    def MarketOrder(self, symbol, quantity, asynchronous=False, tag=""):
+        price = self.Securities[symbol].Price
+        ticket = OrderTicket(len(self.Orders) + 1, symbol, quantity, self.Time, OrderStatus.Filled, price)
+        self.Orders.append(ticket)
+        self.Portfolio.ApplyFill(symbol, quantity, price)
+        on_order_event = getattr(self, "OnOrderEvent", None)
+        if on_order_event is not None:
+            on_order_event(OrderEvent(ticket.OrderId, symbol, self.Time, OrderStatus.Filled, price, quantity))
+        return ticket
+
+    def Liquidate(self, symbol=None, tag=""):
+        symbols = [symbol] if symbol is not None else list(self.Securities.keys())
+        tickets = []
+        for target in symbols:
+            quantity = self.Portfolio[target].Quantity
+            if quantity != 0:
+                tickets.append(self.MarketOrder(target, -quantity, tag=tag))
+        return tickets
+
+    def Quit(self, message=""):
+        if message:
+            self.Log(message)
+        self.Quitting = True
+
+    # Charts and statistics
+    def AddChart(self, chart):
+        self.Charts[chart.Name] = chart
+
+    def Plot(self, chart, series, value):
+        target = self.Charts.setdefault(chart, Chart(chart))
+        if series not in target.Series:
+            target.AddSeries(Series(series))
+        target.Series[series].AddPoint(self.Time, value)
+
+    def SetRuntimeStatistic(self, name, value):
+        self.RuntimeStatistics[name] = str(value)
+
+    # Logging
+    def Log(self, message):
+        if self.LogEnabled:
+            self.Logs.append(f"{self.Time} {message}")
+
+    Debug = Log
+    Error = Log
+
+    # Assertion helpers for Test_* methods
+    def AssertEqual(self, actual, expected, message=""):
+        if actual != expected:
+            raise AssertionError(f"{message}: expected {expected!r}, got {actual!r}")
+
+    def AssertTrue(self, condition, message=""):
+        if not condition:
+            raise AssertionError(message)
+
+    def AssertGreater(self, actual, threshold, message=""):
+        if not actual > threshold:
+            raise AssertionError(f"{message}: expected more than {threshold!r}, got {actual!r}")
@@ -0,0 +1,56 @@
+"""
+Daily bar sources for the stand-in: seeded random walks and LEAN's daily zip format.
+"""
+from datetime import date, timedelta
+import csv
+import io
+import random
+import zipfile
+
+
+def RandomWalkBars(tickers, start, days, seed=7, drift=0.0005, volatility=0.02):
+    """
+    Seeded random-walk daily bars on weekdays.
+
+    Args:
+        tickers (list[str]): Tickers to generate
+        start (date): First calendar day
+        days (int): Number of calendar days to cover
+        seed (int): Random seed; the same seed always produces the same bars
+
+    Returns:
+        dict: ticker -> list of (date, open, high, low, close, volume) tuples
+    """
+    rng = random.Random(seed)
+    history = {ticker: [] for ticker in tickers}
+    prices = {ticker: 50 + rng.random() * 100 for ticker in tickers}
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        for ticker in tickers:
+            open_price = prices[ticker]
+            close = max(1.0, open_price * (1 + rng.gauss(drift, volatility)))
+            # About a third of bars close at their extreme, as real daily bars often do
+            high = max(open_price, close) * (1 + max(0.0, rng.uniform(-0.005, 0.01)))
+            low = min(open_price, close) * (1 - max(0.0, rng.uniform(-0.005, 0.01)))
+            history[ticker].append((day, open_price, high, low, close, 1000000))
+            prices[ticker] = close
+    return history
+
+
+def ReadLeanDailyZip(path):
+    """
+    Read a LEAN daily equity zip ("yyyyMMdd HH:mm,open,high,low,close,volume" in deci-cents).
+
+    Returns:
+        list: (date, open, high, low, close, volume) tuples
+    """
+    bars = []
+    with zipfile.ZipFile(path) as archive:
+        with archive.open(archive.namelist()[0]) as handle:
+            for row in csv.reader(io.TextIOWrapper(handle)):
+                day = date(int(row[0][:4]), int(row[0][4:6]), int(row[0][6:8]))
+                open_price, high, low, close = (float(value) / 10000 for value in row[1:5])
+                bars.append((day, open_price, high, low, close, float(row[5])))
+    return bars
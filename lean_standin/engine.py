@@ -0,0 +1,225 @@
+"""
+Drives a stand-in algorithm: pushes slices through securities, consolidators, indicators and OnData
+the way LEAN's algorithm manager does for daily bars, and for minute bars synthesized from them.
+
+    from lean_standin.data import RandomWalkBars
+    from lean_standin.engine import Backtest
+
+    result = Backtest(TurtleTradingStrategy, RandomWalkBars(["AAPL"], date(2009, 11, 1), 5000))
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from time import perf_counter
+
+from lean_standin.algorithm_imports import Resolution, Slice, Symbol, TradeBar, TradeBars
+
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+MARKET_SESSION = timedelta(hours=6, minutes=30)  # Daily bars span the regular session, ending at the close
+SESSION_MINUTES = 390
+ONE_MINUTE = timedelta(minutes=1)
+ONE_DAY = timedelta(days=1)
+EMPTY_BARS = TradeBars()
+
+
+def PushSlice(algorithm, slice):
+    """
+    Advance the algorithm clock to the slice, update prices, consolidators and registered indicators,
+    then call OnData.
+
+    Args:
+        algorithm: A QCAlgorithm built on the stand-in
+        slice: The Slice to deliver
+    """
+    algorithm.Time = slice.Time
+    algorithm.Portfolio.ResetTotalPortfolioValue()
+    for symbol, bar in slice.Bars.items():
+        security = algorithm.Securities.get(symbol)
+        if security is None:
+            continue
+        security.SetMarketPrice(bar)
+        for consolidator in algorithm.Consolidators.get(symbol, ()):
+            consolidator.Update(bar)
+        for indicator in algorithm.Indicators.get(symbol, ()):
+            indicator.Update(bar)
+    algorithm.OnData(slice)
+
+
+class BacktestResult:
+    """What a stand-in backtest produced: the algorithm itself plus the daily equity curve and timings."""
+
+    def __init__(self, algorithm, equity, trading_days, calendar_days, elapsed):
+        self.Algorithm = algorithm
+        self.Equity = equity                # List[(date, float)] - TotalPortfolioValue after each trading day
+        self.TradingDays = trading_days     # int - Days with data delivered to OnData, warm-up included
+        self.CalendarDays = calendar_days   # int - Days simulated, warm-up included
+        self.Elapsed = elapsed              # float - Wall seconds from Initialize to OnEndOfAlgorithm
+
+    @property
+    def Orders(self):
+        return self.Algorithm.Orders
+
+    @property
+    def Logs(self):
+        return self.Algorithm.Logs
+
+    @property
+    def DaysPerSecond(self):
+        return self.CalendarDays / self.Elapsed if self.Elapsed > 0 else float("inf")
+
+
+def MinuteBars(bar):
+    """
+    Synthesize the regular session's minute bars from a daily bar: a straight-line path from the open
+    to the low, the high and the close on an up day (the high before the low on a down day), so the
+    minutes consolidate back into exactly the daily bar.
+
+    Args:
+        bar: A daily TradeBar spanning MARKET_SESSION
+
+    Returns:
+        list: SESSION_MINUTES TradeBars, one per minute
+    """
+    first, second = (bar.Low, bar.High) if bar.Close >= bar.Open else (bar.High, bar.Low)
+    knots = [(0, bar.Open), (SESSION_MINUTES // 3, first), (2 * SESSION_MINUTES // 3, second), (SESSION_MINUTES, bar.Close)]
+    path = []
+    for (start, start_price), (end, end_price) in zip(knots, knots[1:]):
+        path.extend(start_price + (end_price - start_price) * (minute - start) / (end - start) for minute in range(start, end))
+    path.append(bar.Close)
+
+    volume = bar.Volume / SESSION_MINUTES
+    return [TradeBar(bar.Time + minute * ONE_MINUTE, bar.Symbol, path[minute], max(path[minute], path[minute + 1]),
+                     min(path[minute], path[minute + 1]), path[minute + 1], volume, ONE_MINUTE)
+            for minute in range(SESSION_MINUTES)]
+
+
+def _FireEvent(algorithm, event, day, traded_symbols):
+    rule = event.DateRule
+    if rule.Symbol is not None and rule.Symbol not in traded_symbols:
+        return  # DateRules.EveryDay(symbol) only fires on that symbol's trading days
+    algorithm.Time = datetime.combine(day, time(event.TimeRule.Hour, event.TimeRule.Minute))
+    event.Callback()
+
+
+def _FireEvents(algorithm, events, day, traded_symbols):
+    for event in events:
+        _FireEvent(algorithm, event, day, traded_symbols)
+
+
+def _PushSession(algorithm, day, bars, minute_symbols, events):
+    """
+    Deliver a day as minute slices for the minute-resolution symbols, firing each event due at or
+    before the close just before the first slice at or after its time. Daily-resolution symbols'
+    bars arrive with the closing minute.
+    """
+    minutes = {symbol: MinuteBars(bar) for symbol, bar in bars.items() if symbol in minute_symbols}
+    daily = TradeBars((symbol, bar) for symbol, bar in bars.items() if symbol not in minute_symbols)
+    pending = iter(events)
+    event = next(pending, None)
+    end = datetime.combine(day, MARKET_OPEN)
+    for minute in range(SESSION_MINUTES):
+        end += ONE_MINUTE
+        while event is not None and time(event.TimeRule.Hour, event.TimeRule.Minute) <= end.time():
+            _FireEvent(algorithm, event, day, bars)
+            event = next(pending, None)
+        slice_bars = TradeBars((symbol, series[minute]) for symbol, series in minutes.items())
+        if minute == SESSION_MINUTES - 1:
+            slice_bars.update(daily)
+        PushSlice(algorithm, Slice(end, slice_bars))
+
+
+def Backtest(algorithm, history, start=None, end=None, parameters=None, log=True, object_store=None):
+    """
+    Run an algorithm over daily bars the way LEAN's backtest loop does for daily resolution.
+
+    Each calendar day from the warm-up start to the end date fires the scheduled events due at or
+    before the 16:00 close, delivers that day's bars (if any) through PushSlice, then fires the
+    events due after the close. Securities added at Resolution.Minute instead get the day as 390
+    minute bars synthesized from the daily bar (MinuteBars), with the events due at or before the
+    close interleaved by time. DateRules.EveryDay() fires on every calendar day, as LEAN does;
+    DateRules.EveryDay(symbol) only on days the symbol has a bar. IsWarmingUp is set for days
+    before the start date when SetWarmUp was called with a timedelta.
+
+    Args:
+        algorithm: A QCAlgorithm subclass or an instance of one, not yet initialized
+        history (dict): ticker -> list of (date, open, high, low, close, volume), ascending by date
+        start (date): Overrides the start date set in Initialize
+        end (date): Overrides the end date set in Initialize; the run also stops after the last bar
+        parameters (dict): Values served by GetParameter
+        log (bool): Whether Log calls are kept in algorithm.Logs
+        object_store: ObjectStore to share between runs, e.g. to test a restart
+
+    Returns:
+        BacktestResult: The finished run
+    """
+    if isinstance(algorithm, type):
+        algorithm = algorithm()
+    algorithm.LogEnabled = log
+    if parameters:
+        algorithm.SetParameters(parameters)
+    if object_store is not None:
+        algorithm.ObjectStore = object_store
+
+    # Build each TradeBar once up front; History serves them to Initialize (e.g. to restore indicators)
+    all_bars = {}
+    for ticker, bars in history.items():
+        symbol = Symbol(ticker)
+        all_bars[symbol] = [TradeBar(datetime.combine(day, MARKET_OPEN), symbol, open_price, high, low, close, volume,
+                                     MARKET_SESSION) for day, open_price, high, low, close, volume in bars]
+    algorithm.History.Load(all_bars)
+
+    started = perf_counter()
+    algorithm.Initialize()
+    if start is not None:
+        algorithm.SetStartDate(datetime.combine(start, time()))
+    if end is not None:
+        algorithm.SetEndDate(datetime.combine(end, time()))
+
+    # Bucket the bars by day for the subscribed symbols only
+    bars_by_day = defaultdict(TradeBars)
+    for symbol, bars in all_bars.items():
+        if symbol not in algorithm.Securities:
+            continue
+        for bar in bars:
+            bars_by_day[bar.Time.date()][symbol] = bar
+
+    start_day = algorithm.StartDate.date()
+    first_day = start_day
+    if isinstance(algorithm.WarmUpPeriod, timedelta):
+        first_day = start_day - algorithm.WarmUpPeriod
+    last_day = min(algorithm.EndDate.date(), max(bars_by_day, default=start_day))
+
+    minute_symbols = {symbol for symbol, security in algorithm.Securities.items() if security.Resolution == Resolution.Minute}
+    events = sorted(algorithm.Schedule.Events, key=lambda event: (event.TimeRule.Hour, event.TimeRule.Minute))
+    before_close = [event for event in events if (event.TimeRule.Hour, event.TimeRule.Minute) <= (16, 0)]
+    after_close = [event for event in events if (event.TimeRule.Hour, event.TimeRule.Minute) > (16, 0)]
+
+    on_warm_up_finished = getattr(algorithm, "OnWarmupFinished", None)
+    equity = []
+    trading_days = calendar_days = 0
+    day = first_day
+    algorithm.IsWarmingUp = True  # Until the start date; OnWarmupFinished fires then even without a warm-up
+    while day <= last_day and not algorithm.Quitting:
+        if algorithm.IsWarmingUp and day >= start_day:
+            algorithm.IsWarmingUp = False
+            if on_warm_up_finished is not None:
+                on_warm_up_finished()
+        bars = bars_by_day.get(day, EMPTY_BARS)
+        if bars and minute_symbols:
+            _PushSession(algorithm, day, bars, minute_symbols, before_close)
+        else:
+            _FireEvents(algorithm, before_close, day, bars)
+            if bars:
+                PushSlice(algorithm, Slice(datetime.combine(day, MARKET_CLOSE), bars))
+        if bars:
+            equity.append((day, algorithm.Portfolio.TotalPortfolioValue))
+            trading_days += 1
+        _FireEvents(algorithm, after_close, day, bars)
+        calendar_days += 1
+        day += ONE_DAY
+
+    algorithm.IsWarmingUp = False
+    on_end = getattr(algorithm, "OnEndOfAlgorithm", None)
+    if on_end is not None:
+        on_end()
+    return BacktestResult(algorithm, equity, trading_days, calendar_days, perf_counter() - started)
@@ -2,11 +2,38 @@
 from AlgorithmImports import *
 from datetime import datetime, timedelta
 import math
+from time import perf_counter_ns
+from market_series import MarketSeriesCache
+from charting import TurtleCharts
+from instrumentation import HotPathTimer, ThroughputStatistics
+from memory_accounting import MemoryAccountant
+from sampling_profiler import SamplingProfiler
+from state_store import RunKey, StateStore, STATE_DELTA_KEY, STATE_KEY
+from indicator_checkpoint import INDICATOR_KEY, IndicatorCheckpoint
+from intent_journal import JOURNAL_KEY, IntentJournal
+from reconciliation import Reconciler
+from intraday import IntradayMonitor
+from reporting import DailyReport, FileSink, LogSink, ReportPipeline, WebhookSink
+from end_of_day import EndOfDayPipeline
+from trading_systems import SYSTEM_CHANNELS, ActiveSystemAttribute, ChannelStore, SystemPosition, TradingSystem
+from risk_limits import UNIT_LIMITS, ParseGroups, UnitLimits
+from correlation import CorrelationEngine
 # endregion
 
 class TurtleTradingStrategy(QCAlgorithm):
 
-    # TODO: NEED TO SAVE TO STATE 
+    # Channels, position book, drawdown throttle and trades of the trading system being evaluated (self.system)
+    entry_channels = ActiveSystemAttribute("entry_channels")
+    exit_channels = ActiveSystemAttribute("exit_channels")
+    stop_losses = ActiveSystemAttribute("stop_losses")
+    entry_prices = ActiveSystemAttribute("entry_prices")
+    pyramid_level = ActiveSystemAttribute("pyramid_level")
+    last_add_price = ActiveSystemAttribute("last_add_price")
+    position_quantity = ActiveSystemAttribute("position_quantity")
+    daily_trades = ActiveSystemAttribute("daily_trades")
+    peak_portfolio_value = ActiveSystemAttribute("peak_portfolio_value")
+    drawdown_map = ActiveSystemAttribute("drawdown_map")
+
     # TODO: NEED TO CONSIDER TESTING
 
     def Initialize(self):
@@ -14,71 +41,251 @@ class TurtleTradingStrategy(QCAlgorithm):
         Initialize the algorithm with start and end dates, initial cash, and strategy parameters.
         Set up the equities to trade and initialize indicators and stop losses.
         """
-        # Run tests first
-        self.Test_CreateDrawdownMap()
-        self.Test_GetAvailablePortfolioValue()
-        
-        # Continue with normal initialization
         self.SetStartDate(2010, 1, 1)    # TODO: Production version won't need this
         self.SetEndDate(datetime.now())  # TODO: Production version won't need this
         self.SetCash(1000000)            # TODO: Change this to read directly from the account
 
-        # Define constants 
-        self.ENTRY_CHANNEL = 55      # Per Turtle Trading Strategy System 2 
-        self.EXIT_CHANNEL = 20       # Per Turtle Trading Strategy System 2 
+        # Benchmark and risk-free rate - served from the pre-resampled daily cache in the ObjectStore
+        # (see market_series.py) so backtests skip parsing the SPY hourly zip and the interest-rate CSV
+        self.market_series = None if self.LiveMode else MarketSeriesCache.FromObjectStore(self.ObjectStore)
+        if self.market_series is not None:
+            self.SetBenchmark(self.market_series.BenchmarkValue)
+            self.SetRiskFreeInterestRateModel(FuncRiskFreeRateInterestRateModel(self.market_series.RiskFreeRate))
+            if self.market_series.LastDate() < self.EndDate.date():
+                self.Log(f"WARNING: Market series cache ends {self.market_series.LastDate()}, before the end date; rebuild it with market_series.py")
+
+        # Define constants (the entry and exit channel lengths are each trading system's, see SYSTEM_CHANNELS)
         self.RISK_PER_TRADE = 0.02   # Per Turtle Trading Strategy default of risking 2% of account equity per trade
         self.ATR_PERIOD = 20         # Per Turtle Trading Strategy default of 20 days
         self.ATR_MULTIPLIER = 2      # Per Turtle Trading Strategy default of 2 ATRs (i.e. 2N) 
 
+        # Trading systems - "trading-systems" picks the Turtle rule sets to run (SYSTEM_CHANNELS), System 2 by default.
+        # Each system keeps its own channels, position book (stop_losses, entry_prices, pyramid_level, last_add_price,
+        # position_quantity), drawdown-map throttle and trades, read through the attributes of the same names while
+        # it is evaluated (self.system). Several systems ("1,2", backtests only) share each symbol's subscription,
+        # ATR and one rolling high/low store for every channel length, and each sizes on the combined equity scaled
+        # by its own throttle. The store is None with a single system, which uses QuantConnect's DCH indicators
+        self.systems = [TradingSystem(name, *SYSTEM_CHANNELS[name])
+                        for name in (self.GetParameter("trading-systems") or "2").replace(" ", "").split(",")]
+        self.system = self.systems[0]  # TradingSystem - the system being evaluated
+        self.channel_store = None
+        if len(self.systems) > 1:
+            self.channel_store = ChannelStore([length for system in self.systems for length in (system.entry_length, system.exit_length)])
+
         # Technical Indicators - Used for generating trading signals and calculating volatility
-        self.entry_channels = {}  # Dictionary[Symbol, DonchianChannel] - Tracks entry channel indicators using QuantConnect's built-in DCH indicator
-        self.exit_channels = {}   # Dictionary[Symbol, DonchianChannel] - Tracks exit channel indicators using QuantConnect's built-in DCH indicator
         self.atrs = {}            # Dictionary[Symbol, ATR] - Tracks Average True Range indicators using QuantConnect's built-in ATR indicator
 
-        # Position Management - Track active positions and their characteristics
-        self.stop_losses = {}     # Dictionary[Symbol, float] - Tracks stop loss prices for each position
-        self.entry_prices = {}    # Dictionary[Symbol, List[float]] - Tracks entry prices for each unit of a position
-        self.pyramid_level = {}   # Dictionary[Symbol, int] - Tracks pyramid level for each position (1-4 levels)
-
         # Trade Management - Track trading activity and enforce trading rules
-        self.last_add_price = {}  # Dictionary[Symbol, float] - Tracks the price at which we last added a unit to a position
         self.MAX_PYRAMID_LEVELS = 4  # int - Maximum number of times we can pyramid (add to) a position per Turtle Trading rules
-        self.daily_trades = []    # List[str] - Tracks trades made during the current day for daily reporting
+
+        # Unit limits - Units on in one direction capped per market, closely and loosely correlated group and across
+        # the portfolio ("unit-limits", 4,6,10,12 by default) before each entry and add, every system's units counted.
+        # Groups come from "close-groups" and "loose-groups" ("AAPL,MSFT;XOM,CVX"). None when "unit-limits" is "off"
+        self.risk_limits = None
+        unit_limits = self.GetParameter("unit-limits") or ",".join(str(limit) for limit in UNIT_LIMITS)
+        if unit_limits != "off":
+            self.risk_limits = UnitLimits([int(limit) for limit in unit_limits.split(",")],
+                                          ParseGroups(self.GetParameter("close-groups")), ParseGroups(self.GetParameter("loose-groups")))
+
+        # Correlation groups - Opt-in ("correlation-groups" parameter) rolling correlation of daily returns over
+        # "correlation-window" bars, clustered each day at the "correlation-thresholds" (close, loose) into the unit
+        # limits' groups, in place of the configured ones, and listed in the daily report. None when disabled
+        self.correlation = None
+        if self.GetParameter("correlation-groups") == "true":
+            close_threshold, loose_threshold = (float(threshold) for threshold in (self.GetParameter("correlation-thresholds") or "0.7,0.4").split(","))
+            self.correlation = CorrelationEngine(int(self.GetParameter("correlation-window") or 60), close_threshold, loose_threshold)
 
         # Symbol Management - Track which symbols we're trading
         self.symbols = []         # List[Symbol] - Collection of trading symbols (e.g., equities) being traded by the algorithm
 
+        # Intraday monitoring - Opt-in minute subscriptions ("intraday-monitoring" parameter) with the indicators
+        # and the full evaluation on daily consolidated bars, and a per-minute check of precomputed stop,
+        # exit, breakout and add levels for symbols within "intraday-arm-n" N of one. None when disabled
+        self.intraday = None
+        if self.GetParameter("intraday-monitoring") == "true":
+            self.intraday = IntradayMonitor(self, float(self.GetParameter("intraday-arm-n") or 1),
+                                            int(self.GetParameter("intraday-rearm-minutes") or 30))
+
         # Initialize trading symbols and their technical indicators
         for symbol_str in ["AAPL"]: # TODO: Make this dynamic - Choose diversified set of symbols that meet breakout criteria (ie. Sublime Trading Criteria)
-            # Add the equity to our universe with daily resolution data
-            equity = self.AddEquity(symbol_str, Resolution.Daily)
-            
-            # Store the Symbol object for future reference
-            self.symbols.append(equity.Symbol)
-            
-            # Create and store technical indicators for this symbol using QuantConnect's built-in indicators:
-            # 1. Entry channel (55-day Donchian) for generating entry signals using QuantConnect's DCH indicator
-            self.entry_channels[equity.Symbol] = self.DCH(equity.Symbol, self.ENTRY_CHANNEL)
-            
-            # 2. Exit channel (20-day Donchian) for generating exit signals using QuantConnect's DCH indicator
-            self.exit_channels[equity.Symbol] = self.DCH(equity.Symbol, self.EXIT_CHANNEL)
-            
-            # 3. Average True Range (ATR) for volatility measurement and position sizing
-            self.atrs[equity.Symbol] = self.ATR(equity.Symbol, self.ATR_PERIOD, MovingAverageType.Simple)
-            
-            # Log the addition of this symbol to our universe
-            self.Log(f"Added equity: {equity.Symbol}")
-
-        # Increase warm-up period to account for longer entry channel
-        self.SetWarmUp(timedelta(days=self.ENTRY_CHANNEL))
+            self.AddTradingSymbol(symbol_str)
 
+        # End of day - One scheduled event on trading days only (the first symbol's exchange calendar) runs the
+        # end-of-day stages added at the end of Initialize, in order, timed against their budgets and kept within
+        # LEAN's scheduled-event leaky bucket
         # TODO: Too much logging - need to reduce this; change logging per the table shown in the Notion documentation
-        self.Schedule.On(self.DateRules.EveryDay(), self.TimeRules.At(16, 0), self.LogPortfolioState) 
+        self.end_of_day = EndOfDayPipeline(self)
+        self.Schedule.On(self.DateRules.EveryDay(self.symbols[0]), self.TimeRules.At(16, 0), self.OnEndOfDay)
         
-        # Portfolio Management - Track peak value and drawdown state
-        self.peak_portfolio_value = self.Portfolio.TotalPortfolioValue
+        # Portfolio Management - Track peak value and drawdown state, per system
         self.original_portfolio_value = self.Portfolio.TotalPortfolioValue
-        self.drawdown_map = self.CreateDrawdownMap(self.original_portfolio_value)
+        for system in self.systems:
+            system.peak_portfolio_value = self.original_portfolio_value
+            system.drawdown_map = self.CreateDrawdownMap(self.original_portfolio_value)
+
+        # State persistence - Position book and peak saved to the ObjectStore at the end of each day, with
+        # deltas as positions change ("persist-state" parameter), and restored on start ("restore-state");
+        # both always on live. Restoring alone is read-only: only "persist-state" writes anything. Runs that
+        # are not live keep their state under turtle/backtest/ (RunKey), apart from the live deployment's.
+        # None when disabled, so the order methods skip marking symbols
+        persist_state = self.LiveMode or self.GetParameter("persist-state") == "true"
+        restore_state = self.LiveMode or self.GetParameter("restore-state") == "true"
+        if self.channel_store and (persist_state or restore_state or self.intraday):
+            raise ValueError("Several trading systems need daily data and no state persistence (backtests)")
+        self.state_store = None
+        if persist_state or restore_state:
+            self.state_store = StateStore(self, RunKey(STATE_KEY, self.LiveMode), RunKey(STATE_DELTA_KEY, self.LiveMode), persist=persist_state)
+        if restore_state:
+            self.state_store.Restore()
+
+        # Intent journal - Each order's intended book is journaled before the order and confirmed after it,
+        # so a restart replays an order whose book update was lost instead of liquidating it (OnWarmupFinished)
+        self.intent_journal = None
+        if self.state_store:
+            self.intent_journal = IntentJournal(self, replay=restore_state, key=RunKey(JOURNAL_KEY, self.LiveMode), persist=persist_state)
+
+        # Reconciliation - Brokerage holdings checked against the book at startup (OnWarmupFinished) and in
+        # each daily report: orphans, stale entries, missing stops and quantity mismatches are repaired.
+        # None with several systems, whose books only change through their own orders
+        self.reconciler = None if self.channel_store else Reconciler(self)
+
+        # Indicator checkpoint - The last bars of each symbol saved with the strategy state; restoring them
+        # (plus the bars missed since) rebuilds the channels and ATRs so a restart skips the warm-up
+        self.indicator_checkpoint = None
+        if self.state_store:
+            self.indicator_checkpoint = IndicatorCheckpoint(self, max(self.system.entry_length, self.system.exit_length, self.ATR_PERIOD + 1),
+                                                            RunKey(INDICATOR_KEY, self.LiveMode))
+        if not (restore_state and self.indicator_checkpoint.Restore()):
+            # Increase warm-up period to account for longer entry channel
+            self.SetWarmUp(timedelta(days=max(system.entry_length for system in self.systems)))
+
+        # Daily report - Captured at 16:00 and, live, handed to a background worker that renders and delivers it
+        # to the log, and to report-YYYY-MM-DD.html files in "report-directory" and a "report-webhook" URL when
+        # set; the queue holds "report-queue-size" reports and drops the oldest rather than block. Backtests
+        # log each report as it is captured and queue every one for the file and webhook, never waiting on them
+        sinks = [LogSink(self)]
+        if self.GetParameter("report-directory"):
+            sinks.append(FileSink(self.GetParameter("report-directory")))
+        if self.GetParameter("report-webhook"):
+            sinks.append(WebhookSink(self.GetParameter("report-webhook")))
+        self.reporting = ReportPipeline(self, sinks, int(self.GetParameter("report-queue-size") or 8),
+                                        int(self.GetParameter("report-attempts") or 3), inline=not self.LiveMode)
+
+        # Charting - Turtle-specific series, buffered and downsampled before being sent to LEAN; flushed with
+        # each daily report live, where the run has no end, and once from OnEndOfAlgorithm in backtests
+        self.charts = TurtleCharts(self)
+
+        # Throughput - Slices/sec, symbols per slice, orders per day, OnData vs daily report time and warm-up
+        # duration, published as runtime statistics with each daily report live and at the end of a backtest
+        self.throughput = ThroughputStatistics(self)
+
+        # Instrumentation - Opt-in per-section OnData and order-path timings ("instrument-hot-path" parameter)
+        # None when disabled, so OnData's section checks and the order-path methods cost nothing extra
+        self.hot_path_timer = HotPathTimer(self) if self.GetParameter("instrument-hot-path") == "true" else None
+
+        # Memory accounting - Sizes each component of strategy state for the daily report, every
+        # "memory-sample-days" reports, warning above "memory-warning-mb"; always on live, opt-in in
+        # backtests ("memory-accounting" parameter), where walking the state is most of the end-of-day cost
+        self.memory = None
+        if self.LiveMode or self.GetParameter("memory-accounting") == "true":
+            self.memory = MemoryAccountant(self, int(self.GetParameter("memory-sample-days") or 30),
+                                           int(self.GetParameter("memory-warning-mb") or 1024) * 1024 ** 2)
+            self.memory.AddComponent("indicators", lambda symbol: (self.atrs[symbol], [(system.entry_channels[symbol], system.exit_channels[symbol]) for system in self.systems]), per_symbol=True)
+            self.memory.AddComponent("positions", lambda: [(system.stop_losses, system.entry_prices, system.pyramid_level, system.last_add_price,
+                                                            system.position_quantity, system.cost_basis) for system in self.systems])
+            self.memory.AddComponent("drawdown_map", lambda: [system.drawdown_map for system in self.systems])
+            self.memory.AddComponent("daily_trades", lambda: [system.daily_trades for system in self.systems])
+            self.memory.AddComponent("charts", lambda: self.charts)
+            if self.risk_limits:
+                self.memory.AddComponent("unit_limits", lambda: self.risk_limits)
+            if self.correlation:
+                self.memory.AddComponent("correlation", lambda: self.correlation)
+            if self.indicator_checkpoint:
+                self.memory.AddComponent("indicator_checkpoint", lambda: self.indicator_checkpoint.windows)
+
+        # Sampling profiler - Opt-in folded stacks of OnData and scheduled events ("profile-sampling"
+        # parameter), saved to the ObjectStore (and "profile-output", if set) at the end of the run. The sampler
+        # starts here, on LEAN's setup thread, and samples the algorithm thread once OnData binds it
+        self.sampling_profiler = None
+        if self.GetParameter("profile-sampling") == "true":
+            self.sampling_profiler = SamplingProfiler(self, float(self.GetParameter("profile-interval-ms") or 5) / 1000,
+                                                      path=self.GetParameter("profile-output") or None)
+            self.sampling_profiler.Start()
+
+        # End-of-day stages (budgets in ms): repair the book, regroup by correlation, report on it, then persist
+        # it; memory sampling is the one stage that can wait for a later day
+        if self.reconciler:
+            self.end_of_day.AddStage("reconcile", self.reconciler.Run, 50)
+        if self.correlation:
+            self.end_of_day.AddStage("correlation", self.UpdateCorrelationGroups, 100)
+        self.end_of_day.AddStage("report", self.LogPortfolioState, 50)
+        if self.LiveMode:
+            self.end_of_day.AddStage("charts", self.charts.Flush, 20)
+        if self.hot_path_timer:
+            self.end_of_day.AddStage("hot_path", self.hot_path_timer.LogDaily, 20)
+        if self.memory:
+            self.end_of_day.AddStage("memory", self.memory.LogDaily, 500, deferrable=True)
+        if self.state_store and self.state_store.persist:
+            self.end_of_day.AddStage("snapshot", lambda: (self.state_store.SaveSnapshot(), self.indicator_checkpoint.Save()), 200)
+            self.end_of_day.AddStage("journal", self.intent_journal.Compact, 50)
+        if self.LiveMode:
+            self.end_of_day.AddStage("statistics", lambda: (self.throughput.RecordReport(self.end_of_day.started_ns), self.throughput.Publish()), 20)
+        else:
+            # Backtest statistics are only read at the end, so they are published once, from OnEndOfAlgorithm
+            self.end_of_day.AddStage("statistics", lambda: self.throughput.RecordReport(self.end_of_day.started_ns), 20)
+
+    def AddTradingSymbol(self, symbol_str):
+        """
+        Add an equity to the trading universe and create its technical indicators.
+
+        Args:
+            symbol_str (str): Ticker of the equity to trade
+
+        Returns:
+            Symbol: The Symbol object of the added equity
+        """
+        # Add the equity to our universe with daily resolution data (minute data for intraday monitoring)
+        equity = self.AddEquity(symbol_str, Resolution.Minute if self.intraday else Resolution.Daily)
+        
+        # Store the Symbol object for future reference
+        self.symbols.append(equity.Symbol)
+        if self.risk_limits:
+            self.risk_limits.Add(equity.Symbol)
+        if self.correlation:
+            self.correlation.Add(equity.Symbol)
+        
+        if self.channel_store:
+            # One rolling high/low store per symbol serves every system's entry and exit channels
+            self.channel_store.Add(equity.Symbol)
+            for system in self.systems:
+                system.entry_channels[equity.Symbol] = self.channel_store.Channel(equity.Symbol, system.entry_length)
+                system.exit_channels[equity.Symbol] = self.channel_store.Channel(equity.Symbol, system.exit_length)
+            self.atrs[equity.Symbol] = self.ATR(equity.Symbol, self.ATR_PERIOD, MovingAverageType.Simple)
+            self.Log(f"Added equity: {equity.Symbol} (systems {', '.join(system.name for system in self.systems)})")
+            return equity.Symbol
+
+        if self.intraday:
+            # Same indicators, updated by the monitor's daily consolidator rather than by every minute bar
+            self.entry_channels[equity.Symbol] = DonchianChannel(self.system.entry_length)
+            self.exit_channels[equity.Symbol] = DonchianChannel(self.system.exit_length)
+            self.atrs[equity.Symbol] = AverageTrueRange(self.ATR_PERIOD, MovingAverageType.Simple)
+            self.intraday.Subscribe(equity.Symbol)
+            self.Log(f"Added equity: {equity.Symbol} (intraday monitoring)")
+            return equity.Symbol
+
+        # Create and store technical indicators for this symbol using QuantConnect's built-in indicators:
+        # 1. Entry channel (55-day Donchian for System 2) for generating entry signals using QuantConnect's DCH indicator
+        self.entry_channels[equity.Symbol] = self.DCH(equity.Symbol, self.system.entry_length)
+        
+        # 2. Exit channel (20-day Donchian for System 2) for generating exit signals using QuantConnect's DCH indicator
+        self.exit_channels[equity.Symbol] = self.DCH(equity.Symbol, self.system.exit_length)
+        
+        # 3. Average True Range (ATR) for volatility measurement and position sizing
+        self.atrs[equity.Symbol] = self.ATR(equity.Symbol, self.ATR_PERIOD, MovingAverageType.Simple)
+        
+        # Log the addition of this symbol to our universe
+        self.Log(f"Added equity: {equity.Symbol}")
+        return equity.Symbol
 
     def CreateDrawdownMap(self, starting_value, min_value=100):
         """
@@ -118,25 +325,65 @@ class TurtleTradingStrategy(QCAlgorithm):
         """
         current_portfolio_value = self.Portfolio.TotalPortfolioValue
         
+        if self.channel_store:
+            return self.GetSystemPortfolioValue(current_portfolio_value)
+
         # If we're at a new peak, update peak and recreate drawdown map
         if current_portfolio_value > self.peak_portfolio_value:
             self.peak_portfolio_value = current_portfolio_value
             self.drawdown_map = self.CreateDrawdownMap(current_portfolio_value)
             return current_portfolio_value
-            
-        # Find the appropriate drawdown level
-        keys = sorted(self.drawdown_map.keys(), reverse=True)
-        previous_effective_value = self.drawdown_map[keys[0]]  # Start with highest level
+
+        return self.LookupEffectiveValue(current_portfolio_value)
+
+    def GetSystemPortfolioValue(self, current_portfolio_value, update_peak=True):
+        """
+        Get the evaluated system's sizing value when several systems trade: the combined portfolio value,
+        scaled by the system's drawdown map applied to its own equity (see TradingSystem.Equity), so a
+        system in drawdown trades smaller whatever the others do.
+
+        Args:
+            current_portfolio_value (float): Combined portfolio value
+            update_peak (bool): Whether a new peak of the system's equity recreates its drawdown map
+
+        Returns:
+            float: The effective portfolio value to use for the system's position sizing
+        """
+        system_value = self.system.Equity(self.original_portfolio_value, self.Securities)
+        if system_value > self.peak_portfolio_value:
+            if update_peak:
+                self.peak_portfolio_value = system_value
+                self.drawdown_map = self.CreateDrawdownMap(system_value)
+            return current_portfolio_value
+        if system_value <= 0:
+            return 0.0
+        return current_portfolio_value * self.LookupEffectiveValue(system_value) / system_value
+
+    def LookupEffectiveValue(self, current_portfolio_value):
+        """
+        Look up the effective value for a portfolio value in the current drawdown map, without
+        updating the peak.
+
+        Args:
+            current_portfolio_value (float): Actual portfolio value
+
+        Returns:
+            float: The effective portfolio value from the drawdown map
+        """
+        # Find the appropriate drawdown level; the map is read once, it is the evaluated system's (a property)
+        drawdown_map = self.drawdown_map
+        keys = sorted(drawdown_map.keys(), reverse=True)
+        previous_effective_value = drawdown_map[keys[0]]  # Start with highest level
         
         for key in keys:
             if current_portfolio_value > key:
                 return previous_effective_value
             if current_portfolio_value == key:
-                return self.drawdown_map[key]
-            previous_effective_value = self.drawdown_map[key]
+                return drawdown_map[key]
+            previous_effective_value = drawdown_map[key]
             
         # If we're below the lowest mapped value, return the lowest effective value
-        return self.drawdown_map[keys[-1]]
+        return drawdown_map[keys[-1]]
 
     def OnData(self, slice):
         """
@@ -165,23 +412,53 @@ class TurtleTradingStrategy(QCAlgorithm):
         - Position sizing based on N (ATR)
         - Stop losses at 2N from entry
         - Maximum 4 pyramid levels per position
+        - Portfolio unit limits per market, correlated group and direction (4/6/10/12 units)
         - Add units when price moves by 1N in favorable direction
+
+        With intraday monitoring, minute slices only reach the steps above once the day's bars are
+        consolidated (every symbol) or when a symbol's price crosses one of its trigger levels (that symbol).
+
+        Step 2 runs first, before the symbol's data is checked, so a position without a stop is closed even
+        on a slice without its bar. With several trading systems, step 2 checks each system's book, and
+        steps 3-4 run for each system in turn on its own channels and book, after the shared data preparation.
         """
+        if self.sampling_profiler:
+            self.sampling_profiler.Bind()
+
+        symbols = self.symbols
+        if self.intraday:
+            slice, symbols = self.intraday.OnMinute(slice)
+            if slice is None:
+                return
+
+        if self.indicator_checkpoint and self.state_store.persist and symbols is self.symbols:  # Daily bars only, not an intraday trigger's minute bars
+            self.indicator_checkpoint.RecordSlice(slice)
+        if self.correlation and symbols is self.symbols:
+            self.correlation.Update(slice)
+        if self.channel_store:
+            self.channel_store.Update(slice)
+
         # Skip processing during warm-up period
         if self.IsWarmingUp:
             return
 
+        started_ns = perf_counter_ns()
+        symbols_evaluated = 0
+
         # Log current processing time and available symbols
         self.Log(f"Processing slice at {slice.Time}")
         self.Log(f"Symbols in slice: {', '.join(str(symbol) for symbol in slice.Keys)}")
         
-        # Process each symbol in our trading universe
-        for symbol in self.symbols:
+        timer = self.hot_path_timer
+
+        # Process each symbol in our trading universe (or those past an intraday trigger)
+        for symbol in symbols:
+            if timer: timer.Start()
+
             # SECTION 1: VALIDATION CHECKS
-            # Ensure position integrity - check for positions without stop losses
-            if self.Portfolio[symbol].Invested and symbol not in self.stop_losses:
-                self.Log(f"ERROR: Position exists for {symbol} but no stop loss is set!")
-                self.Liquidate(symbol)  # Emergency exit if we somehow have a position without a stop loss
+            # Ensure position integrity - close positions without stop losses, even on a slice without the symbol's bar
+            closed = self.CloseUnprotectedPositions(symbol)
+            if len(closed) == len(self.systems):
                 continue
 
             # Verify symbol exists in our Securities collection
@@ -195,103 +472,222 @@ class TurtleTradingStrategy(QCAlgorithm):
                 self.Log(f"No data for {symbol} in this slice")
                 continue
 
+            if timer: timer.Lap("validation")
+
             # SECTION 2: DATA PREPARATION
             # Log current price data
             self.Log(f"Data for {symbol}: Open={slice.Bars[symbol].Open}, High={slice.Bars[symbol].High}, Low={slice.Bars[symbol].Low}, Close={slice.Bars[symbol].Close}")
+            current_price = slice.Bars[symbol].Close
 
-            # Verify QuantConnect's built-in indicators are ready before making trading decisions
-            if not self.entry_channels[symbol].IsReady or not self.exit_channels[symbol].IsReady or not self.atrs[symbol].IsReady:
-                self.Log(f"Indicators not ready for {symbol}. Entry: {self.entry_channels[symbol].IsReady}, Exit: {self.exit_channels[symbol].IsReady}, ATR: {self.atrs[symbol].IsReady}")
-                continue
+            # Chart N, shared by every system
+            n = self.atrs[symbol].Current.Value
+            if self.atrs[symbol].IsReady:
+                self.charts.RecordSymbol(TurtleCharts.N_CHART, symbol, self.Time, n)
+
+            # Each trading system evaluates the symbol against its own channels and book
+            for system in self.systems:
+                if system in closed:
+                    continue  # Its unprotected position was just closed
+                self.system = system
+                position = self.GetPosition(symbol)
+
+                # Verify QuantConnect's built-in indicators are ready before making trading decisions
+                if not self.entry_channels[symbol].IsReady or not self.exit_channels[symbol].IsReady or not self.atrs[symbol].IsReady:
+                    self.Log(f"Indicators not ready for {symbol}. Entry: {self.entry_channels[symbol].IsReady}, Exit: {self.exit_channels[symbol].IsReady}, ATR: {self.atrs[symbol].IsReady}")
+                    continue
 
-            # SECTION 3: CALCULATE TRADING SIGNALS
-            # Get current price and Donchian Channel breakout levels from QuantConnect's DCH indicator
-            current_price = slice.Bars[symbol].Close
-            donchain_long_entry = self.entry_channels[symbol].Upper.Current.Value    # System 2: 55-day high for long entry signals
-            donchain_short_entry = self.entry_channels[symbol].Lower.Current.Value   # System 2: 55-day low for short entry signals
-            donchain_short_exit = self.exit_channels[symbol].Upper.Current.Value     # System 2: 20-day high for short exit signals
-            donchain_long_exit = self.exit_channels[symbol].Lower.Current.Value      # System 2: 20-day low for long exit signals
-
-            # Log current price and Donchian Channel levels
-            self.Log(f"Symbol: {symbol}, Price: {current_price}, Donchain Long Entry: {donchain_long_entry}, Donchain Short Entry: {donchain_short_entry}")
-
-            # SECTION 4: ENTRY LOGIC
-            # Check for new position entry signals if not currently invested
-            if not self.Portfolio[symbol].Invested:
-                # Check for long entry - price breaks above 55-day high
-                if current_price >= donchain_long_entry:
-                    self.Log(f"Breakout signal: {symbol} price {current_price} above long entry {donchain_long_entry}")
-                    self.EnterLong(symbol)
-                # Check for short entry - price breaks below 55-day low
-                elif current_price <= donchain_short_entry:
-                    self.Log(f"Breakout signal: {symbol} price {current_price} below short entry {donchain_short_entry}")
-                    self.EnterShort(symbol)
-
-            # SECTION 5: POSITION MANAGEMENT
-            else:
-                # SECTION 5A: EXIT SIGNALS
-                # Check for long position exit - price breaks below 20-day low
-                if self.Portfolio[symbol].IsLong and current_price <= donchain_long_exit:
-                    # Calculate and log profit/loss for the exit
-                    position = self.Portfolio[symbol]
-                    profit_loss = position.total_close_profit()  # Uses built-in method
-                    profit_loss_percent = (profit_loss / (position.AveragePrice * position.Quantity)) * 100
-                    exit_message = (f"Exited Long: {symbol}, Price: {current_price}, "
-                                  f"P/L: ${profit_loss:.2f} ({profit_loss_percent:.2f}%)")
-                    self.Log(f"Exit signal for long position: {symbol} price {current_price} below Donchainlong exit {donchain_long_exit}")
-                    self.Log(exit_message)
-                    self.Liquidate(symbol)
-                    self.CleanupPosition(symbol)  # Clean up all tracking variables
-                    self.daily_trades.append(exit_message)
-
-                # Check for short position exit - price breaks above 20-day high
-                elif self.Portfolio[symbol].IsShort and current_price >= donchain_short_exit:
-                    # Calculate and log profit/loss for the exit
-                    position = self.Portfolio[symbol]
-                    profit_loss = position.total_close_profit()  # Uses built-in method
-                    profit_loss_percent = (profit_loss / (position.AveragePrice * abs(position.Quantity))) * 100
-                    exit_message = (f"Exited Short: {symbol}, Price: {current_price}, "
-                                  f"P/L: ${profit_loss:.2f} ({profit_loss_percent:.2f}%)")
-                    self.Log(f"Exit signal for short position: {symbol} price {current_price} above short exit {donchain_short_exit}")
-                    self.Log(exit_message)
-                    self.Liquidate(symbol)
-                    self.CleanupPosition(symbol)  # Clean up all tracking variables
-                    self.daily_trades.append(exit_message)
-
-                # SECTION 5B: STOP LOSS CHECK
-                # Check if price has hit our stop loss level
-                if self.Portfolio[symbol].Invested and symbol in self.stop_losses:
-                    current_price = slice.Bars[symbol].Close
-                    if ((self.Portfolio[symbol].IsLong and current_price <= self.stop_losses[symbol]) or 
-                        (self.Portfolio[symbol].IsShort and current_price >= self.stop_losses[symbol])):
-                        # Calculate and log profit/loss for the stop loss exit
-                        position = self.Portfolio[symbol]
+                if timer: timer.Lap("data_preparation")
+
+                # SECTION 3: CALCULATE TRADING SIGNALS
+                symbols_evaluated += 1
+                # Get Donchian Channel breakout levels (System 2: 55-day entry and 20-day exit; System 1: 20 and 10)
+                donchain_long_entry = self.entry_channels[symbol].Upper.Current.Value    # Entry channel high for long entry signals
+                donchain_short_entry = self.entry_channels[symbol].Lower.Current.Value   # Entry channel low for short entry signals
+                donchain_short_exit = self.exit_channels[symbol].Upper.Current.Value     # Exit channel high for short exit signals
+                donchain_long_exit = self.exit_channels[symbol].Lower.Current.Value      # Exit channel low for long exit signals
+
+                # Log current price and Donchian Channel levels
+                self.Log(f"Symbol: {symbol}, Price: {current_price}, Donchain Long Entry: {donchain_long_entry}, Donchain Short Entry: {donchain_short_entry}")
+
+                # Chart the distance to the stop in units of N for open positions
+                if symbol in self.stop_losses and n > 0:
+                    self.charts.RecordSymbol(TurtleCharts.STOP_CHART, self.SystemSeries(symbol), self.Time, abs(current_price - self.stop_losses[symbol]) / n)
+
+                if timer: timer.Lap("signals")
+
+                # SECTION 4: ENTRY LOGIC
+                # Check for new position entry signals if not currently invested
+                if not position.Invested:
+                    # Check for long entry - price breaks above the entry channel high
+                    if current_price >= donchain_long_entry:
+                        self.Log(f"Breakout signal: {symbol} price {current_price} above long entry {donchain_long_entry}")
+                        self.EnterLong(symbol)
+                    # Check for short entry - price breaks below the entry channel low
+                    elif current_price <= donchain_short_entry:
+                        self.Log(f"Breakout signal: {symbol} price {current_price} below short entry {donchain_short_entry}")
+                        self.EnterShort(symbol)
+
+                    if timer: timer.Lap("entry")
+
+                # SECTION 5: POSITION MANAGEMENT
+                else:
+                    # SECTION 5A: EXIT SIGNALS
+                    # Check for long position exit - price breaks below the exit channel low
+                    if position.IsLong and current_price <= donchain_long_exit:
+                        # Calculate and log profit/loss for the exit
+                        profit_loss = position.total_close_profit()  # Uses built-in method
+                        profit_loss_percent = (profit_loss / (position.AveragePrice * position.Quantity)) * 100
+                        exit_message = (f"Exited Long: {symbol}, Price: {current_price}, "
+                                      f"P/L: ${profit_loss:.2f} ({profit_loss_percent:.2f}%)")
+                        self.Log(f"Exit signal for long position: {symbol} price {current_price} below Donchainlong exit {donchain_long_exit}")
+                        self.Log(exit_message)
+                        intent = self.intent_journal.RecordIntent("exit", symbol, -position.Quantity) if self.intent_journal else None
+                        self.ClosePosition(symbol)
+                        self.CleanupPosition(symbol)  # Clean up all tracking variables
+                        if intent:
+                            self.intent_journal.RecordOutcome(intent)
+                        self.daily_trades.append(exit_message)
+
+                    # Check for short position exit - price breaks above the exit channel high
+                    elif position.IsShort and current_price >= donchain_short_exit:
+                        # Calculate and log profit/loss for the exit
                         profit_loss = position.total_close_profit()  # Uses built-in method
                         profit_loss_percent = (profit_loss / (position.AveragePrice * abs(position.Quantity))) * 100
-                        exit_message = (f"Exited position due to stop loss: {symbol}, Price: {current_price}, "
+                        exit_message = (f"Exited Short: {symbol}, Price: {current_price}, "
                                       f"P/L: ${profit_loss:.2f} ({profit_loss_percent:.2f}%)")
-                        self.Log(f"Stop loss hit for {symbol} at {current_price}")
+                        self.Log(f"Exit signal for short position: {symbol} price {current_price} above short exit {donchain_short_exit}")
                         self.Log(exit_message)
-                        self.Liquidate(symbol)
+                        intent = self.intent_journal.RecordIntent("exit", symbol, -position.Quantity) if self.intent_journal else None
+                        self.ClosePosition(symbol)
                         self.CleanupPosition(symbol)  # Clean up all tracking variables
+                        if intent:
+                            self.intent_journal.RecordOutcome(intent)
                         self.daily_trades.append(exit_message)
-                        del self.stop_losses[symbol]
-
-                # SECTION 5C: POSITION SCALING (PYRAMIDING)
-                # Check if we can add units to our position
-                if self.Portfolio[symbol].Invested:
-                    current_pyramid_level = self.pyramid_level[symbol]
-                    if current_pyramid_level < self.MAX_PYRAMID_LEVELS:
-                        # Add to long position if price moves up by 1N (1 ATR)
-                        if self.Portfolio[symbol].IsLong:
-                            last_price = self.last_add_price.get(symbol, self.entry_prices[symbol][-1])
-                            if current_price >= last_price + self.atrs[symbol].Current.Value:
-                                self.AddToLong(symbol)
-                        # Add to short position if price moves down by 1N (1 ATR)
-                        elif self.Portfolio[symbol].IsShort:
-                            last_price = self.last_add_price.get(symbol, self.entry_prices[symbol][-1])
-                            if current_price <= last_price - self.atrs[symbol].Current.Value:
-                                self.AddToShort(symbol)
+
+                    if timer: timer.Lap("exits")
+
+                    # SECTION 5B: STOP LOSS CHECK
+                    # Check if price has hit our stop loss level
+                    if position.Invested and symbol in self.stop_losses:
+                        if ((position.IsLong and current_price <= self.stop_losses[symbol]) or 
+                            (position.IsShort and current_price >= self.stop_losses[symbol])):
+                            # Calculate and log profit/loss for the stop loss exit
+                            profit_loss = position.total_close_profit()  # Uses built-in method
+                            profit_loss_percent = (profit_loss / (position.AveragePrice * abs(position.Quantity))) * 100
+                            exit_message = (f"Exited position due to stop loss: {symbol}, Price: {current_price}, "
+                                          f"P/L: ${profit_loss:.2f} ({profit_loss_percent:.2f}%)")
+                            self.Log(f"Stop loss hit for {symbol} at {current_price}")
+                            self.Log(exit_message)
+                            intent = self.intent_journal.RecordIntent("exit", symbol, -position.Quantity) if self.intent_journal else None
+                            self.ClosePosition(symbol)
+                            self.CleanupPosition(symbol)  # Clean up all tracking variables
+                            if intent:
+                                self.intent_journal.RecordOutcome(intent)
+                            self.daily_trades.append(exit_message)
+
+                    if timer: timer.Lap("stop_check")
+
+                    # SECTION 5C: POSITION SCALING (PYRAMIDING)
+                    # Check if we can add units to our position (not one we've just exited and cleaned up,
+                    # which LEAN still reports as invested until the exit order fills at the next open)
+                    if position.Invested and symbol in self.pyramid_level:
+                        current_pyramid_level = self.pyramid_level[symbol]
+                        if current_pyramid_level < self.MAX_PYRAMID_LEVELS:
+                            # Add to long position if price moves up by 1N (1 ATR)
+                            if position.IsLong:
+                                last_price = self.last_add_price.get(symbol, self.entry_prices[symbol][-1])
+                                if current_price >= last_price + self.atrs[symbol].Current.Value:
+                                    self.AddToLong(symbol)
+                            # Add to short position if price moves down by 1N (1 ATR)
+                            elif position.IsShort:
+                                last_price = self.last_add_price.get(symbol, self.entry_prices[symbol][-1])
+                                if current_price <= last_price - self.atrs[symbol].Current.Value:
+                                    self.AddToShort(symbol)
+
+                    if timer: timer.Lap("pyramiding")
+
+        if self.intraday:
+            self.intraday.Refresh(symbols)
+        self.RecordPortfolioCharts()
+        if self.state_store and self.state_store.persist:
+            self.state_store.SaveDelta()
+            self.intent_journal.Sync()
+        self.throughput.RecordSlice(started_ns, symbols_evaluated)
+
+    def RecordPortfolioCharts(self):
+        """
+        Buffer the portfolio-level chart points: actual vs effective equity and total units on.
+        The effective value is read without updating the peak so charting never changes sizing.
+        """
+        current_portfolio_value = self.Portfolio.TotalPortfolioValue
+        self.charts.Record(TurtleCharts.SIZING_CHART, "Actual Equity", self.Time, current_portfolio_value)
+        if self.channel_store:
+            for system in self.systems:
+                self.system = system
+                self.charts.Record(TurtleCharts.SIZING_CHART, f"Effective Equity (System {system.name})", self.Time,
+                                   self.GetSystemPortfolioValue(current_portfolio_value, update_peak=False))
+            self.charts.Record(TurtleCharts.EXPOSURE_CHART, "Units On", self.Time,
+                               sum(sum(system.pyramid_level.values()) for system in self.systems))
+            return
+
+        if current_portfolio_value > self.peak_portfolio_value:
+            effective_value = current_portfolio_value
+        else:
+            effective_value = self.LookupEffectiveValue(current_portfolio_value)
+
+        self.charts.Record(TurtleCharts.SIZING_CHART, "Effective Equity", self.Time, effective_value)
+        self.charts.Record(TurtleCharts.EXPOSURE_CHART, "Units On", self.Time, sum(self.pyramid_level.values()))
+
+    def OnWarmupFinished(self):
+        """
+        Mark the end of warm-up for the throughput statistics and, now that holdings are loaded, replay
+        the intent journal after a restart and reconcile the holdings with the book, before the first
+        slice checks positions for stops. The unit counts and intraday trigger levels are computed from the
+        reconciled book.
+        """
+        self.throughput.WarmUpFinished()
+        if self.intent_journal and self.intent_journal.pending_replay:
+            self.intent_journal.Replay()
+        if self.reconciler:
+            self.reconciler.Seed()
+            self.reconciler.Run("startup")
+        if self.risk_limits:
+            self.risk_limits.Rebuild(self.systems)
+        if self.intraday:
+            self.intraday.Refresh()
+
+    def OnOrderEvent(self, order_event):
+        """
+        Count filled orders for the throughput statistics and keep the reconciler's held symbols current.
+
+        Args:
+            order_event: The order event LEAN raised
+        """
+        if order_event.Status == OrderStatus.Filled:
+            self.throughput.RecordOrder()
+        if self.reconciler and order_event.Status in (OrderStatus.Filled, OrderStatus.PartiallyFilled):
+            self.reconciler.RecordFill(order_event.Symbol)
+
+    def OnEndOfAlgorithm(self):
+        """
+        Emit the downsampled Turtle charts (what's left since the last daily flush, live), the run's end-of-day and hot-path timings and the sampled profile, deliver
+        the queued daily reports, and snapshot the strategy state, once the run is over.
+        """
+        self.charts.Flush()
+        self.end_of_day.LogRun()
+        if not self.reporting.Close():
+            self.Log("WARNING: Ending with daily reports undelivered; the report files and webhook are missing the latest ones")
+        if self.state_store and self.state_store.persist:
+            self.state_store.SaveSnapshot()
+            self.indicator_checkpoint.Save()
+            self.intent_journal.Compact()
+        if self.intent_journal:
+            self.intent_journal.Close()
+        self.throughput.Publish()
+        if self.hot_path_timer:
+            self.hot_path_timer.LogRun()
+        if self.sampling_profiler:
+            self.sampling_profiler.Save()
 
     def EnterLong(self, symbol):
         """
@@ -299,12 +695,13 @@ class TurtleTradingStrategy(QCAlgorithm):
         of the Turtle Trading strategy for long positions.
 
         Process:
-        1. Calculate stop loss price using ATR (2N below entry price)
-        2. Calculate position size based on risk parameters
-        3. Verify sufficient capital for the trade
-        4. Place the market order
-        5. Initialize position tracking variables
-        6. Log the trade details
+        1. Check the portfolio unit limits (see risk_limits.py)
+        2. Calculate stop loss price using ATR (2N below entry price)
+        3. Calculate position size based on risk parameters
+        4. Verify sufficient capital for the trade
+        5. Place the market order
+        6. Initialize position tracking variables
+        7. Log the trade details
 
         Args:
             symbol: The trading symbol to enter a long position in
@@ -315,6 +712,10 @@ class TurtleTradingStrategy(QCAlgorithm):
         - last_add_price: Set to entry price for future pyramiding calculations
         - stop_losses: Set stop loss price for the position
         """
+        # Enter only within the portfolio unit limits
+        if not self.AllowsUnit(symbol, 1):
+            return
+
         # Get reference to the security for price and trading operations
         equity = self.Securities[symbol]
 
@@ -337,14 +738,27 @@ class TurtleTradingStrategy(QCAlgorithm):
         # Capture the exact entry price before placing the order
         entry_price = equity.Price
 
+        # Journal the intent before the order, so a crash before the book is updated can be recovered
+        intent = None
+        if self.intent_journal:
+            intent = self.intent_journal.RecordIntent("enter_long", symbol, quantity, stop_price, [entry_price], 1, entry_price)
+
         # Place the market order for the calculated quantity
-        self.MarketOrder(symbol, quantity)
+        self.PlaceOrder(symbol, quantity)
 
         # Initialize position tracking variables
         self.entry_prices[symbol] = [entry_price]  # List with first entry price
         self.pyramid_level[symbol] = 1            # First pyramid level of potentially 4
         self.last_add_price[symbol] = entry_price  # Reference price for pyramiding
         self.stop_losses[symbol] = stop_price      # Stop loss for the position
+        self.position_quantity[symbol] = quantity  # Quantity ordered
+        if self.risk_limits:
+            self.risk_limits.Record(self.system.name, symbol, 1)
+        if self.state_store:
+            self.state_store.MarkDirty(symbol)
+
+        if intent:
+            self.intent_journal.RecordOutcome(intent)
 
         # Log the trade details
         trade_info = f"Entered Long: {symbol}, Quantity: {quantity}, Entry Price: ${entry_price}, Stop: ${stop_price}"
@@ -357,12 +771,13 @@ class TurtleTradingStrategy(QCAlgorithm):
         of the Turtle Trading strategy for short positions.
 
         Process:
-        1. Calculate stop loss price using ATR (2N above entry price)
-        2. Calculate position size based on risk parameters
-        3. Verify sufficient capital for the trade
-        4. Place the market order
-        5. Initialize position tracking variables
-        6. Log the trade details
+        1. Check the portfolio unit limits (see risk_limits.py)
+        2. Calculate stop loss price using ATR (2N above entry price)
+        3. Calculate position size based on risk parameters
+        4. Verify sufficient capital for the trade
+        5. Place the market order
+        6. Initialize position tracking variables
+        7. Log the trade details
 
         Args:
             symbol: The trading symbol to enter a short position in
@@ -373,6 +788,10 @@ class TurtleTradingStrategy(QCAlgorithm):
         - last_add_price: Set to entry price for future pyramiding calculations
         - stop_losses: Set stop loss price for the position
         """
+        # Enter only within the portfolio unit limits
+        if not self.AllowsUnit(symbol, -1):
+            return
+
         # Get reference to the security for price and trading operations
         equity = self.Securities[symbol]
 
@@ -395,14 +814,27 @@ class TurtleTradingStrategy(QCAlgorithm):
         # Capture the exact entry price before placing the order
         entry_price = equity.Price
 
+        # Journal the intent before the order, so a crash before the book is updated can be recovered
+        intent = None
+        if self.intent_journal:
+            intent = self.intent_journal.RecordIntent("enter_short", symbol, -quantity, stop_price, [entry_price], 1, entry_price)
+
         # Place the market order for the calculated quantity (negative for short)
-        self.MarketOrder(symbol, -quantity)
+        self.PlaceOrder(symbol, -quantity)
 
         # Initialize position tracking variables
         self.entry_prices[symbol] = [entry_price]  # List with first entry price
         self.pyramid_level[symbol] = 1            # First pyramid level of potentially 4
         self.last_add_price[symbol] = entry_price  # Reference price for pyramiding
         self.stop_losses[symbol] = stop_price      # Stop loss for the position
+        self.position_quantity[symbol] = -quantity  # Quantity ordered (negative for short)
+        if self.risk_limits:
+            self.risk_limits.Record(self.system.name, symbol, -1)
+        if self.state_store:
+            self.state_store.MarkDirty(symbol)
+
+        if intent:
+            self.intent_journal.RecordOutcome(intent)
 
         # Log the trade details
         trade_info = f"Entered Short: {symbol}, Quantity: {quantity}, Entry Price: ${entry_price}, Stop: ${stop_price}"
@@ -432,71 +864,35 @@ class TurtleTradingStrategy(QCAlgorithm):
 
         return max(1, share_quantity)
 
-    def LogPortfolioState(self):
+    def OnEndOfDay(self):
         """
-        Log the current state of the portfolio, including cash, equity value, and details of each holding.
+        Run the end-of-day pipeline (reconciliation, correlation groups, the daily report, memory sampling, the state snapshot
+        and journal compaction, runtime statistics) at the close on trading days.
         """
-        # Log overall portfolio state
-        self.Log(f"===== Portfolio State as of {self.Time} =====")
-        self.Log(f"Total Portfolio Value: ${self.Portfolio.TotalPortfolioValue}")
-        self.Log(f"Cash on Hand: ${self.Portfolio.Cash}")
-        total_equity_value = sum(holding.AbsoluteHoldingsValue for holding in self.Portfolio.Values if holding.Invested)
-        self.Log(f"Total Equity Value: ${total_equity_value}")
-
-        # Log details for each holding
-        for symbol, holding in self.Portfolio.items():
-            if holding.Invested:
-                if symbol not in self.stop_losses:
-                    self.Log(f"WARNING: Position exists for {symbol} but no stop loss is set!")
-                    continue
+        self.end_of_day.Run()
 
-                entry_price = holding.AveragePrice
-                current_price = self.Securities[symbol].Price
-                quantity = holding.Quantity
-                market_value = holding.AbsoluteHoldingsValue
-                stop_loss = self.stop_losses[symbol]  # We know it exists now
+    def UpdateCorrelationGroups(self):
+        """
+        Recluster the universe by the rolling correlation matrix and move the symbols whose clusters
+        changed to their new unit-limit groups.
+        """
+        changed = self.correlation.Refresh()
+        if self.risk_limits:
+            for symbol, (close_group, loose_group) in changed.items():
+                self.risk_limits.SetGroups(symbol, close_group, loose_group)
+        if changed:
+            self.Log(f"Correlation groups changed for {len(changed)} symbols")
 
-                # Calculate exit price based on the Turtle Trading rules
-                if holding.IsLong:
-                    exit_price = self.exit_channels[symbol].Lower.Current.Value
-                else:
-                    exit_price = self.exit_channels[symbol].Upper.Current.Value
-
-                unrealized_pnl = (current_price - entry_price) * quantity
-                unrealized_pnl_percent = (unrealized_pnl / market_value) if market_value != 0 else 0
-
-                self.Log(f"Holding: {symbol}")
-                self.Log(f"  Position: {'Long' if holding.IsLong else 'Short'}")
-                self.Log(f"  Quantity: {quantity}")
-                self.Log(f"  Entry Price: ${entry_price}")
-                self.Log(f"  Current Price: ${current_price}")
-                self.Log(f"  Market Value: ${market_value}")
-                self.Log(f"  Stop Loss: ${stop_loss}")
-                self.Log(f"  Unrealized P/L: ${unrealized_pnl:.2f} ({unrealized_pnl_percent:.2%})")
-                self.Log(f"  Exit Price: ${exit_price}")
-
-        # Log the day's trades
-        self.Log("Today's Trades:")
-        if self.daily_trades:
-            for trade in self.daily_trades:
-                self.Log(f"  {trade}")
-        else:
-            self.Log("  No trades today")
+    def LogPortfolioState(self):
+        """
+        Report the current state of the portfolio, including cash, equity value, and details of each holding.
+        """
+        # Capture the report here; live, it is rendered and delivered (log, file, webhook) on the reporting thread
+        self.reporting.Submit(DailyReport.Capture(self))
 
         # Clear the daily trades for the next day
-        self.daily_trades = []
-
-        self.Log("=====================================")
-
-        self.Log(f"Current Portfolio Value: ${self.Portfolio.TotalPortfolioValue}")
-        self.Log(f"Effective Portfolio Value: ${self.GetAvailablePortfolioValue()}")
-        self.Log(f"Peak Portfolio Value: ${self.peak_portfolio_value}")
-        
-        # Log first few entries of drawdown map for verification
-        levels = list(self.drawdown_map.items())[:5]
-        self.Log("Current Drawdown Map (first 5 levels):")
-        for actual, effective in levels:
-            self.Log(f"  At ${actual:.2f} -> Use ${effective:.2f}")
+        for system in self.systems:
+            system.daily_trades = []
 
     def AddToLong(self, symbol):
         """
@@ -507,15 +903,19 @@ class TurtleTradingStrategy(QCAlgorithm):
             symbol: The trading symbol to add units to
 
         Position Management:
-        1. Calculate new stop price based on current ATR
-        2. Calculate position size based on risk parameters
-        3. Place market order for additional unit
-        4. Update tracking variables:
+        1. Check the portfolio unit limits (see risk_limits.py)
+        2. Calculate new stop price based on current ATR
+        3. Calculate position size based on risk parameters
+        4. Place market order for additional unit
+        5. Update tracking variables:
            - Add new entry price to history
            - Update last price for future pyramiding
            - Increment unit counter
            - Update stop loss for entire position
         """
+        if not self.AllowsUnit(symbol, 1):
+            return
+
         equity = self.Securities[symbol]
         stop_price = equity.Price - self.atrs[symbol].Current.Value * self.ATR_MULTIPLIER
         quantity = self.CalculatePositionSize(equity, stop_price)
@@ -525,8 +925,14 @@ class TurtleTradingStrategy(QCAlgorithm):
             self.Log(f"Not enough cash to add to long position in {symbol}")
             return
 
+        intent = None
+        if self.intent_journal:
+            intent = self.intent_journal.RecordIntent("add_long", symbol, quantity, stop_price,
+                                                      self.entry_prices.get(symbol, []) + [equity.Price],
+                                                      self.pyramid_level[symbol] + 1, equity.Price)
+
         # Place the order for the additional unit
-        self.MarketOrder(symbol, quantity)
+        self.PlaceOrder(symbol, quantity)
         
         # Update position tracking variables
         if symbol not in self.entry_prices:
@@ -535,6 +941,14 @@ class TurtleTradingStrategy(QCAlgorithm):
         self.last_add_price[symbol] = equity.Price      # Update price level for next pyramid entry
         self.pyramid_level[symbol] = self.pyramid_level[symbol] + 1  # Increment unit counter
         self.stop_losses[symbol] = stop_price  # Update stop loss for entire position
+        self.position_quantity[symbol] = self.position_quantity.get(symbol, 0) + quantity  # Include the new unit
+        if self.risk_limits:
+            self.risk_limits.Record(self.system.name, symbol, self.pyramid_level[symbol])
+        if self.state_store:
+            self.state_store.MarkDirty(symbol)
+
+        if intent:
+            self.intent_journal.RecordOutcome(intent)
 
         # Log the addition to the position
         trade_info = (f"Added to Long: {symbol}, Pyramid Level: {self.pyramid_level[symbol]}, "
@@ -551,15 +965,19 @@ class TurtleTradingStrategy(QCAlgorithm):
             symbol: The trading symbol to add units to
 
         Position Management:
-        1. Calculate new stop price based on current ATR
-        2. Calculate position size based on risk parameters
-        3. Place market order for additional unit
-        4. Update tracking variables:
+        1. Check the portfolio unit limits (see risk_limits.py)
+        2. Calculate new stop price based on current ATR
+        3. Calculate position size based on risk parameters
+        4. Place market order for additional unit
+        5. Update tracking variables:
            - Add new entry price to history
            - Update last price for future pyramiding
            - Increment unit counter
            - Update stop loss for entire position
         """
+        if not self.AllowsUnit(symbol, -1):
+            return
+
         equity = self.Securities[symbol]
         stop_price = equity.Price + self.atrs[symbol].Current.Value * self.ATR_MULTIPLIER
         quantity = self.CalculatePositionSize(equity, stop_price)
@@ -569,8 +987,14 @@ class TurtleTradingStrategy(QCAlgorithm):
             self.Log(f"Not enough cash to add to short position in {symbol}")
             return
 
+        intent = None
+        if self.intent_journal:
+            intent = self.intent_journal.RecordIntent("add_short", symbol, -quantity, stop_price,
+                                                      self.entry_prices.get(symbol, []) + [equity.Price],
+                                                      self.pyramid_level[symbol] + 1, equity.Price)
+
         # Place the order for the additional unit
-        self.MarketOrder(symbol, -quantity)
+        self.PlaceOrder(symbol, -quantity)
         
         # Update position tracking variables
         if symbol not in self.entry_prices:
@@ -579,6 +1003,14 @@ class TurtleTradingStrategy(QCAlgorithm):
         self.last_add_price[symbol] = equity.Price      # Update price level for next pyramid entry
         self.pyramid_level[symbol] = self.pyramid_level[symbol] + 1  # Increment unit counter
         self.stop_losses[symbol] = stop_price  # Update stop loss for entire position
+        self.position_quantity[symbol] = self.position_quantity.get(symbol, 0) - quantity  # Include the new unit
+        if self.risk_limits:
+            self.risk_limits.Record(self.system.name, symbol, -self.pyramid_level[symbol])
+        if self.state_store:
+            self.state_store.MarkDirty(symbol)
+
+        if intent:
+            self.intent_journal.RecordOutcome(intent)
 
         # Log the addition to the position
         trade_info = (f"Added to Short: {symbol}, Pyramid Level: {self.pyramid_level[symbol]}, "
@@ -586,6 +1018,73 @@ class TurtleTradingStrategy(QCAlgorithm):
         self.Log(trade_info)
         self.daily_trades.append(trade_info)
 
+    def AllowsUnit(self, symbol, direction):
+        """
+        Check a unit about to be entered or added against the portfolio unit limits, logging the limit
+        that refuses it.
+
+        Args:
+            symbol: The trading symbol to enter or add to
+            direction (int): 1 for a long unit, -1 for a short one
+
+        Returns:
+            bool: Whether the unit is within every limit (always, with unit limits off)
+        """
+        limit = self.risk_limits.Check(symbol, direction) if self.risk_limits else None
+        if limit:
+            self.Log(f"Unit limit reached for {symbol} ({limit}, {'long' if direction > 0 else 'short'}); not adding a unit")
+        return limit is None
+
+    def GetPosition(self, symbol):
+        """
+        The evaluated system's position in a symbol: the holding itself with a single system, or the
+        system's share of it, read from its book, with several.
+        """
+        if self.channel_store:
+            return SystemPosition(self.system, self.Securities[symbol])
+        return self.Portfolio[symbol]
+
+    def CloseUnprotectedPositions(self, symbol):
+        """
+        Close each system's position in a symbol that has no stop loss, an emergency exit for a book
+        that somehow lost its stop.
+
+        Returns:
+            list[TradingSystem]: The systems whose position was closed
+        """
+        closed = []
+        for system in self.systems:
+            self.system = system
+            if symbol not in self.stop_losses and self.GetPosition(symbol).Invested:
+                self.Log(f"ERROR: Position exists for {symbol} but no stop loss is set!")
+                self.ClosePosition(symbol)
+                self.CleanupPosition(symbol)
+                closed.append(system)
+        return closed
+
+    def PlaceOrder(self, symbol, quantity):
+        """
+        Place a market order for the evaluated system. With several systems the system's cost basis
+        is kept, for its own equity and throttle.
+        """
+        if self.channel_store:
+            self.system.RecordOrder(symbol, quantity, self.Securities[symbol].Price)
+        return self.MarketOrder(symbol, quantity)
+
+    def ClosePosition(self, symbol):
+        """
+        Close the evaluated system's position: the whole holding with a single system, only the system's
+        own quantity with several (the others keep theirs).
+        """
+        if not self.channel_store:
+            return self.Liquidate(symbol)
+        quantity = self.position_quantity.get(symbol, 0)
+        return [self.PlaceOrder(symbol, -quantity)] if quantity else []
+
+    def SystemSeries(self, symbol):
+        """Chart series name for the evaluated system's symbol: the symbol, tagged with the system when there are several."""
+        return f"{symbol} (System {self.system.name})" if self.channel_store else symbol
+
     def CleanupPosition(self, symbol):
         """
         Clean up all tracking variables when exiting a position
@@ -598,6 +1097,12 @@ class TurtleTradingStrategy(QCAlgorithm):
             del self.pyramid_level[symbol]
         if symbol in self.last_add_price:
             del self.last_add_price[symbol]
+        if symbol in self.position_quantity:
+            del self.position_quantity[symbol]
+        if self.risk_limits:
+            self.risk_limits.Record(self.system.name, symbol, 0)
+        if self.state_store:
+            self.state_store.MarkDirty(symbol)
 
     def Test_CreateDrawdownMap(self):
         """Test the drawdown map creation logic"""
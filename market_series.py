@@ -0,0 +1,301 @@
+# region imports
+from array import array
+from datetime import date, datetime
+import bisect
+import csv
+import io
+import math
+import os
+import struct
+import zipfile
+# endregion
+
+# ObjectStore key the strategy reads the cached series from
+MARKET_SERIES_KEY = "turtle/market-series.bin"
+
+# Binary layout: header, then the benchmark dates/closes, then the risk-free dates/rates
+_HEADER = struct.Struct("<4sBII")  # magic, version, benchmark count, risk-free count
+_MAGIC = b"TTMS"
+_VERSION = 1
+
+TRADING_DAYS_PER_YEAR = 252  # Same annualisation factor LEAN uses for its statistics
+
+
+def _to_ordinal(when):
+    """Convert a date/datetime (or a LEAN DateTime exposing Year/Month/Day) into a yyyymmdd integer."""
+    if hasattr(when, "Year"):
+        return when.Year * 10000 + when.Month * 100 + when.Day
+    return when.year * 10000 + when.month * 100 + when.day
+
+
+def _parse_date(text):
+    """Parse the yyyyMMdd or yyyy-MM-dd dates found in LEAN data files; None for headers."""
+    text = text.strip().split(" ")[0].replace("-", "")
+    if len(text) != 8 or not text.isdigit():
+        return None
+    return int(text)
+
+
+class DailySeries:
+    """
+    A sorted series of daily values keyed by yyyymmdd integers with as-of lookup.
+    """
+
+    def __init__(self, dates=None, values=None):
+        self.dates = array("I", dates or [])    # array[uint32] - yyyymmdd of each observation, ascending
+        self.values = array("d", values or [])  # array[float] - observation for the matching date
+
+    def __len__(self):
+        return len(self.dates)
+
+    def ValueAt(self, when):
+        """
+        Get the last known value on or before the given date.
+
+        Args:
+            when: date, datetime or LEAN DateTime to look up
+
+        Returns:
+            float: The as-of value, or None if the series starts after the date
+        """
+        index = bisect.bisect_right(self.dates, _to_ordinal(when)) - 1
+        if index < 0:
+            return None
+        return self.values[index]
+
+    def Between(self, start, end):
+        """Return the values observed between start and end (inclusive) as a list."""
+        low = bisect.bisect_left(self.dates, _to_ordinal(start))
+        high = bisect.bisect_right(self.dates, _to_ordinal(end))
+        return list(self.values[low:high])
+
+
+class MarketSeriesCache:
+    """
+    Daily benchmark closes and risk-free rates, pre-resampled from LEAN's raw data files and
+    stored in a compact binary blob so backtests and local tools don't re-parse the SPY hourly
+    zip and the interest-rate CSV on every run.
+    """
+
+    def __init__(self, benchmark, risk_free):
+        self.benchmark = benchmark  # DailySeries - adjusted daily benchmark closes
+        self.risk_free = risk_free  # DailySeries - annualised risk-free rate (0.05 == 5%)
+
+    def BenchmarkValue(self, time):
+        """Benchmark value for SetBenchmark; holds the first close before the series starts."""
+        value = self.benchmark.ValueAt(time)
+        return value if value is not None else self.benchmark.values[0]
+
+    def RiskFreeRate(self, time):
+        """Risk-free rate for FuncRiskFreeRateInterestRateModel; 0 before the series starts."""
+        value = self.risk_free.ValueAt(time)
+        return value if value is not None else 0.0
+
+    def LastDate(self):
+        """Last date covered by both series as a date, used to warn about a stale cache."""
+        last = min(self.benchmark.dates[-1], self.risk_free.dates[-1])
+        return date(last // 10000, last // 100 % 100, last % 100)
+
+    def ToBytes(self):
+        """Serialise both series into the cache's binary layout."""
+        parts = [_HEADER.pack(_MAGIC, _VERSION, len(self.benchmark), len(self.risk_free))]
+        for series in (self.benchmark, self.risk_free):
+            parts.append(series.dates.tobytes())
+            parts.append(series.values.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def FromBytes(cls, payload):
+        """
+        Deserialise a cache produced by ToBytes.
+
+        Raises:
+            ValueError: If the payload is not a market series cache of a supported version
+        """
+        payload = bytes(payload)
+        magic, version, benchmark_count, risk_free_count = _HEADER.unpack_from(payload, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Unsupported market series cache (magic={magic!r}, version={version})")
+
+        offset = _HEADER.size
+        series = []
+        for count in (benchmark_count, risk_free_count):
+            dates = array("I")
+            dates.frombytes(payload[offset:offset + count * dates.itemsize])
+            offset += count * dates.itemsize
+            values = array("d")
+            values.frombytes(payload[offset:offset + count * values.itemsize])
+            offset += count * values.itemsize
+            series.append(DailySeries(dates, values))
+        return cls(series[0], series[1])
+
+    @classmethod
+    def FromObjectStore(cls, object_store, key=MARKET_SERIES_KEY):
+        """Load the cache from the algorithm's ObjectStore, or return None if it was never uploaded."""
+        if not object_store.ContainsKey(key):
+            return None
+        return cls.FromBytes(object_store.ReadBytes(key))
+
+    @classmethod
+    def FromLeanData(cls, data_folder, ticker="spy"):
+        """
+        Build the cache from a LEAN data folder: the hourly (or daily) benchmark zip, its factor
+        file if present, and the interest-rate CSV.
+
+        Args:
+            data_folder (str): Root of the LEAN data folder (the one containing equity/ and alternative/)
+            ticker (str): Benchmark ticker, SPY by default like LEAN's internal benchmark feed
+
+        Returns:
+            MarketSeriesCache: The resampled daily series
+        """
+        ticker = ticker.lower()
+        for resolution in ("hour", "daily"):
+            path = os.path.join(data_folder, "equity", "usa", resolution, f"{ticker}.zip")
+            if os.path.exists(path):
+                break
+        else:
+            raise FileNotFoundError(f"No hour or daily data for {ticker} under {data_folder}")
+
+        with zipfile.ZipFile(path) as archive:
+            with archive.open(archive.namelist()[0]) as handle:
+                benchmark = ResampleToDailyCloses(io.TextIOWrapper(handle))
+
+        factor_path = os.path.join(data_folder, "equity", "usa", "factor_files", f"{ticker}.csv")
+        if os.path.exists(factor_path):
+            with open(factor_path) as handle:
+                benchmark = ApplyFactorFile(benchmark, handle)
+
+        rate_path = os.path.join(data_folder, "alternative", "interest-rate", "usa", "interest-rate.csv")
+        with open(rate_path) as handle:
+            risk_free = ReadInterestRates(handle)
+
+        return cls(benchmark, risk_free)
+
+
+def ResampleToDailyCloses(lines):
+    """
+    Resample LEAN equity bars ("yyyyMMdd HH:mm,open,high,low,close,volume" in deci-cents) to the
+    last close of each day.
+    """
+    series = DailySeries()
+    for row in csv.reader(lines):
+        if len(row) < 5:
+            continue
+        day = _parse_date(row[0])
+        if day is None:
+            continue
+        close = float(row[4]) / 10000
+        if series.dates and series.dates[-1] == day:
+            series.values[-1] = close
+        else:
+            series.dates.append(day)
+            series.values.append(close)
+    return series
+
+
+def ApplyFactorFile(series, lines):
+    """
+    Adjust raw closes with a LEAN factor file ("yyyyMMdd,price_factor,split_factor[,reference]").
+    Each row's factors apply to its own date and every earlier date back to the previous row, as in
+    LEAN, where a split's row is dated the last trading day before the split.
+    """
+    factor_dates, factors = [], []
+    for row in csv.reader(lines):
+        day = _parse_date(row[0]) if row else None
+        if day is None:
+            continue
+        factor_dates.append(day)
+        factors.append(float(row[1]) * float(row[2]))
+
+    adjusted = DailySeries()
+    for day, close in zip(series.dates, series.values):
+        index = bisect.bisect_left(factor_dates, day)
+        factor = factors[index] if index < len(factors) else 1.0
+        adjusted.dates.append(day)
+        adjusted.values.append(close * factor)
+    return adjusted
+
+
+def ReadInterestRates(lines):
+    """Read LEAN's interest-rate CSV ("date,rate" with the rate as a decimal fraction)."""
+    series = DailySeries()
+    for row in csv.reader(lines):
+        day = _parse_date(row[0]) if row else None
+        if day is None:
+            continue
+        series.dates.append(day)
+        series.values.append(float(row[1]))
+    return series
+
+
+def _daily_returns(values):
+    return [values[i] / values[i - 1] - 1 for i in range(1, len(values)) if values[i - 1] != 0]
+
+
+def _sample_variance(values):
+    if len(values) < 2:
+        return 0.0
+    mean = sum(values) / len(values)
+    return sum((value - mean) ** 2 for value in values) / (len(values) - 1)
+
+
+def _annual_performance(returns):
+    # LEAN's PortfolioStatistics.GetAnnualPerformance: the mean daily return, compounded
+    return (1 + sum(returns) / len(returns)) ** TRADING_DAYS_PER_YEAR - 1
+
+
+def _average_risk_free(cache, start, end):
+    rates = cache.risk_free.Between(start, end)
+    return sum(rates) / len(rates) if rates else cache.RiskFreeRate(end)
+
+
+def SharpeRatio(equity, cache, start, end):
+    """
+    Annualised Sharpe ratio computed the way LEAN's statistics do: the mean daily return compounded
+    over 252 days, (1 + mean) ** 252 - 1, minus the average risk-free rate over the period, over the
+    annualised sample standard deviation.
+
+    Args:
+        equity (list[float]): Daily portfolio values
+        cache (MarketSeriesCache): Source of the risk-free rate
+        start, end: Period covered by the equity curve
+
+    Returns:
+        float: The Sharpe ratio, 0 when the returns have no variance
+    """
+    returns = _daily_returns(equity)
+    deviation = math.sqrt(_sample_variance(returns) * TRADING_DAYS_PER_YEAR)
+    if not returns or deviation == 0:
+        return 0.0
+    return (_annual_performance(returns) - _average_risk_free(cache, start, end)) / deviation
+
+
+def SortinoRatio(equity, cache, start, end):
+    """
+    Annualised Sortino ratio matching LEAN: like SharpeRatio, but divided by the annualised sample
+    deviation of the negative daily returns only.
+    """
+    returns = _daily_returns(equity)
+    downside = math.sqrt(_sample_variance([value for value in returns if value < 0]) * TRADING_DAYS_PER_YEAR)
+    if not returns or downside == 0:
+        return 0.0
+    return (_annual_performance(returns) - _average_risk_free(cache, start, end)) / downside
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the cached daily benchmark/risk-free series from a LEAN data folder")
+    parser.add_argument("data_folder", help="LEAN data folder containing equity/ and alternative/")
+    parser.add_argument("--ticker", default="spy", help="Benchmark ticker (default: spy)")
+    parser.add_argument("--output", default=os.path.join("storage", MARKET_SERIES_KEY),
+                        help="Where to write the cache; upload it to the ObjectStore under " + MARKET_SERIES_KEY)
+    arguments = parser.parse_args()
+
+    cache = MarketSeriesCache.FromLeanData(arguments.data_folder, arguments.ticker)
+    os.makedirs(os.path.dirname(arguments.output) or ".", exist_ok=True)
+    with open(arguments.output, "wb") as handle:
+        handle.write(cache.ToBytes())
+    print(f"Wrote {len(cache.benchmark)} benchmark closes and {len(cache.risk_free)} risk-free rates "
+          f"through {cache.LastDate()} to {arguments.output}")
@@ -0,0 +1,182 @@
+# region imports
+from array import array
+from collections import deque
+import sys
+import types
+# endregion
+
+# Types whose objects are counted but never walked into: leaves, plus code, classes and modules,
+# which are shared by everything
+_LEAF_TYPES = {float, int, str, bytes, bool, type(None), array}
+_SEQUENCE_TYPES = {list, tuple, set, frozenset, deque}
+_OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+                 types.CodeType)
+_slots = {}  # Dictionary[type, Tuple[str]] - __slots__ names across each type's MRO, cached
+
+
+def _Slots(kind):
+    names = _slots.get(kind)
+    if names is None:
+        names = _slots[kind] = tuple(slot for cls in kind.__mro__ for slot in getattr(cls, "__slots__", ())
+                                     if slot not in ("__dict__", "__weakref__"))
+    return names
+
+
+def DeepSize(obj, seen, exclude=()):
+    """
+    Approximate bytes retained by an object graph: sys.getsizeof of every reachable object, following
+    containers, instance __dict__ and __slots__. Objects already in `seen` are not counted again, so
+    shared objects are charged to whichever component reaches them first.
+
+    Under LEAN, indicators are C# objects behind Python proxies and only the proxy is visible here;
+    run on the stand-in (whose indicators keep the same rolling windows) to size containers.
+
+    Args:
+        obj: Root object
+        seen (set): ids already counted; updated in place
+        exclude (set): ids never counted or followed (e.g. the algorithm a chart holds a reference to)
+
+    Returns:
+        int: Bytes
+    """
+    getsizeof = sys.getsizeof
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        identity = id(current)
+        if identity in seen or identity in exclude:
+            continue
+        seen.add(identity)
+        total += getsizeof(current)
+        kind = type(current)
+        if kind in _LEAF_TYPES:
+            continue
+        if kind is dict:
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif kind in _SEQUENCE_TYPES:
+            stack.extend(current)
+        elif not isinstance(current, _OPAQUE_TYPES):
+            attributes = getattr(current, "__dict__", None)
+            if attributes is not None:
+                stack.append(attributes)
+            for slot in _Slots(kind):
+                value = getattr(current, slot, None)
+                if value is not None:
+                    stack.append(value)
+    return total
+
+
+class MemoryAccountant:
+    """
+    Periodically sizes each component of strategy state and reports totals, bytes per symbol and
+    growth trends in the daily report.
+
+    Per-symbol components are walked for at most SAMPLE_SYMBOLS symbols (an even stride through the
+    universe) and scaled to the full universe, so a sample stays cheap for thousands of names.
+    """
+
+    SAMPLE_SYMBOLS = 50
+    HISTORY = 30          # Samples kept for trends
+    LEAK_SAMPLES = 5      # A component that grows in this many consecutive samples is flagged
+
+    def __init__(self, algorithm, sample_every_days=30, warning_bytes=1024 ** 3):
+        """
+        Args:
+            algorithm: The strategy; its symbols list sets the universe size
+            sample_every_days (int): Sample on every Nth daily report
+            warning_bytes (int): Log a warning when the accounted total exceeds this
+        """
+        self.algorithm = algorithm
+        self.sample_every_days = max(1, sample_every_days)
+        self.warning_bytes = warning_bytes
+        self.components = {}                     # Dictionary[str, (callable, bool)] - getter and whether it is per symbol
+        self.history = deque(maxlen=self.HISTORY)  # Deque[(int, Dictionary[str, int])] - (day ordinal, bytes per component)
+        self.reports = 0
+
+    def AddComponent(self, name, getter, per_symbol=False):
+        """
+        Args:
+            name (str): Component name used in the report
+            getter (callable): getter() returns the object(s) to size; per-symbol getters are called as
+                getter(symbol) for each sampled symbol
+            per_symbol (bool): Whether the component scales with the universe
+        """
+        self.components[name] = (getter, per_symbol)
+
+    def Sample(self):
+        """
+        Size every component now.
+
+        Returns:
+            dict: component name -> bytes (per-symbol components scaled to the whole universe)
+        """
+        symbols = self.algorithm.symbols
+        stride = max(1, len(symbols) // self.SAMPLE_SYMBOLS)
+        sampled = symbols[::stride][:self.SAMPLE_SYMBOLS]
+        seen, exclude = set(), {id(self.algorithm)}
+
+        sizes = {}
+        for name, (getter, per_symbol) in self.components.items():
+            if per_symbol:
+                measured = sum(DeepSize(getter(symbol), seen, exclude) for symbol in sampled)
+                sizes[name] = int(measured * len(symbols) / len(sampled)) if sampled else 0
+            else:
+                sizes[name] = DeepSize(getter(), seen, exclude)
+        self.history.append((self.algorithm.Time.toordinal(), sizes))
+        return sizes
+
+    def Trend(self, name=None):
+        """
+        Least-squares growth over the kept samples.
+
+        Args:
+            name (str): A component, or None for the total
+
+        Returns:
+            float: Bytes per day, 0 with fewer than two samples
+        """
+        if len(self.history) < 2:
+            return 0.0
+        days = [day for day, _ in self.history]
+        values = [sizes[name] if name else sum(sizes.values()) for _, sizes in self.history]
+        mean_day, mean_value = sum(days) / len(days), sum(values) / len(values)
+        variance = sum((day - mean_day) ** 2 for day in days)
+        if variance == 0:
+            return 0.0
+        return sum((day - mean_day) * (value - mean_value) for day, value in zip(days, values)) / variance
+
+    def GrowingComponents(self):
+        """
+        Returns:
+            list[str]: Components that grew in each of the last LEAK_SAMPLES samples
+        """
+        if len(self.history) < self.LEAK_SAMPLES:
+            return []
+        recent = [sizes for _, sizes in list(self.history)[-self.LEAK_SAMPLES:]]
+        return [name for name in self.components
+                if all(later.get(name, 0) > earlier.get(name, 0) for earlier, later in zip(recent, recent[1:]))]
+
+    def LogDaily(self):
+        """Sample on every sample_every_days-th call and log the memory section of the daily report."""
+        self.reports += 1
+        if (self.reports - 1) % self.sample_every_days:
+            return
+
+        sizes = self.Sample()
+        total = sum(sizes.values())
+        symbol_count = max(1, len(self.algorithm.symbols))
+        per_symbol = sum(sizes[name] for name, (_, is_per_symbol) in self.components.items() if is_per_symbol)
+
+        log = self.algorithm.Log
+        log(f"Memory (strategy state): {total / 1024:,.1f} KB total, {total / symbol_count:,.0f} B/symbol "
+            f"({per_symbol / symbol_count:,.0f} B/symbol per-symbol state) across {len(self.algorithm.symbols)} symbols, "
+            f"trend {self.Trend():+,.0f} B/day")
+        for name, size in sizes.items():
+            log(f"  {name}: {size / 1024:,.1f} KB, trend {self.Trend(name):+,.0f} B/day")
+
+        if total > self.warning_bytes:
+            log(f"WARNING: Strategy state uses {total / 1024 ** 2:,.1f} MB, above the {self.warning_bytes / 1024 ** 2:,.0f} MB threshold")
+        for name in self.GrowingComponents():
+            log(f"WARNING: {name} grew in each of the last {self.LEAK_SAMPLES} memory samples; possible leak")
@@ -0,0 +1,163 @@
+# region imports
+from AlgorithmImports import *
+from collections import defaultdict
+import numpy as np
+# endregion
+
+ORPHAN = "orphan"                        # Held, but not in the book (or held in the other direction)
+STALE = "stale"                          # In the book, but nothing is held or on order
+MISSING_STOP = "missing stop"            # In the book without a stop
+QUANTITY_MISMATCH = "quantity mismatch"  # Held in the book's direction, but not the book's quantity
+
+
+class Reconciler:
+    """
+    Compares brokerage holdings with the strategy's position book (pyramid_level, stop_losses,
+    position_quantity) in one batch and repairs what it can:
+
+        orphan             - book rebuilt as a one-unit position at the average price, stop 2N away at current N
+        stale              - book entries removed
+        missing stop       - stop rebuilt 2N from the current price at current N
+        quantity mismatch  - book quantity set to the holding
+
+    Orders still open count towards the holding, so a daily order that fills at the next open is
+    not flagged. The symbols checked are those held or in the book; the held set is seeded with one
+    scan of the portfolio at startup and kept current from fills afterwards, so the daily run costs
+    in proportion to positions held rather than to the universe.
+    """
+
+    def __init__(self, algorithm):
+        """
+        Args:
+            algorithm: The strategy whose book is reconciled
+        """
+        self.algorithm = algorithm
+        self.held = set()  # Set[Symbol] - symbols with a non-zero holding
+
+    def Seed(self):
+        """Scan the whole portfolio once for holdings (at startup, once the brokerage has loaded them)."""
+        self.held = {symbol for symbol, holding in self.algorithm.Portfolio.items() if holding.Invested}
+
+    def RecordFill(self, symbol):
+        """Keep the held set current after a fill."""
+        if self.algorithm.Portfolio[symbol].Invested:
+            self.held.add(symbol)
+        else:
+            self.held.discard(symbol)
+
+    def Matches(self, open_orders):
+        """
+        Quick check for the usual case, every holding in the book with a stop and the book's quantity,
+        so the batch classification only runs when something is off.
+        """
+        algorithm = self.algorithm
+        if open_orders or not (self.held == algorithm.pyramid_level.keys() == algorithm.stop_losses.keys()):
+            return False
+        portfolio, book = algorithm.Portfolio, algorithm.position_quantity
+        return all(book.get(symbol) == portfolio[symbol].Quantity for symbol in self.held)
+
+    def Classify(self, open_orders=()):
+        """
+        Returns:
+            tuple: (symbols checked, holdings including open orders as an ndarray, dict of issue -> boolean mask)
+        """
+        algorithm = self.algorithm
+        symbols = list(self.held.union(algorithm.pyramid_level, algorithm.stop_losses))
+        open_quantity = defaultdict(float)
+        for order in open_orders:
+            open_quantity[order.Symbol] += order.Quantity
+
+        holding = np.array([algorithm.Portfolio[symbol].Quantity + open_quantity[symbol] for symbol in symbols], dtype=float)
+        book = np.array([algorithm.position_quantity.get(symbol, np.nan) for symbol in symbols], dtype=float)
+        in_book = np.array([symbol in algorithm.pyramid_level for symbol in symbols], dtype=bool)
+        has_stop = np.array([symbol in algorithm.stop_losses for symbol in symbols], dtype=bool)
+
+        held = holding != 0
+        known = ~np.isnan(book)
+        reversed_side = known & (np.sign(holding) != np.sign(book))
+        orphan = held & (~in_book | reversed_side)
+        stale = in_book & ~held
+        tracked = in_book & held & ~orphan
+        issues = {
+            ORPHAN: orphan,
+            STALE: stale,
+            MISSING_STOP: tracked & ~has_stop,
+            QUANTITY_MISMATCH: tracked & known & (holding != book),
+        }
+        return symbols, holding, issues
+
+    def _Stop(self, symbol, quantity):
+        """Stop 2N from the current price at current N, or None if N isn't available."""
+        algorithm = self.algorithm
+        atr = algorithm.atrs.get(symbol)
+        price = algorithm.Securities[symbol].Price if symbol in algorithm.Securities else 0
+        if atr is None or not atr.IsReady or price <= 0:
+            return None
+        distance = atr.Current.Value * algorithm.ATR_MULTIPLIER
+        return price - distance if quantity > 0 else price + distance
+
+    def Run(self, label="daily"):
+        """
+        Reconcile, repair and log.
+
+        Args:
+            label (str): Shown in the log, e.g. "startup" or "daily"
+
+        Returns:
+            dict: issue -> list of symbols found with it
+        """
+        algorithm = self.algorithm
+        open_orders = algorithm.Transactions.GetOpenOrders()
+        if self.Matches(open_orders):
+            algorithm.Log(f"Reconciliation ({label}): {len(self.held)} positions match the book")
+            return {issue: [] for issue in (ORPHAN, STALE, MISSING_STOP, QUANTITY_MISMATCH)}
+
+        symbols, holding, issues = self.Classify(open_orders)
+        found = {issue: [symbols[index] for index in np.flatnonzero(mask)] for issue, mask in issues.items()}
+        quantities = dict(zip(symbols, holding.tolist()))
+        book = {symbol: algorithm.position_quantity.get(symbol, "none") for symbols_found in found.values() for symbol in symbols_found}
+        unrepaired = []
+
+        for symbol in found[STALE]:
+            algorithm.CleanupPosition(symbol)
+        for symbol in found[ORPHAN]:
+            quantity = quantities[symbol]
+            stop = self._Stop(symbol, quantity)
+            if stop is None:
+                unrepaired.append(symbol)
+                continue
+            average_price = algorithm.Portfolio[symbol].AveragePrice or algorithm.Securities[symbol].Price
+            algorithm.CleanupPosition(symbol)
+            algorithm.entry_prices[symbol] = [average_price]
+            algorithm.pyramid_level[symbol] = 1
+            algorithm.last_add_price[symbol] = average_price
+            algorithm.stop_losses[symbol] = stop
+            algorithm.position_quantity[symbol] = quantity
+            if algorithm.risk_limits:
+                algorithm.risk_limits.Record(algorithm.system.name, symbol, 1 if quantity > 0 else -1)
+        for symbol in found[MISSING_STOP]:
+            stop = self._Stop(symbol, quantities[symbol])
+            if stop is None:
+                unrepaired.append(symbol)
+                continue
+            algorithm.stop_losses[symbol] = stop
+        for symbol in found[QUANTITY_MISMATCH]:
+            algorithm.position_quantity[symbol] = quantities[symbol]
+
+        if algorithm.state_store:
+            for symbols_found in found.values():
+                for symbol in symbols_found:
+                    algorithm.state_store.MarkDirty(symbol)
+
+        issue_count = sum(len(symbols_found) for symbols_found in found.values())
+        if not issue_count:
+            algorithm.Log(f"Reconciliation ({label}): {len(symbols)} positions match the book")
+            return found
+        algorithm.Log(f"Reconciliation ({label}): {len(symbols)} positions, "
+                      + ", ".join(f"{len(symbols_found)} {issue}" for issue, symbols_found in found.items() if symbols_found))
+        for issue, symbols_found in found.items():
+            for symbol in symbols_found:
+                action = "NOT repaired, N unavailable" if symbol in unrepaired else "repaired"
+                algorithm.Log(f"  {issue}: {symbol} holding {quantities[symbol]}, book {book[symbol]} "
+                              f"({action})")
+        return found
@@ -0,0 +1,342 @@
+# region imports
+from collections import deque
+import html
+from itertools import islice
+import json
+import os
+import threading
+import time
+import urllib.request
+# endregion
+
+
+class DailyReport:
+    """
+    The daily portfolio report as data, captured on the algorithm thread so rendering and delivery
+    can happen anywhere. Values are copied, never referenced, so later trading doesn't change it.
+    """
+
+    def __init__(self, time, total_value, cash, equity_value, holdings, trades, effective_value, peak_value, drawdown_levels, systems=None, clusters=None):
+        self.time = time                          # datetime - algorithm time of the report
+        self.total_value = total_value            # float - TotalPortfolioValue
+        self.cash = cash                          # float - cash on hand
+        self.equity_value = equity_value          # float - absolute value of the holdings
+        self.holdings = holdings                  # List[dict] - one per holding (per system holding it, with several), stop None when it has none
+        self.trades = trades                      # List[str] - the day's trade messages
+        self.effective_value = effective_value    # float - value used for position sizing
+        self.peak_value = peak_value              # float - peak portfolio value
+        self.drawdown_levels = drawdown_levels    # List[(float, float)] - first drawdown map levels, actual -> effective
+        self.systems = systems or []              # List[dict] - with several trading systems, each one's throttle; the fields above are the first's
+        self.clusters = clusters                  # dict - with correlation groups, "close" and "loose" clusters of two or more tickers; None without
+
+    @classmethod
+    def Capture(cls, algorithm):
+        """
+        Capture the report from the strategy's portfolio and book. Reads the effective value through
+        GetAvailablePortfolioValue, so the peak and drawdown map are updated as the logged report always did.
+        With several trading systems, holdings and trades are reported per system, from each one's book.
+        The correlation clusters are those of the day's regrouping, which runs before the report.
+        """
+        portfolio = algorithm.Portfolio
+        total_value = portfolio.TotalPortfolioValue
+        cash = portfolio.Cash
+        equity_value = sum(holding.AbsoluteHoldingsValue for holding in portfolio.Values if holding.Invested)
+        if len(algorithm.systems) > 1:
+            return cls._CaptureSystems(algorithm, total_value, cash, equity_value)
+
+        holdings = []
+        for symbol, holding in portfolio.items():
+            if not holding.Invested:
+                continue
+            if symbol not in algorithm.stop_losses:
+                holdings.append({"symbol": str(symbol), "stop": None})
+                continue
+            holdings.append(_Holding(algorithm, symbol, holding))
+
+        effective_value = algorithm.GetAvailablePortfolioValue()
+        return cls(algorithm.Time, total_value, cash, equity_value, holdings, list(algorithm.daily_trades), effective_value,
+                   algorithm.peak_portfolio_value, list(islice(algorithm.drawdown_map.items(), 5)), clusters=_Clusters(algorithm))
+
+    @classmethod
+    def _CaptureSystems(cls, algorithm, total_value, cash, equity_value):
+        holdings, trades, systems = [], [], []
+        in_books = set()
+        for system in algorithm.systems:
+            algorithm.system = system
+            for symbol in system.position_quantity:
+                in_books.add(symbol)
+                if symbol in system.stop_losses:
+                    holdings.append(dict(_Holding(algorithm, symbol, algorithm.GetPosition(symbol)), system=system.name))
+            trades += [f"System {system.name}: {trade}" for trade in system.daily_trades]
+            systems.append({"name": system.name, "units": sum(system.pyramid_level.values()),
+                            "equity": system.Equity(algorithm.original_portfolio_value, algorithm.Securities),
+                            "effective_value": algorithm.GetAvailablePortfolioValue(), "peak_value": system.peak_portfolio_value})
+        for symbol, holding in algorithm.Portfolio.items():
+            if holding.Invested and symbol not in in_books:
+                holdings.append({"symbol": str(symbol), "stop": None})
+
+        first = algorithm.system = algorithm.systems[0]
+        return cls(algorithm.Time, total_value, cash, equity_value, holdings, trades, systems[0]["effective_value"],
+                   first.peak_portfolio_value, list(islice(first.drawdown_map.items(), 5)), systems, _Clusters(algorithm))
+
+    def ToDict(self):
+        return {"time": str(self.time), "total_value": self.total_value, "cash": self.cash, "equity_value": self.equity_value,
+                "holdings": self.holdings, "trades": self.trades, "effective_value": self.effective_value,
+                "peak_value": self.peak_value, "drawdown_levels": self.drawdown_levels, "systems": self.systems,
+                "clusters": self.clusters}
+
+
+def _Holding(algorithm, symbol, holding):
+    """A holding's report fields; `holding` is the SecurityHolding, or a system's SystemPosition (with several systems)."""
+    current_price = algorithm.Securities[symbol].Price
+    market_value = holding.AbsoluteHoldingsValue if len(algorithm.systems) == 1 else abs(holding.Quantity) * current_price
+    unrealized = (current_price - holding.AveragePrice) * holding.Quantity
+    exit_channel = algorithm.exit_channels[symbol]
+    return {
+        "symbol": str(symbol),
+        "side": "Long" if holding.IsLong else "Short",
+        "quantity": holding.Quantity,
+        "entry_price": holding.AveragePrice,
+        "current_price": current_price,
+        "market_value": market_value,
+        "stop": algorithm.stop_losses[symbol],
+        "unrealized": unrealized,
+        "unrealized_percent": unrealized / market_value if market_value != 0 else 0,
+        "exit_price": (exit_channel.Lower if holding.IsLong else exit_channel.Upper).Current.Value,
+    }
+
+
+def _Clusters(algorithm):
+    return algorithm.correlation.Clusters() if algorithm.correlation else None
+
+
+def RenderText(report):
+    """
+    Returns:
+        list[str]: The report as the lines LogPortfolioState has always logged
+    """
+    lines = [f"===== Portfolio State as of {report.time} =====",
+             f"Total Portfolio Value: ${report.total_value}",
+             f"Cash on Hand: ${report.cash}",
+             f"Total Equity Value: ${report.equity_value}"]
+    for holding in report.holdings:
+        if holding["stop"] is None:
+            lines.append(f"WARNING: Position exists for {holding['symbol']} but no stop loss is set!")
+            continue
+        system = f" (System {holding['system']})" if "system" in holding else ""
+        lines += [f"Holding: {holding['symbol']}{system}",
+                  f"  Position: {holding['side']}",
+                  f"  Quantity: {holding['quantity']}",
+                  f"  Entry Price: ${holding['entry_price']}",
+                  f"  Current Price: ${holding['current_price']}",
+                  f"  Market Value: ${holding['market_value']}",
+                  f"  Stop Loss: ${holding['stop']}",
+                  f"  Unrealized P/L: ${holding['unrealized']:.2f} ({holding['unrealized_percent']:.2%})",
+                  f"  Exit Price: ${holding['exit_price']}"]
+
+    lines.append("Today's Trades:")
+    lines += [f"  {trade}" for trade in report.trades] or ["  No trades today"]
+    lines += ["=====================================",
+              f"Current Portfolio Value: ${report.total_value}",
+              f"Effective Portfolio Value: ${report.effective_value}",
+              f"Peak Portfolio Value: ${report.peak_value}",
+              "Current Drawdown Map (first 5 levels):"]
+    lines += [f"  At ${actual:.2f} -> Use ${effective:.2f}" for actual, effective in report.drawdown_levels]
+    lines += [f"System {system['name']}: Units On: {system['units']}, Equity: ${system['equity']:.2f}, "
+              f"Effective Value: ${system['effective_value']:.2f}, Peak: ${system['peak_value']:.2f}" for system in report.systems]
+    if report.clusters is not None:
+        for kind in ("close", "loose"):
+            lines.append(f"Correlation Clusters ({kind}): " + ("; ".join(", ".join(cluster) for cluster in report.clusters[kind]) or "none"))
+    return lines
+
+
+def RenderHtml(report):
+    """
+    Returns:
+        str: The report as a standalone HTML page
+    """
+    escape = html.escape
+    rows = []
+    for holding in report.holdings:
+        if holding["stop"] is None:
+            rows.append(f"<tr class=\"warning\"><td>{escape(holding['symbol'])}</td><td colspan=\"8\">No stop loss is set</td></tr>")
+            continue
+        system = f" (System {holding['system']})" if "system" in holding else ""
+        rows.append("<tr>" + "".join(f"<td>{escape(str(value))}</td>" for value in (
+            holding["symbol"] + system, holding["side"], holding["quantity"], f"{holding['entry_price']:.2f}",
+            f"{holding['current_price']:.2f}", f"{holding['market_value']:.2f}", f"{holding['stop']:.2f}",
+            f"{holding['unrealized']:.2f} ({holding['unrealized_percent']:.2%})", f"{holding['exit_price']:.2f}")) + "</tr>")
+    trades = "".join(f"<li>{escape(trade)}</li>" for trade in report.trades) or "<li>No trades today</li>"
+    return (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Portfolio State {escape(str(report.time))}</title></head><body>\n"
+            f"<h1>Portfolio State as of {escape(str(report.time))}</h1>\n"
+            f"<p>Total Portfolio Value: ${report.total_value:,.2f}<br>Cash on Hand: ${report.cash:,.2f}<br>"
+            f"Total Equity Value: ${report.equity_value:,.2f}<br>Effective Portfolio Value: ${report.effective_value:,.2f}<br>"
+            f"Peak Portfolio Value: ${report.peak_value:,.2f}</p>\n"
+            + "".join(f"<p>System {escape(system['name'])}: {system['units']} units on, equity ${system['equity']:,.2f}, "
+                      f"effective ${system['effective_value']:,.2f}, peak ${system['peak_value']:,.2f}</p>\n" for system in report.systems)
+            + "".join(f"<p>Correlation clusters ({kind}): {escape('; '.join(', '.join(cluster) for cluster in report.clusters[kind]) or 'none')}</p>\n"
+                      for kind in ("close", "loose") if report.clusters is not None) +
+            "<table><tr><th>Symbol</th><th>Position</th><th>Quantity</th><th>Entry</th><th>Price</th><th>Market Value</th>"
+            "<th>Stop</th><th>Unrealized P/L</th><th>Exit</th></tr>\n" + "\n".join(rows) + "</table>\n"
+            f"<h2>Today's Trades</h2><ul>{trades}</ul>\n</body></html>\n")
+
+
+class LogSink:
+    """Logs the text report through the algorithm's Log, which LEAN queues, so it is safe off-thread."""
+
+    name = "log"
+    inline = True  # No I/O of its own, so backtests deliver it on the algorithm thread
+
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+
+    def Deliver(self, report):
+        for line in RenderText(report):
+            self.algorithm.Log(line)
+
+
+class FileSink:
+    """Writes each report to `directory` as report-YYYY-MM-DD.html (or .txt for text)."""
+
+    name = "file"
+
+    def __init__(self, directory, format="html"):
+        self.directory = directory
+        self.format = format
+
+    def Deliver(self, report):
+        os.makedirs(self.directory, exist_ok=True)
+        if self.format == "html":
+            content, extension = RenderHtml(report), "html"
+        else:
+            content, extension = "\n".join(RenderText(report)) + "\n", "txt"
+        path = os.path.join(self.directory, f"report-{report.time:%Y-%m-%d}.{extension}")
+        with open(path + ".tmp", "w", encoding="utf-8") as handle:
+            handle.write(content)
+        os.replace(path + ".tmp", path)
+
+
+class WebhookSink:
+    """POSTs the report as JSON (the data, plus its text rendering) to `url`."""
+
+    name = "webhook"
+
+    def __init__(self, url, timeout=10.0):
+        self.url = url
+        self.timeout = timeout
+
+    def Deliver(self, report):
+        payload = dict(report.ToDict(), text="\n".join(RenderText(report)))
+        request = urllib.request.Request(self.url, data=json.dumps(payload, default=str).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class ReportPipeline:
+    """
+    Hands daily reports to a background worker that renders and delivers them to each sink, so
+    rendering, file writes and webhook calls never run on the algorithm thread.
+
+    Live, Submit never blocks: the queue holds at most `queue_size` reports, and a report arriving to a
+    full queue drops the oldest one (a newer report supersedes it). A failing sink is retried up to
+    `attempts` times with exponential backoff on the worker thread; a sink that stays down only makes
+    the worker fall behind and drop reports, it never stalls OnData. The worker thread starts with
+    the first report; Close drains the queue at the end of the run.
+
+    A backtest has no market to keep up with and produces reports far faster than one a day, which
+    would only make the worker drop them and the two threads trade the GIL. With `inline`, sinks that
+    do no I/O of their own (an `inline` attribute, the log) are delivered on the algorithm thread as
+    each report is submitted; the others (files, webhooks) stay on the worker, whose queue is then
+    unbounded so every report still reaches every sink, in order, and Submit never waits on them.
+    """
+
+    def __init__(self, algorithm, sinks, queue_size=8, attempts=3, backoff=0.5, inline=False):
+        """
+        Args:
+            algorithm: The strategy, for logging delivery failures
+            sinks (list): Objects with a name and Deliver(report)
+            queue_size (int): Reports waiting for delivery before the oldest is dropped (unbounded when inline)
+            attempts (int): Deliveries tried per sink and report
+            backoff (float): Seconds before the first retry, doubling for each further one
+            inline (bool): Deliver the inline sinks on the calling thread and keep every report for the others (backtests)
+        """
+        self.algorithm = algorithm
+        self.inline_sinks = [sink for sink in sinks if inline and getattr(sink, "inline", False)]
+        self.sinks = [sink for sink in sinks if sink not in self.inline_sinks]  # Delivered by the worker
+        self.attempts = attempts
+        self.backoff = backoff
+        self.inline = inline
+        self.queue = deque(maxlen=None if inline else queue_size)  # Deque[(DailyReport, bool)] - waiting for the worker, with whether the inline sinks took it; appending to a full deque drops the oldest
+        self.ready = threading.Condition()
+        self.worker = None
+        self.closing = False
+        self.submitted = 0  # int - reports handed to Submit
+        self.delivered = 0  # int - reports delivered to every sink
+        self.dropped = 0    # int - reports superseded before the worker reached them
+        self.failed = 0     # int - sink deliveries that failed every attempt
+
+    def Submit(self, report):
+        """Deliver a report to the inline sinks, queue it for the others and return without waiting on them."""
+        delivered_inline = all([self._Deliver(sink, report) for sink in self.inline_sinks])
+        if not self.sinks:
+            self.submitted += 1
+            self.delivered += delivered_inline
+            return
+        with self.ready:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append((report, delivered_inline))
+            self.submitted += 1
+            self.ready.notify()
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._Run, name="report-delivery", daemon=True)
+            self.worker.start()
+
+    def _Run(self):
+        while True:
+            with self.ready:
+                while not self.queue and not self.closing:
+                    self.ready.wait()
+                if not self.queue:
+                    return
+                report, delivered_inline = self.queue.popleft()
+            if all([self._Deliver(sink, report) for sink in self.sinks]) and delivered_inline:
+                self.delivered += 1
+
+    def _Deliver(self, sink, report):
+        for attempt in range(self.attempts):
+            try:
+                sink.Deliver(report)
+                return True
+            except Exception as error:
+                if attempt + 1 == self.attempts:
+                    self.failed += 1
+                    self.algorithm.Log(f"WARNING: Daily report for {report.time} not delivered to {sink.name} "
+                                       f"after {self.attempts} attempts: {error}")
+                    return False
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def Close(self, timeout=30.0):
+        """
+        Deliver what is queued and stop the worker, waiting at most `timeout` seconds. A worker still
+        running after that is logged with the reports it has not got to, and left to the process exit.
+
+        Returns:
+            bool: True if everything queued was delivered (or dropped) in time
+        """
+        with self.ready:
+            self.closing = True
+            self.ready.notify()
+        if self.worker is not None:
+            self.worker.join(timeout)
+            if self.worker.is_alive():
+                with self.ready:
+                    queued = len(self.queue)
+                self.algorithm.Log(f"WARNING: Report delivery still running after {timeout:g}s: {queued} reports queued, "
+                                   f"{self.submitted - self.delivered - self.dropped} of {self.submitted} not delivered")
+                return False
+        if self.dropped or self.failed:
+            self.algorithm.Log(f"Report delivery: {self.delivered} of {self.submitted} delivered, {self.dropped} dropped, "
+                               f"{self.failed} sink failures")
+        return True
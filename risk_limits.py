@@ -0,0 +1,140 @@
+# region imports
+# endregion
+
+# The original Turtle limits on units in one direction: per market, closely correlated group,
+# loosely correlated group, and across the portfolio
+UNIT_LIMITS = (4, 6, 10, 12)
+LIMIT_NAMES = ("market", "close group", "loose group", "direction")
+
+
+def ParseGroups(text):
+    """
+    Parse a group parameter: groups separated by semicolons, tickers within a group by commas,
+    e.g. "AAPL,MSFT;XOM,CVX". Each group is named after its first ticker.
+
+    Returns:
+        dict: ticker -> group name
+    """
+    groups = {}
+    for group in (text or "").replace(" ", "").split(";"):
+        tickers = [ticker for ticker in group.split(",") if ticker]
+        for ticker in tickers:
+            groups[ticker] = tickers[0]
+    return groups
+
+
+class UnitLimits:
+    """
+    Portfolio gate on units on: before a unit is entered or added, the units already on in its
+    direction are checked against the limits per market, per closely and loosely correlated group
+    and across the portfolio. The counts are kept incrementally, one counter per market, group and
+    direction, so a check is four dictionary lookups however many symbols are traded; each change to
+    a position book (entry, add, exit, repair) records the position's new units, moving the counters
+    by the difference.
+
+    A symbol not in a close or loose group forms a group of its own.
+    """
+
+    def __init__(self, limits=UNIT_LIMITS, close_groups=None, loose_groups=None):
+        """
+        Args:
+            limits (tuple[int]): Units allowed in one direction per market, close group, loose group and portfolio
+            close_groups (dict): ticker -> closely correlated group name, see ParseGroups
+            loose_groups (dict): ticker -> loosely correlated group name
+        """
+        if len(limits) != len(LIMIT_NAMES):
+            raise ValueError(f"Unit limits need {len(LIMIT_NAMES)} values ({', '.join(LIMIT_NAMES)}), got {limits}")
+        self.limits = tuple(limits)
+        self.close_groups = dict(close_groups or {})
+        self.loose_groups = dict(loose_groups or {})
+        self.keys = {}    # Dictionary[Symbol, Dictionary[int, Tuple]] - counter keys of each symbol, per direction (1 or -1)
+        self.units = {}   # Dictionary[Symbol, Dictionary[str, int]] - signed units on per symbol and trading system
+        self.counts = {}  # Dictionary[Tuple, int] - units on per counter key
+
+    def Add(self, symbol):
+        """Register a symbol in its configured groups (its own when it has none)."""
+        ticker = str(symbol)
+        self.SetGroups(symbol, self.close_groups.get(ticker, ticker), self.loose_groups.get(ticker, ticker))
+
+    def SetGroups(self, symbol, close_group, loose_group):
+        """Move a symbol, and the units it has on, to the given close and loose groups."""
+        held = self.units.get(symbol, {}).values()
+        for units in held:
+            self._Count(symbol, units, -1)
+        self.keys[symbol] = {direction: (("market", symbol, direction), ("close", close_group, direction),
+                                         ("loose", loose_group, direction), ("direction", direction))
+                             for direction in (1, -1)}
+        for units in held:
+            self._Count(symbol, units, 1)
+
+    def Groups(self, symbol):
+        """
+        Returns:
+            tuple: The symbol's close and loose group names
+        """
+        keys = self.keys[symbol][1]
+        return keys[1][1], keys[2][1]
+
+    def Check(self, symbol, direction, units=1):
+        """
+        Args:
+            symbol (Symbol): Symbol to enter or add to
+            direction (int): 1 for long, -1 for short
+            units (int): Units to be added
+
+        Returns:
+            str: Name of the first limit the units would exceed, or None when they are allowed
+        """
+        counts = self.counts
+        for key, limit, name in zip(self.keys[symbol][direction], self.limits, LIMIT_NAMES):
+            if counts.get(key, 0) + units > limit:
+                return name
+        return None
+
+    def Record(self, system, symbol, units):
+        """
+        Record a trading system's units on in a symbol after its book changed.
+
+        Args:
+            system (str): Name of the trading system whose book changed
+            symbol (Symbol): Symbol of the position
+            units (int): Units now on, negative when short, 0 once the position is closed
+        """
+        held = self.units.setdefault(symbol, {})
+        previous = held.get(system, 0)
+        if previous == units:
+            return
+        if previous:
+            self._Count(symbol, previous, -1)
+        if units:
+            held[system] = units
+            self._Count(symbol, units, 1)
+        else:
+            del held[system]
+
+    def Rebuild(self, systems):
+        """
+        Recount from the trading systems' books, after they were restored or replayed wholesale.
+
+        Args:
+            systems (list[TradingSystem]): Every trading system; the direction of each position is its quantity's sign
+        """
+        self.units = {}
+        self.counts = {}
+        for system in systems:
+            for symbol, level in system.pyramid_level.items():
+                if symbol in self.keys:
+                    self.Record(system.name, symbol, -level if system.position_quantity.get(symbol, 0) < 0 else level)
+
+    def Units(self, direction):
+        """
+        Returns:
+            int: Units on across the portfolio in a direction (1 long, -1 short)
+        """
+        return self.counts.get(("direction", direction), 0)
+
+    def _Count(self, symbol, units, sign):
+        counts = self.counts
+        change = abs(units) * sign
+        for key in self.keys[symbol][1 if units > 0 else -1]:
+            counts[key] = counts.get(key, 0) + change
@@ -0,0 +1,119 @@
+# region imports
+from collections import Counter
+import os
+import sys
+import threading
+# endregion
+
+PROFILE_KEY = "turtle/profile.folded"
+
+
+class SamplingProfiler:
+    """
+    Low-overhead statistical profiler for the algorithm thread. A daemon thread wakes every
+    `interval` seconds, reads the algorithm thread's current Python frame with sys._current_frames
+    and counts the stack, trimmed to start at the outermost method of the algorithm's class (e.g.
+    main.py:OnData or the scheduled main.py:OnEndOfDay). Samples taken while the algorithm
+    thread is outside the algorithm's methods, inside the engine, are only counted as idle.
+
+    LEAN runs Initialize on a setup thread of its own, not the algorithm thread that runs OnData and
+    scheduled events, so Start only starts the sampler; the algorithm thread is bound by Bind, called
+    from OnData, and nothing is sampled until it is.
+
+    Stacks are aggregated in memory as tuples of code objects and turned into folded stack lines
+    ("main.py:OnData;main.py:EnterLong 42") at the end, the input format of flamegraph.pl and
+    speedscope. Samples land where the algorithm thread releases the GIL, so very short functions
+    are under-represented; percentages are reliable for anything taking more than a few intervals.
+    """
+
+    def __init__(self, algorithm, interval=0.005, key=PROFILE_KEY, path=None):
+        """
+        Args:
+            algorithm: The QCAlgorithm; Bind must be called from its thread (e.g. in OnData)
+            interval (float): Seconds between samples
+            key (str): ObjectStore key the folded stacks are saved to
+            path (str): Optional local file the folded stacks are also written to
+        """
+        self.algorithm = algorithm
+        self.interval = interval
+        self.key = key
+        self.path = path
+        self.stacks = Counter()   # Counter[Tuple[code]] - samples per stack, outermost frame first
+        self.idle = 0             # int - samples taken outside strategy code
+        self.target = None        # int - thread id being sampled, None until Bind
+        self.stopping = threading.Event()
+        self.thread = None
+        self.entry_points = set() # Set[code] - code of every method on the algorithm's classes
+        for cls in type(algorithm).__mro__:
+            for value in vars(cls).values():
+                code = getattr(getattr(value, "__func__", value), "__code__", None)
+                if code is not None:
+                    self.entry_points.add(code)
+
+    def Start(self):
+        """Start the sampler thread; samples are taken once the algorithm thread is bound."""
+        self.thread = threading.Thread(target=self._Run, name="SamplingProfiler", daemon=True)
+        self.thread.start()
+
+    def Bind(self):
+        """Sample the calling thread, the algorithm thread; cheap enough to call on every slice."""
+        if self.target is None:
+            self.target = threading.get_ident()
+
+    def Stop(self):
+        if self.thread is not None:
+            self.stopping.set()
+            self.thread.join()
+            self.thread = None
+
+    def _Run(self):
+        while not self.stopping.wait(self.interval):
+            self.Sample()
+
+    def Sample(self):
+        """Take one sample of the target thread (none before it is bound)."""
+        if self.target is None:
+            return
+        frame = sys._current_frames().get(self.target)
+        codes = []
+        outermost = None
+        while frame is not None:
+            code = frame.f_code
+            codes.append(code)
+            if code in self.entry_points:
+                outermost = len(codes)
+            frame = frame.f_back
+        if outermost is None:
+            self.idle += 1
+            return
+        self.stacks[tuple(reversed(codes[:outermost]))] += 1
+
+    def FoldedLines(self):
+        """
+        Returns:
+            list[str]: "frame;frame;frame count" lines, most sampled first
+        """
+        lines = []
+        for codes, count in self.stacks.most_common():
+            frames = ";".join(f"{os.path.basename(code.co_filename)}:{code.co_name}" for code in codes)
+            lines.append(f"{frames} {count}")
+        return lines
+
+    def Save(self):
+        """Stop sampling, save the folded stacks to the ObjectStore (and path, if set) and log a summary."""
+        self.Stop()
+        content = "\n".join(self.FoldedLines()) + "\n"
+        self.algorithm.ObjectStore.SaveBytes(self.key, content.encode("utf-8"))
+        if self.path:
+            with open(self.path, "w") as handle:
+                handle.write(content)
+
+        samples = sum(self.stacks.values())
+        self.algorithm.Log(f"Sampling profiler: {samples:,} strategy samples, {self.idle:,} idle, every "
+                           f"{self.interval * 1000:g} ms; folded stacks saved to {self.key}"
+                           + (f" and {self.path}" if self.path else ""))
+        functions = Counter()
+        for codes, count in self.stacks.items():
+            functions[f"{os.path.basename(codes[-1].co_filename)}:{codes[-1].co_name}"] += count
+        for name, count in functions.most_common(10):
+            self.algorithm.Log(f"  {name}: {count / samples:.1%} of samples (self)")
@@ -0,0 +1,210 @@
+# region imports
+import math
+import struct
+from time import perf_counter
+# endregion
+
+# ObjectStore keys: the end-of-day snapshot and the changes made since it
+STATE_KEY = "turtle/state.bin"
+STATE_DELTA_KEY = "turtle/state-delta.bin"
+
+
+def RunKey(key, live):
+    """
+    Returns:
+        str: `key` for a live run; for any other run the same key under "turtle/backtest/", so a backtest
+            sharing the project's ObjectStore never reads or overwrites a live deployment's state
+    """
+    return key if live else key.replace("turtle/", "turtle/backtest/", 1)
+
+# Binary layout: header, then one record per symbol. A record is the ticker (length-prefixed UTF-8),
+# the stop, the last add price, the pyramid level, the number of entry prices, the position quantity
+# and the entry prices. Missing values are NaN; in a delta, pyramid level 0 marks a closed position.
+_HEADER = struct.Struct("<4sBIdI")  # magic, version, sequence, peak portfolio value, record count
+_RECORDS = {
+    1: struct.Struct("<ddBB"),      # stop, last add price, pyramid level, entry count
+    2: struct.Struct("<ddBBd"),     # version 1 plus the position quantity
+}
+_SNAPSHOT_MAGIC = b"TTSS"
+_DELTA_MAGIC = b"TTSD"
+_VERSION = 2
+
+
+def _Encode(magic, sequence, peak, records):
+    """
+    Args:
+        records (list): (ticker, stop, last add price, pyramid level, entry prices, quantity) tuples
+    """
+    record = _RECORDS[_VERSION]
+    parts = [_HEADER.pack(magic, _VERSION, sequence, peak, len(records))]
+    for ticker, stop, last_add, level, entries, quantity in records:
+        name = ticker.encode("utf-8")
+        parts.append(bytes((len(name),)) + name)
+        parts.append(record.pack(stop, last_add, level, len(entries), quantity))
+        parts.append(struct.pack(f"<{len(entries)}d", *entries))
+    return b"".join(parts)
+
+
+def _Decode(payload, magic):
+    """
+    Returns:
+        tuple: (sequence, peak, records) in the form _Encode takes
+
+    Raises:
+        ValueError: If the payload is not state of this kind and a supported version
+    """
+    payload = bytes(payload)
+    found, version, sequence, peak, count = _HEADER.unpack_from(payload, 0)
+    record = _RECORDS.get(version)
+    if found != magic or record is None:
+        raise ValueError(f"Unsupported strategy state (magic={found!r}, version={version})")
+
+    offset = _HEADER.size
+    records = []
+    for _ in range(count):
+        length = payload[offset]
+        ticker = payload[offset + 1:offset + 1 + length].decode("utf-8")
+        offset += 1 + length
+        stop, last_add, level, entry_count, *quantity = record.unpack_from(payload, offset)
+        offset += record.size
+        entries = list(struct.unpack_from(f"<{entry_count}d", payload, offset))
+        offset += 8 * entry_count
+        records.append((ticker, stop, last_add, level, entries, quantity[0] if quantity else math.nan))
+    return sequence, peak, records
+
+
+class StateStore:
+    """
+    Persists the strategy's position book (stop_losses, entry_prices, pyramid_level, last_add_price,
+    position_quantity) and peak_portfolio_value to the ObjectStore, so a redeployed algorithm picks up its stops and
+    pyramid levels instead of having them rebuilt by hand. The drawdown map is not stored; it is
+    rebuilt from the peak.
+
+    A full snapshot is written at the end of each day. In between, the order methods mark the
+    symbols they change and SaveDelta rewrites a small delta holding only those symbols (and the
+    peak, if it moved), so a restart mid-day loses nothing. Restore applies the snapshot and then
+    the delta, if the delta was written against that snapshot.
+
+    Without `persist` the store only restores: nothing is ever written.
+    """
+
+    def __init__(self, algorithm, key=STATE_KEY, delta_key=STATE_DELTA_KEY, persist=True):
+        """
+        Args:
+            algorithm: The strategy whose position book is persisted
+            key (str): ObjectStore key of the snapshot
+            delta_key (str): ObjectStore key of the changes since the snapshot
+            persist (bool): Whether snapshots and deltas are written; otherwise the store is read-only
+        """
+        self.algorithm = algorithm
+        self.persist = persist
+        self.key = key
+        self.delta_key = delta_key
+        self.sequence = 0         # int - number of the last snapshot written or restored
+        self.dirty = set()        # Set[Symbol] - symbols changed since the last snapshot
+        self.pending = False      # bool - whether a symbol changed since the last delta
+        self.saved_peak = None    # float - peak in the last snapshot or delta
+        self.delta_written = False
+
+    def MarkDirty(self, symbol):
+        """Record that a symbol's position book changed since the last snapshot."""
+        self.dirty.add(symbol)
+        self.pending = True
+
+    def _Record(self, symbol):
+        algorithm = self.algorithm
+        return (str(symbol), algorithm.stop_losses.get(symbol, math.nan), algorithm.last_add_price.get(symbol, math.nan),
+                algorithm.pyramid_level.get(symbol, 0), algorithm.entry_prices.get(symbol, []),
+                algorithm.position_quantity.get(symbol, math.nan))
+
+    def SaveSnapshot(self):
+        """Write the whole position book and peak, and drop the delta it supersedes."""
+        if not self.persist:
+            return
+        algorithm = self.algorithm
+        symbols = set(algorithm.stop_losses) | set(algorithm.pyramid_level) | set(algorithm.entry_prices)
+        records = [self._Record(symbol) for symbol in sorted(symbols, key=str)]
+        self.sequence += 1
+        algorithm.ObjectStore.SaveBytes(self.key, _Encode(_SNAPSHOT_MAGIC, self.sequence, algorithm.peak_portfolio_value, records))
+        # The snapshot is written first: a delta left behind by a crash here has an older sequence and is ignored
+        if self.delta_written:
+            algorithm.ObjectStore.Delete(self.delta_key)
+        self.dirty.clear()
+        self.pending = self.delta_written = False
+        self.saved_peak = algorithm.peak_portfolio_value
+
+    def SaveDelta(self):
+        """
+        Write the symbols changed since the last snapshot, if any changed since the last delta.
+
+        Returns:
+            bool: Whether a delta was written
+        """
+        algorithm = self.algorithm
+        if not self.persist or not self.pending and algorithm.peak_portfolio_value == self.saved_peak:
+            return False
+        records = [self._Record(symbol) for symbol in sorted(self.dirty, key=str)]
+        algorithm.ObjectStore.SaveBytes(self.delta_key, _Encode(_DELTA_MAGIC, self.sequence, algorithm.peak_portfolio_value, records))
+        self.saved_peak = algorithm.peak_portfolio_value
+        self.pending = False
+        self.delta_written = True
+        return True
+
+    def Restore(self):
+        """
+        Load the snapshot and its delta into the strategy's position book, adding any symbol with a
+        stored position that is not in the universe, and rebuild the drawdown map from the stored peak.
+
+        Returns:
+            int: Positions restored, 0 if nothing was stored or the stored state is unreadable
+        """
+        algorithm = self.algorithm
+        store = algorithm.ObjectStore
+        self.delta_written = store.ContainsKey(self.delta_key)
+        if not store.ContainsKey(self.key):
+            algorithm.Log(f"No strategy state at {self.key}; starting with an empty position book")
+            return 0
+
+        started = perf_counter()
+        try:
+            self.sequence, peak, records = _Decode(store.ReadBytes(self.key), _SNAPSHOT_MAGIC)
+            delta_records = 0
+            if self.delta_written:
+                base, delta_peak, changes = _Decode(store.ReadBytes(self.delta_key), _DELTA_MAGIC)
+                if base == self.sequence:
+                    peak, delta_records = delta_peak, len(changes)
+                    records += changes  # Later records for a symbol replace earlier ones below
+        except (ValueError, struct.error) as error:
+            algorithm.Log(f"ERROR: Could not read strategy state ({error}); starting with an empty position book")
+            return 0
+
+        symbols = {str(symbol): symbol for symbol in algorithm.symbols}
+        for ticker, stop, last_add, level, entries, quantity in records:
+            symbol = symbols.get(ticker)
+            if symbol is None:
+                if level == 0:
+                    continue
+                algorithm.Log(f"Restored position in {ticker}, which is not in the universe; adding it")
+                symbol = symbols[ticker] = algorithm.AddTradingSymbol(ticker)
+            for book in (algorithm.stop_losses, algorithm.last_add_price, algorithm.pyramid_level, algorithm.entry_prices,
+                         algorithm.position_quantity):
+                book.pop(symbol, None)
+            if level == 0:
+                continue
+            algorithm.pyramid_level[symbol] = level
+            algorithm.entry_prices[symbol] = entries
+            if not math.isnan(stop):
+                algorithm.stop_losses[symbol] = stop
+            if not math.isnan(last_add):
+                algorithm.last_add_price[symbol] = last_add
+            if not math.isnan(quantity):
+                algorithm.position_quantity[symbol] = quantity
+
+        algorithm.peak_portfolio_value = peak
+        algorithm.drawdown_map = algorithm.CreateDrawdownMap(peak)
+        algorithm.Log(f"Restored strategy state #{self.sequence} ({delta_records} delta records): "
+                      f"{len(algorithm.pyramid_level)} positions, peak ${peak:,.2f}, in {(perf_counter() - started) * 1000:.1f} ms")
+
+        # Fold the delta into a new snapshot, so deltas written from here on start from the restored book
+        self.SaveSnapshot()
+        return len(algorithm.pyramid_level)
@@ -1,85 +1,147 @@
-from AlgorithmImports import *
-from main import TurtleTradingStrategy
-from tests.test_turtle_trading import TestTurtleTrading
-
-class TestRunner(QCAlgorithm):
-    def Initialize(self):
-        self.SetStartDate(2010, 1, 1)
-        self.SetEndDate(2010, 1, 2)
-        
-        # Test results tracking
-        self.tests_run = 0
-        self.tests_passed = 0
-        self.tests_failed = 0
-        
-        self.Log("=== Starting Test Suite ===")
-        
-        try:
-            # Run main algorithm tests
-            self.RunMainTests()
-            
-            # Run separate test suite
-            self.RunTestSuite()
-            
-        except Exception as e:
-            self.Log(f"ERROR: Test suite failed with exception: {str(e)}")
-            
-        finally:
-            # Log test summary
-            self.LogTestSummary()
-            self.Quit()
-    
-    def RunMainTests(self):
-        """Run tests defined in main algorithm"""
-        self.Log("\n=== Running Main Algorithm Tests ===")
-        
-        strategy = TurtleTradingStrategy()
-        strategy.Initialize()
-        
-        # Run tests and track results
-        self.RunTest("CreateDrawdownMap", strategy.Test_CreateDrawdownMap)
-        self.RunTest("GetAvailablePortfolioValue", strategy.Test_GetAvailablePortfolioValue)
-    
-    def RunTestSuite(self):
-        """Run separate test suite"""
-        self.Log("\n=== Running Extended Test Suite ===")
-        
-        test_suite = TestTurtleTrading()
-        test_suite.Initialize()
-        
-        # Run tests and track results
-        self.RunTest("DrawdownMapCreation", test_suite.Test_DrawdownMapCreation)
-        self.RunTest("PortfolioValueLookup", test_suite.Test_PortfolioValueLookup)
-    
-    def RunTest(self, test_name, test_func):
-        """
-        Run a single test and track its result
-        
-        Args:
-            test_name (str): Name of the test
-            test_func (callable): Test function to run
-        """
-        self.Log(f"\nRunning test: {test_name}")
-        self.tests_run += 1
-        
-        try:
-            test_func()
-            self.tests_passed += 1
-            self.Log(f"✓ {test_name} PASSED")
-            
-        except AssertionError as e:
-            self.tests_failed += 1
-            self.Log(f"✗ {test_name} FAILED: {str(e)}")
-            
-        except Exception as e:
-            self.tests_failed += 1
-            self.Log(f"✗ {test_name} ERROR: {str(e)}")
-    
-    def LogTestSummary(self):
-        """Log summary of all test results"""
-        self.Log("\n=== Test Summary ===")
-        self.Log(f"Total Tests Run: {self.tests_run}")
-        self.Log(f"Tests Passed: {self.tests_passed}")
-        self.Log(f"Tests Failed: {self.tests_failed}")
-        self.Log(f"Success Rate: {(self.tests_passed/self.tests_run)*100:.1f}%")
-        self.Log("===================") 
\ No newline at end of file
+"""
+Test runner for the strategy's Test_* methods, kept out of the algorithm's startup path.
+
+Discovers every class defining Test_* methods in main.py and tests/test_*.py and runs each test
+in its own worker process, in parallel, on the LEAN stand-in. A test gets a fresh instance of its
+class; classes with an Initialize method (QCAlgorithm subclasses) are initialized first, as LEAN
+would. Workers are forked from a server that has already imported the modules under test, so
+isolation costs a fork rather than a fresh interpreter.
+
+Usage:
+    python test_runner.py [-k TEXT] [--workers N] [--serial] [--slowest 10]
+
+Exits with the number of failed tests (0 when everything passes).
+"""
+# region imports
+import lean_standin
+
+lean_standin.install()  # Plain Python runs use the stand-in; a no-op inside LEAN
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import glob
+import importlib
+import inspect
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+# endregion
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TEST_PREFIX = "Test_"
+
+
+def TestModules():
+    """
+    Returns:
+        list[str]: Importable names of the modules to search: main plus tests/test_*.py
+    """
+    paths = sorted(glob.glob(os.path.join(ROOT, "tests", "test_*.py")))
+    return ["main"] + [f"tests.{os.path.splitext(os.path.basename(path))[0]}" for path in paths]
+
+
+def DiscoverTests(modules=None, keyword=""):
+    """
+    Find Test_* methods on the classes each module defines (imported names are skipped, so a
+    strategy imported into a test module isn't collected twice).
+
+    Args:
+        modules (list[str]): Module names to search; defaults to TestModules()
+        keyword (str): Only keep tests whose "module.Class.Test_name" id contains this text (any case)
+
+    Returns:
+        list[tuple]: (module, class name, method name) per test, in discovery order
+    """
+    keyword = keyword.lower()
+    tests = []
+    for module_name in modules or TestModules():
+        module = importlib.import_module(module_name)
+        for class_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            for method_name in sorted(name for name in vars(cls) if name.startswith(TEST_PREFIX)):
+                if keyword in f"{module_name}.{class_name}.{method_name}".lower():
+                    tests.append((module_name, class_name, method_name))
+    return tests
+
+
+def RunTest(test):
+    """
+    Run one test on a fresh instance of its class.
+
+    Args:
+        test (tuple): (module, class name, method name)
+
+    Returns:
+        tuple: (test, passed, seconds, error text or None); seconds covers Initialize and the test
+    """
+    module_name, class_name, method_name = test
+    start = time.perf_counter()
+    try:
+        instance = getattr(importlib.import_module(module_name), class_name)()
+        if hasattr(instance, "Initialize"):
+            instance.Initialize()
+        getattr(instance, method_name)()
+        return test, True, time.perf_counter() - start, None
+    except Exception:
+        return test, False, time.perf_counter() - start, traceback.format_exc()
+
+
+def RunAll(tests, workers=None, serial=False):
+    """
+    Run the tests, yielding each result as it completes.
+
+    Args:
+        tests (list[tuple]): Tests from DiscoverTests
+        workers (int): Worker processes; defaults to the CPU count
+        serial (bool): Run in this process instead, one after another (no isolation; for debugging)
+    """
+    if serial:
+        for test in tests:
+            yield RunTest(test)
+        return
+
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["test_runner"] + sorted({module for module, _, _ in tests}))
+    else:
+        context = multiprocessing.get_context("spawn")
+
+    # One test per worker process, so state left behind by a test can't leak into the next one
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=context, max_tasks_per_child=1) as pool:
+        futures = [pool.submit(RunTest, test) for test in tests]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the strategy's Test_* methods")
+    parser.add_argument("-k", dest="keyword", default="", help="Only run tests whose id contains this text")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--serial", action="store_true", help="Run in-process, one test after another")
+    parser.add_argument("--slowest", type=int, default=10, help="How many of the slowest tests to list")
+    arguments = parser.parse_args(argv)
+
+    sys.path.insert(0, ROOT)
+    started = time.perf_counter()
+    tests = DiscoverTests(keyword=arguments.keyword)
+    results = []
+    for test, passed, seconds, error in RunAll(tests, arguments.workers, arguments.serial):
+        results.append((test, passed, seconds))
+        print(f"{'PASS' if passed else 'FAIL'} {'.'.join(test)} ({seconds * 1000:.0f} ms)")
+        if error:
+            print(error)
+
+    failed = sum(1 for _, passed, _ in results if not passed)
+    print(f"\n{len(results) - failed} passed, {failed} failed in {time.perf_counter() - started:.2f}s")
+    if arguments.slowest:
+        print(f"Slowest {min(arguments.slowest, len(results))}:")
+        for test, _, seconds in sorted(results, key=lambda result: -result[2])[:arguments.slowest]:
+            print(f"  {seconds * 1000:8.0f} ms  {'.'.join(test)}")
+    return failed
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import os
+import tempfile
+
+from tools.archive import archive_run, list_artifacts, open_artifact, restore_run, store_stats
+
+class TestArchive:
+
+    def _make_run(self, backtests_dir, name, log_text):
+        run_dir = os.path.join(backtests_dir, name)
+        os.makedirs(os.path.join(run_dir, "code"))
+        with open(os.path.join(run_dir, "code", "main.py"), "w") as handle:
+            handle.write("class TurtleTradingStrategy: pass\n")
+        with open(os.path.join(run_dir, "log.txt"), "w") as handle:
+            handle.write(log_text)
+        return run_dir
+
+    def Test_ArchiveDeduplicatesAndReadsTransparently(self):
+        """Test identical files are stored once and archived files read back unchanged"""
+        with tempfile.TemporaryDirectory() as backtests_dir:
+            first = self._make_run(backtests_dir, "2024-10-27_15-45-07", "first run\n" * 1000)
+            second = self._make_run(backtests_dir, "2024-10-27_16-13-09", "second run\n" * 1000)
+            archive_run(first)
+            archive_run(second)
+
+            assert sorted(os.listdir(first)) == ["manifest.json"], "Only the manifest should remain in the run folder"
+            assert list_artifacts(first) == ["code/main.py", "log.txt"], "Archived artifacts should still be listed"
+            with open_artifact(second, "log.txt") as handle:
+                assert handle.read() == "second run\n" * 1000, "Archived text should read back unchanged"
+            with open_artifact(first, "code/main.py", "rb") as handle:
+                assert handle.read() == b"class TurtleTradingStrategy: pass\n", "Binary reads should work too"
+
+            stats = store_stats(backtests_dir)
+            assert stats["blobs"] == 3, "The shared main.py should be stored once"
+            assert stats["stored_bytes"] < stats["unique_bytes"], "Blobs should be compressed"
+
+    def Test_RestoreRun(self):
+        """Test restoring a run puts its files back and removes the manifest"""
+        with tempfile.TemporaryDirectory() as backtests_dir:
+            run_dir = self._make_run(backtests_dir, "2024-10-27_16-13-09", "log\n")
+            archive_run(run_dir)
+            restore_run(run_dir)
+
+            assert not os.path.exists(os.path.join(run_dir, "manifest.json")), "Manifest should be removed"
+            with open(os.path.join(run_dir, "code", "main.py")) as handle:
+                assert handle.read() == "class TurtleTradingStrategy: pass\n", "Restored file should match"
+
+    def Test_BlobsDurableBeforeOriginalsRemoved(self):
+        """Test every blob, its directory and the manifest are fsynced before the first original is removed"""
+        events = []
+        fsync, remove = os.fsync, os.remove
+        os.fsync = lambda handle: (events.append("fsync"), fsync(handle))
+        os.remove = lambda path: (events.append(os.path.basename(path)), remove(path))
+        try:
+            with tempfile.TemporaryDirectory() as backtests_dir:
+                run_dir = self._make_run(backtests_dir, "2024-10-27_16-13-09", "log\n")
+                archive_run(run_dir)
+        finally:
+            os.fsync, os.remove = fsync, remove
+
+        first_removal = min(events.index("main.py"), events.index("log.txt"))
+        # Per blob the file and its shard directory (plus the store for a new shard), then the manifest and run folder
+        assert events[:first_removal].count("fsync") >= 2 * 2 + 2, f"Everything is durable before removal, got {events}"
+        assert "fsync" not in events[first_removal:], "Nothing is made durable after an original is gone"
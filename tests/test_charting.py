@@ -0,0 +1,105 @@
+from array import array
+from datetime import date, datetime, timedelta
+import random
+
+import lean_standin
+
+lean_standin.install()
+
+from charting import LargestTriangleThreeBuckets, SeriesBuffer, TurtleCharts
+from lean_standin.data import RandomWalkBars
+from lean_standin.engine import Backtest
+from main import TurtleTradingStrategy
+
+class _Algorithm:
+    """Just enough of an algorithm for TurtleCharts to register its charts with"""
+
+    def __init__(self):
+        self.charts = {}
+
+    def AddChart(self, chart):
+        self.charts[chart.Name] = chart
+
+class _Live(TurtleTradingStrategy):
+    """Runs as a live deployment and records the points published to the N chart after each end-of-day run"""
+
+    def Initialize(self):
+        self.LiveMode = True
+        super().Initialize()
+        self.published = []
+        self.end_of_day.AddStage("probe", lambda: self.published.append(
+            sum(len(series.Values) for series in self.Charts[TurtleCharts.N_CHART].Series.values())), 1)
+
+def _random_walk(count, seed=3):
+    rng = random.Random(seed)
+    times, values = array("d"), array("d")
+    value = 100.0
+    for index in range(count):
+        value += rng.gauss(0, 1)
+        times.append(float(index))
+        values.append(value)
+    return times, values
+
+class TestCharting:
+
+    def Test_LargestTriangleThreeBucketsKeepsEnds(self):
+        """Test LTTB keeps the first and last points and returns exactly threshold ascending indices"""
+        times, values = _random_walk(1000)
+        for threshold in (3, 10, 333, 999):
+            keep = LargestTriangleThreeBuckets(times, values, len(times), threshold)
+            assert len(keep) == threshold, f"Exactly {threshold} points, got {len(keep)}"
+            assert keep[0] == 0 and keep[-1] == len(times) - 1, "The first and last points are kept"
+            assert all(a < b for a, b in zip(keep, keep[1:])), "Indices are strictly ascending"
+
+        assert LargestTriangleThreeBuckets(times, values, 50, 50) == list(range(50)), "Everything is kept at threshold == count"
+        assert LargestTriangleThreeBuckets(times, values, 50, 80) == list(range(50)), "Everything is kept above the count"
+
+    def Test_FullBufferCompactsToHalf(self):
+        """Test a full buffer compacts to half its capacity before taking the next point"""
+        buffer = SeriesBuffer(100)
+        times, values = _random_walk(101)
+        for index in range(100):
+            buffer.Append(times[index], values[index])
+        assert buffer.count == 100, "A buffer holds its capacity without compacting"
+
+        first = (buffer.times[0], buffer.values[0])
+        buffer.Append(times[100], values[100])
+        assert buffer.count == 100 // 2 + 1, f"Compacted to capacity // 2 plus the new point, got {buffer.count}"
+        assert (buffer.times[0], buffer.values[0]) == first, "The oldest point survives compaction"
+        assert (buffer.times[buffer.count - 1], buffer.values[buffer.count - 1]) == (times[100], values[100]), "The new point is last"
+
+    def Test_FlushCapsPointsAndSymbolSeries(self):
+        """Test Flush adds at most points per series and symbols beyond max_symbol_series get none"""
+        algorithm = _Algorithm()
+        charts = TurtleCharts(algorithm, capacity=200, points=20, max_symbol_series=3)
+        start = datetime(2020, 1, 1)
+        for day in range(150):
+            time = start + timedelta(days=day)
+            charts.Record(TurtleCharts.SIZING_CHART, "Actual Equity", time, 100000 + day)
+            for symbol in ["AAA", "BBB", "CCC", "DDD", "EEE"]:
+                charts.RecordSymbol(TurtleCharts.N_CHART, symbol, time, day % 7)
+        charts.Flush()
+
+        n_chart = algorithm.charts[TurtleCharts.N_CHART]
+        assert sorted(n_chart.Series) == ["AAA", "BBB", "CCC"], f"Only the first 3 symbols get series, got {sorted(n_chart.Series)}"
+        all_series = list(n_chart.Series.values()) + list(algorithm.charts[TurtleCharts.SIZING_CHART].Series.values())
+        assert all(len(series.Values) == 20 for series in all_series), "Each series gets points points"
+
+        charts.Flush()
+        assert all(len(series.Values) == 20 for series in all_series), "Flushing an empty buffer adds nothing"
+
+    def Test_LiveFlushesWithEachDailyReport(self):
+        """Test a live deployment publishes its Turtle charts every trading day, not only at the end"""
+        history = RandomWalkBars(["AAPL"], date(2009, 10, 1), 200)
+        result = Backtest(_Live, history, end=date(2010, 1, 31), log=False)
+        strategy = result.Algorithm
+
+        assert "charts" in [stage.name for stage in strategy.end_of_day.stages], "Live runs flush charts at the end of the day"
+        assert len(strategy.published) == result.TradingDays, "One probe per trading day"
+        traded = [count for count in strategy.published if count > 0]
+        assert len(traded) > 10, "Points are published while the run is still going"
+        assert all(b - a == 1 for a, b in zip(traded, traded[1:])), "Each day publishes that day's point for AAPL"
+
+        default = TurtleTradingStrategy()
+        default.Initialize()
+        assert "charts" not in [stage.name for stage in default.end_of_day.stages], "Backtests flush once, at the end"
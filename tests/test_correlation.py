@@ -0,0 +1,82 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+import lean_standin
+
+lean_standin.install()
+
+from AlgorithmImports import Slice, Symbol, TradeBar, TradeBars
+from lean_standin.data import RandomWalkBars
+from lean_standin.engine import Backtest
+from correlation import CorrelationEngine
+from main import TurtleTradingStrategy
+
+def _slice(day, closes):
+    time = datetime(2010, 1, 1) + timedelta(days=day)
+    bars = {symbol: TradeBar(time, symbol, close, close, close, close, 1000, timedelta(days=1)) for symbol, close in closes.items()}
+    return Slice(time + timedelta(days=1), TradeBars(bars))
+
+class _Basket(TurtleTradingStrategy):
+    """Trades AAPL, MSFT (AAPL's history, scaled) and IBM"""
+
+    def Initialize(self):
+        super().Initialize()
+        for ticker in ("MSFT", "IBM"):
+            self.AddTradingSymbol(ticker)
+
+class TestCorrelation:
+
+    def Test_MatchesFullRecomputation(self):
+        """Test the incremental matrix equals np.corrcoef over the window, through wraps and growth, and clusters by threshold"""
+        random = np.random.default_rng(5)
+        tickers = [f"SYM{index:02d}" for index in range(12)]
+        symbols = [Symbol(ticker) for ticker in tickers]
+        engine = CorrelationEngine(window=40, close_threshold=0.7, loose_threshold=0.4, capacity=4)
+        for symbol in symbols:
+            engine.Add(symbol)
+
+        closes = np.full(len(symbols), 100.0)
+        returns = []
+        for day in range(150):
+            market = random.normal(0, 0.01)
+            change = random.normal(0, 0.01, len(symbols))
+            change[:3] += market * 3       # SYM00-SYM02 move with the market, closely
+            change[3] += market * 0.6      # SYM03 loosely
+            bars = len(symbols)
+            if day == 100:
+                change[11], bars = 0.0, 11  # SYM11 has no bar and counts as unchanged
+            closes *= 1 + change
+            engine.Update(_slice(day, dict(zip(symbols[:bars], closes[:bars]))))
+            if day:
+                returns.append(change)
+            if day >= 40:
+                expected = np.corrcoef(np.array(returns[-40:]).T)
+                assert np.allclose(engine.Matrix(), expected, atol=1e-9), f"Matrix on day {day}"
+
+        assert engine.IsReady and engine.returns.shape[1] == 16, "The arrays doubled to fit the symbols"
+        changed = engine.Refresh()
+        assert changed[symbols[1]] == ("SYM00", "SYM00") and changed[symbols[3]][1] == "SYM00", "Clusters are named after their first symbol"
+        assert engine.Clusters()["close"] == [["SYM00", "SYM01", "SYM02"]], "The market movers are closely correlated"
+        assert ["SYM00", "SYM01", "SYM02", "SYM03"] in engine.Clusters()["loose"], "SYM03 joins them loosely"
+        assert engine.Refresh() == {}, "Unchanged clusters are not reported again"
+
+        try:
+            CorrelationEngine(close_threshold=0.3, loose_threshold=0.5)
+            assert False, "The close threshold can't be below the loose one"
+        except ValueError:
+            pass
+
+    def Test_ClustersBecomeUnitLimitGroups(self):
+        """Test correlation clusters regroup the unit limits and are listed in the daily report"""
+        history = RandomWalkBars(["AAPL", "IBM"], date(2009, 10, 1), 365, seed=3)
+        history["MSFT"] = [(day, open_price * 2, high * 2, low * 2, close * 2, volume) for day, open_price, high, low, close, volume in history["AAPL"]]
+        result = Backtest(_Basket, history, end=date(2010, 6, 30), parameters={
+            "correlation-groups": "true", "correlation-window": "30", "close-groups": "AAPL,IBM"})
+        strategy = result.Algorithm
+        msft, ibm = Symbol("MSFT"), Symbol("IBM")
+
+        assert strategy.risk_limits.Groups(msft) == ("AAPL", "AAPL"), "A copy of AAPL is closely correlated with it"
+        assert strategy.risk_limits.Groups(ibm) == ("IBM", "IBM"), "The configured group gives way to the correlation clusters"
+        assert any(line.endswith("Correlation Clusters (close): AAPL, MSFT") for line in result.Logs), "The report lists the clusters"
+        assert [stage.name for stage in strategy.end_of_day.stages][:2] == ["reconcile", "correlation"], "Regrouping runs before the report"
@@ -0,0 +1,59 @@
+from datetime import date, datetime, timedelta
+import time
+
+import lean_standin
+
+lean_standin.install()
+
+from lean_standin.data import RandomWalkBars
+from lean_standin.engine import Backtest
+from end_of_day import EndOfDayPipeline
+from main import TurtleTradingStrategy
+
+class _Probed(TurtleTradingStrategy):
+    """Records the time of each end-of-day run from a last stage"""
+
+    def Initialize(self):
+        super().Initialize()
+        self.end_of_day_times = []
+        self.end_of_day.AddStage("probe", lambda: self.end_of_day_times.append(self.Time), 1)
+
+class TestEndOfDay:
+
+    def Test_RunsOnTradingDaysOnly(self):
+        """Test the pipeline runs every stage once per trading day, none on weekends"""
+        history = RandomWalkBars(["AAPL"], date(2009, 10, 1), 200)
+        result = Backtest(_Probed, history, end=date(2010, 1, 31), log=False, parameters={"persist-state": "true", "memory-accounting": "true"})
+        strategy = result.Algorithm
+
+        assert len(strategy.end_of_day_times) == result.TradingDays < result.CalendarDays, "One run per trading day"
+        assert all(day.weekday() < 5 and day.hour == 16 for day in strategy.end_of_day_times), "Weekdays at the close only"
+        names = [stage.name for stage in strategy.end_of_day.stages]
+        assert names == ["reconcile", "report", "memory", "snapshot", "journal", "statistics", "probe"], f"Stages run in order, got {names}"
+        assert all(stage.timings.count == result.TradingDays for stage in strategy.end_of_day.stages), "Every stage is timed every day"
+
+        default = TurtleTradingStrategy()
+        default.Initialize()
+        assert default.memory is None and "memory" not in [stage.name for stage in default.end_of_day.stages], "Memory accounting is opt-in in backtests"
+
+    def Test_BucketDefersAndRefills(self):
+        """Test a deferrable stage waits when the bucket can't cover it and the stages after it, and overruns are logged"""
+        strategy = TurtleTradingStrategy()
+        strategy.Time = datetime(2010, 1, 4, 16)
+        ran = []
+        pipeline = EndOfDayPipeline(strategy)
+        pipeline.AddStage("required", lambda: ran.append("required"), 10)
+        pipeline.AddStage("optional", lambda: ran.append("optional"), 50, deferrable=True)
+        pipeline.AddStage("slow", lambda: (time.sleep(0.002), ran.append("slow")), 1)
+
+        pipeline.tokens_ns = 40_000_000  # 40ms: short of the optional stage's 50ms plus the slow stage's 1ms
+        pipeline.Run()
+        assert ran == ["required", "slow"] and pipeline.stages[1].deferrals == 1, "The optional stage is deferred"
+        assert pipeline.stages[2].overruns == 1 and any("slow took" in line for line in strategy.Logs), "Overruns are logged"
+
+        strategy.Time += timedelta(days=1)
+        pipeline.Run()
+        assert ran[2:] == ["required", "optional", "slow"], "A day's refill (18 minutes) lets it run"
+        strategy.Time += timedelta(days=30)
+        pipeline.Run()
+        assert pipeline.tokens_ns <= pipeline.capacity_ns, "The refill stops at the bucket's capacity"
@@ -0,0 +1,33 @@
+import copy
+import json
+
+from benchmarks.golden import GOLDEN_PATH, SCENARIOS, CompareBehavior, ComparePerformance, Fingerprint
+
+class TestGolden:
+
+    def Test_GoldenBehaviorUnchanged(self):
+        """Test every golden scenario still produces its recorded behavior fingerprint"""
+        with open(GOLDEN_PATH) as handle:
+            golden = json.load(handle)
+
+        for scenario in SCENARIOS:
+            behavior = Fingerprint(scenario, measure_performance=False)["behavior"]
+            differences = CompareBehavior(behavior, golden[scenario.name]["behavior"])
+            assert not differences, f"{scenario.name}: {'; '.join(differences)} (run python -m benchmarks.golden)"
+
+    def Test_ComparisonsFlagChanges(self):
+        """Test changed orders, diverging equity and blown budgets are reported"""
+        with open(GOLDEN_PATH) as handle:
+            expected = json.load(handle)["sideways"]
+
+        changed = copy.deepcopy(expected["behavior"])
+        changed["order_hash"] = "0" * 16
+        changed["checkpoints"][5][1] += 100
+        differences = CompareBehavior(changed, expected["behavior"])
+        assert any("order sequence" in line for line in differences), "A different order hash should be reported"
+        assert any(expected["behavior"]["checkpoints"][5][0] in line for line in differences), "The first diverging checkpoint should be named"
+        assert not CompareBehavior(expected["behavior"], expected["behavior"]), "Identical fingerprints should match"
+
+        slower = dict(expected["performance"], wall_seconds=expected["performance"]["wall_seconds"] * 2)
+        assert ComparePerformance(slower, expected["performance"], 0.5, 0.2), "Doubling wall time exceeds a 50% budget"
+        assert not ComparePerformance(expected["performance"], expected["performance"], 0.5, 0.2), "Same timings pass"
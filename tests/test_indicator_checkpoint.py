@@ -0,0 +1,59 @@
+from datetime import date
+
+import lean_standin
+
+lean_standin.install()
+
+from AlgorithmImports import ObjectStore, Symbol
+from lean_standin.data import RandomWalkBars
+from lean_standin.engine import Backtest
+from indicator_checkpoint import INDICATOR_KEY, IndicatorCheckpoint
+from main import TurtleTradingStrategy
+from state_store import RunKey
+
+def _values(strategy, symbol):
+    return (strategy.entry_channels[symbol].Upper.Current.Value, strategy.entry_channels[symbol].Lower.Current.Value,
+            strategy.exit_channels[symbol].Upper.Current.Value, strategy.exit_channels[symbol].Lower.Current.Value,
+            strategy.atrs[symbol].Current.Value)
+
+class TestIndicatorCheckpoint:
+
+    def Test_RestartSkipsWarmUp(self):
+        """Test a restart from a checkpoint plus the missed bars matches indicators warmed up the long way"""
+        history = RandomWalkBars(["AAPL"], date(2009, 1, 1), 600, seed=7)
+        aapl = Symbol("AAPL")
+
+        # The first run stops in October; the restart at the start date has November and December to catch up on
+        store = ObjectStore()
+        Backtest(TurtleTradingStrategy, history, start=date(2009, 6, 1), end=date(2009, 10, 30), log=False,
+                 parameters={"persist-state": "true"}, object_store=store)
+        assert store.ContainsKey(RunKey(INDICATOR_KEY, False)), "The checkpoint is saved with the strategy state"
+
+        restarted = Backtest(TurtleTradingStrategy, history, end=date(2010, 6, 30), log=True,
+                             parameters={"restore-state": "true"}, object_store=store)
+        strategy = restarted.Algorithm
+        assert strategy.WarmUpPeriod is None, "A complete checkpoint skips SetWarmUp"
+        assert any("missed bars" in line for line in restarted.Logs), "The restore is logged"
+        assert not any("Indicators not ready" in line for line in restarted.Logs), "Indicators are ready from the first slice"
+
+        reference = Backtest(TurtleTradingStrategy, history, end=date(2010, 6, 30), log=False).Algorithm
+        assert _values(strategy, aapl) == _values(reference, aapl), "Restored indicators track the warmed-up ones exactly"
+
+    def Test_IncompleteCheckpointWarmsUp(self):
+        """Test a round trip of the kept bars, and a fallback to warm-up when a symbol has no checkpoint"""
+        strategy = TurtleTradingStrategy()
+        strategy.LogEnabled = False
+        strategy.Initialize()
+        checkpoint = IndicatorCheckpoint(strategy, 3)
+        aapl = Symbol("AAPL")
+        for day in range(1, 6):
+            checkpoint._Window(aapl).append((20100100 + day, 10.0 + day, 11.0 + day, 9.0 + day, 10.5 + day, 1000.0 * day))
+
+        restored = IndicatorCheckpoint.FromBytes(checkpoint.ToBytes())
+        assert restored == {"AAPL": list(checkpoint.windows[aapl])}, "Kept bars round-trip"
+        assert [row[0] for row in restored["AAPL"]] == [20100103, 20100104, 20100105], "Only the last depth bars are kept"
+
+        checkpoint.Save()
+        strategy.AddTradingSymbol("MSFT")
+        assert not checkpoint.Restore(), "A symbol without checkpointed bars needs a warm-up"
+        assert not strategy.entry_channels[aapl].IsReady, "Indicators are left untouched for the warm-up"
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+from instrumentation import LatencyHistogram, HotPathTimer, ThroughputStatistics
+
+class _Algorithm:
+    """Just enough of an algorithm for HotPathTimer to wrap and log against"""
+
+    def __init__(self):
+        self.logs = []
+        self.statistics = {}
+        self.Time = datetime(2020, 1, 6, 16)
+        for name in HotPathTimer.METHODS:
+            setattr(self, name, lambda *args, **kwargs: 7)
+
+    def Log(self, message):
+        self.logs.append(message)
+
+    def SetRuntimeStatistic(self, name, value):
+        self.statistics[name] = value
+
+class TestInstrumentation:
+
+    def Test_HistogramPercentiles(self):
+        """Test percentiles land within the bucket resolution of the true value"""
+        histogram = LatencyHistogram()
+        for duration in range(1, 100001):
+            histogram.Record(duration)
+
+        for fraction, expected in ((0.5, 50000), (0.99, 99000)):
+            result = histogram.Percentile(fraction)
+            assert abs(result - expected) / expected <= 0.25, f"p{fraction * 100:g} should be near {expected}, got {result}"
+        assert LatencyHistogram().Percentile(0.5) == 0.0, "An empty histogram reports 0"
+
+    def Test_MergeAndReset(self):
+        """Test daily histograms fold into run totals"""
+        day, run = LatencyHistogram(), LatencyHistogram()
+        day.Record(1000)
+        day.Record(3000)
+        run.Merge(day)
+        day.Reset()
+
+        assert run.count == 2 and run.total_ns == 4000, "Merge should carry counts and totals"
+        assert day.count == 0 and sum(day.counts) == 0, "Reset should clear every bucket"
+
+    def Test_TimerWrapsMethodsAndLogs(self):
+        """Test wrapped order-path methods keep their results and are timed"""
+        algorithm = _Algorithm()
+        timer = HotPathTimer(algorithm)
+
+        assert algorithm.EnterLong("AAPL") == 7, "Wrapped methods should return the original result"
+        timer.Start()
+        timer.Lap("validation")
+        timer.LogDaily()
+
+        assert timer.run["EnterLong"].count == 1 and timer.run["validation"].count == 1, "Samples fold into the run"
+        assert timer.daily["EnterLong"].count == 0, "The day starts empty after the daily report"
+        assert any(line.startswith("  EnterLong: n=1") for line in algorithm.logs), "The daily report lists each timed method"
+
+    def Test_ThroughputStatistics(self):
+        """Test throughput counters publish per-slice, per-day and timing statistics"""
+        algorithm = _Algorithm()
+        throughput = ThroughputStatistics(algorithm)
+        throughput.Publish()
+        assert "Slices/sec" not in algorithm.statistics, "Rates wait for the end of warm-up"
+
+        throughput.WarmUpFinished()
+        for day in range(4):
+            for _ in range(2):  # Two slices a day, e.g. an intraday subscription
+                throughput.RecordSlice(0, 3)
+            algorithm.Time += timedelta(days=1)
+        throughput.RecordOrder()
+        throughput.RecordOrder()
+        throughput.Publish()
+
+        assert algorithm.statistics["Symbols/Slice"] == "3.0", "Symbols are averaged per slice"
+        assert algorithm.statistics["Orders/Day"] == "0.50", "Orders are averaged per day with slices, not per slice"
+        assert {"Slices/sec", "Warm-up", "OnData Time", "Report Time"} <= algorithm.statistics.keys(), "Every statistic is published"
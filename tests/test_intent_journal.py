@@ -0,0 +1,61 @@
+from datetime import date
+
+import lean_standin
+
+lean_standin.install()
+
+from AlgorithmImports import ObjectStore, Symbol
+from lean_standin.data import RandomWalkBars
+from lean_standin.engine import Backtest
+from main import TurtleTradingStrategy
+
+def _strategy(object_store, **parameters):
+    strategy = TurtleTradingStrategy()
+    strategy.LogEnabled = False
+    strategy.ObjectStore = object_store
+    strategy.SetParameters(parameters)
+    strategy.Initialize()
+    return strategy
+
+class TestIntentJournal:
+
+    def Test_PendingIntentsReplayAgainstHoldings(self):
+        """Test a filled order whose book was lost is recovered, an unfilled one abandoned, and replay is idempotent"""
+        store = ObjectStore()
+        strategy = _strategy(store, **{"persist-state": "true"})
+        aapl, msft = Symbol("AAPL"), strategy.AddTradingSymbol("MSFT")
+        strategy.Securities[aapl].Price = 100.0
+
+        # An entry that completes, then an add that crashes after its order but before the book update
+        strategy.intent_journal.RecordOutcome(strategy.intent_journal.RecordIntent("enter_long", aapl, 100, 90.0, [100.0], 1, 100.0))
+        strategy.MarketOrder(aapl, 100)
+        strategy.intent_journal.RecordIntent("add_long", aapl, 50, 95.0, [100.0, 105.0], 2, 105.0)
+        strategy.MarketOrder(aapl, 50)
+        # An entry that crashes before its order reaches the market
+        strategy.intent_journal.RecordIntent("enter_short", msft, -30, 220.0, [200.0], 1, 200.0)
+        with open(strategy.intent_journal.path, "a") as handle:
+            handle.write('{"id": 4, "type": "int')  # Torn by the crash
+
+        # Restart: holdings come back from the brokerage before warm-up finishes
+        restarted = _strategy(store, **{"restore-state": "true", "persist-state": "true"})
+        restarted.Portfolio.ApplyFill(aapl, 150, 100.0)
+        restarted.OnWarmupFinished()
+        assert restarted.pyramid_level == {aapl: 2}, "The add whose order filled is recovered; the unfilled entry is not"
+        assert restarted.stop_losses == {aapl: 95.0} and restarted.entry_prices == {aapl: [100.0, 105.0]}, "The journaled book is applied"
+        assert restarted.last_add_price == {aapl: 105.0}, "The last add price is recovered"
+
+        again = _strategy(store, **{"restore-state": "true", "persist-state": "true"})
+        again.Portfolio.ApplyFill(aapl, 150, 100.0)
+        again.OnWarmupFinished()
+        assert again.stop_losses == restarted.stop_losses and again.pyramid_level == restarted.pyramid_level, "Replay is idempotent"
+        assert again.intent_journal.Replay() == {"recovered": 0, "abandoned": 0, "unresolved": 0}, "Resolved intents are not resolved again"
+
+    def Test_JournalCompactsWithSnapshots(self):
+        """Test a backtest journals its orders and the daily snapshot truncates the journal"""
+        store = ObjectStore()
+        history = RandomWalkBars(["AAPL"], date(2009, 10, 1), 400, seed=7, drift=0.0008)
+        result = Backtest(TurtleTradingStrategy, history, end=date(2010, 11, 1), log=False,
+                          parameters={"persist-state": "true"}, object_store=store)
+        journal = result.Algorithm.intent_journal
+        assert journal.next_id - 1 == len(result.Orders), "Every order was journaled"
+        assert journal.Read() == ({}, {}), "The final snapshot leaves an empty journal"
@@ -0,0 +1,66 @@
+from datetime import date, datetime, time, timedelta
+
+import lean_standin
+
+lean_standin.install()
+
+from AlgorithmImports import Slice, Symbol, TradeBar
+from lean_standin.data import RandomWalkBars
+from lean_standin.engine import Backtest, MinuteBars
+from main import TurtleTradingStrategy
+
+def _values(strategy, symbol):
+    return (strategy.entry_channels[symbol].Upper.Current.Value, strategy.exit_channels[symbol].Lower.Current.Value,
+            strategy.atrs[symbol].Current.Value)
+
+class TestIntraday:
+
+    def Test_DailyConsolidationMatchesDailyMode(self):
+        """Test minute data consolidates into the daily indicators, and intraday triggers trade before the close"""
+        history = RandomWalkBars(["AAPL"], date(2009, 10, 1), 330, seed=7, drift=0.0008)
+        aapl = Symbol("AAPL")
+        daily = Backtest(TurtleTradingStrategy, history, end=date(2010, 8, 31), log=False)
+        intraday = Backtest(TurtleTradingStrategy, history, end=date(2010, 8, 31), log=False,
+                            parameters={"intraday-monitoring": "true"})
+
+        assert _values(intraday.Algorithm, aapl) == _values(daily.Algorithm, aapl), "Consolidated bars update the indicators exactly as daily bars do"
+        assert intraday.Orders and any(order.Time.time() != time(16, 0) for order in intraday.Orders), "Triggers fire before the close"
+        assert 0 < intraday.Algorithm.intraday.triggered < 100, "Only trigger crossings are evaluated intraday, not every minute"
+
+    def Test_TriggersArmAndFire(self):
+        """Test a long's levels, arming by distance, a crossing handed to OnData, and a declined level dropped"""
+        strategy = TurtleTradingStrategy()
+        strategy.LogEnabled = False
+        strategy.SetParameters({"intraday-monitoring": "true"})
+        strategy.Initialize()
+        aapl = Symbol("AAPL")
+        monitor = strategy.intraday
+        start = datetime(2010, 1, 4, 9, 30)
+        for day in range(strategy.system.entry_length):
+            bar = TradeBar(start + timedelta(days=day), aapl, 100, 101, 99, 100, 1000, timedelta(hours=6, minutes=30))
+            for minute in MinuteBars(bar):
+                strategy.Consolidators[aapl][0].Update(minute)
+        assert strategy.atrs[aapl].IsReady and strategy.atrs[aapl].Current.Value == 2.0, "N comes from the consolidated bars"
+        monitor.daily_bars.clear()
+
+        strategy.Securities[aapl].Price = 100.0
+        strategy.Portfolio.ApplyFill(aapl, 100, 100.0)
+        strategy.stop_losses[aapl], strategy.pyramid_level[aapl], strategy.last_add_price[aapl] = 96.0, 1, 100.0
+        monitor.Refresh()
+        assert monitor.triggers[aapl] == (99.0, 102.0), "Exit channel low above the stop, and the next add 1N up"
+        assert aapl in monitor.armed, "Within 1N of the exit level"
+
+        strategy.Securities[aapl].Price = 100.5
+        monitor.arm_distance = 0.1
+        monitor.Arm(monitor.triggers)
+        assert aapl not in monitor.armed, "Farther than 0.1N from both levels"
+        minute = Slice(start, {aapl: TradeBar(start, aapl, 100.5, 101.9, 100.5, 101.9, 10, timedelta(minutes=1))})
+        assert monitor.OnMinute(minute) == (None, None), "Unarmed symbols are not checked"
+
+        monitor.Arm({aapl: (99.0, 100.6)})
+        crossed, symbols = monitor.OnMinute(minute)
+        assert symbols == [aapl] and crossed.Bars[aapl].Close == 101.9, "A crossing hands the minute bar to OnData"
+
+        strategy.Securities[aapl].Price = 102.5  # Past the add level, but OnData left the book alone
+        monitor.Refresh([aapl])
+        assert monitor.triggers[aapl] == (99.0, float("inf")), "A level already passed is dropped until the next day"
@@ -0,0 +1,48 @@
+from tools.log_phases import analyze_log, find_regressions
+
+SAMPLE_LOG = """\
+2024-10-27T23:13:10.0000000Z TRACE:: Engine.Main(): LEAN ALGORITHMIC TRADING ENGINE v2.5.0.0 Mode: DEBUG (64bit) Host: Mac
+2024-10-27T23:13:10.2000000Z TRACE:: Config.GetValue(): scheduled-event-leaky-bucket-capacity - Using default value: 120
+2024-10-27T23:13:10.5000000Z TRACE:: PythonInitializer.Initialize(): start...
+2024-10-27T23:13:12.5000000Z TRACE:: BacktestingSetupHandler.Setup(): Setting up job: UID: 1, PID: 0, Version: 2.5.0.0, Source: WebIDE
+2024-10-27T23:13:12.6000000Z TRACE:: JOB HANDLERS:
+         DataFeed:             QuantConnect.Lean.Engine.DataFeeds.FileSystemDataFeed
+2024-10-27T23:13:13.0000000Z TRACE:: Debug: Algorithm starting warm up...
+2024-10-27T23:13:13.0100000Z TRACE:: Log: Algorithm finished warming up. (strategy log lines never mark phases)
+2024-10-27T23:13:13.0500000Z TRACE:: Debug: Algorithm finished warming up.
+2024-10-27T23:13:14.0500000Z TRACE:: BacktestingResultHandler.Exit(): starting...
+STATISTICS:: Total Orders 2
+2024-10-27T23:13:14.5500000Z TRACE:: Engine.Main(): Analysis Completed and Results Posted.
+"""
+
+class TestLogPhases:
+
+    def Test_PhaseDurations(self):
+        """Test each phase runs from its marker to the next phase's marker"""
+        phases = analyze_log(SAMPLE_LOG.splitlines(True))
+
+        expected = {"config": 500, "python_import": 2000, "initialize": 100, "data_feed": 400,
+                    "warmup": 50, "main_loop": 1000, "results": 500}
+        for name, duration in expected.items():
+            assert abs(phases[name] - duration) < 1e-6, f"{name} should take {duration} ms, got {phases[name]}"
+
+    def Test_MissingPhases(self):
+        """Test a log without warm-up markers reports those phases as missing"""
+        lines = [line for line in SAMPLE_LOG.splitlines(True) if "warm" not in line]
+        phases = analyze_log(lines)
+
+        assert phases["warmup"] is None and phases["main_loop"] is None, "Missing phases should be None"
+        assert abs(phases["data_feed"] - 1450) < 1e-6, "Data feed should run until the next phase found"
+
+    def Test_Regressions(self):
+        """Test regressions compare medians of consecutive code versions"""
+        def run(version, initialize):
+            phases = dict.fromkeys(["config", "initialize"], 100.0)
+            phases["initialize"] = initialize
+            return {"run": version, "version": version, "phases": phases}
+
+        runs = [run("a", 100.0), run("b", 110.0), run("c", 400.0)]
+        regressions = find_regressions(runs, tolerance=0.25, min_delta_ms=50)
+
+        assert [(current, name) for current, _, name, _, _ in regressions] == [("c", "initialize")], \
+            "Only the 110 -> 400 ms jump should count as a regression"
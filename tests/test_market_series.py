@@ -0,0 +1,93 @@
+from datetime import date, datetime, timezone
+import io
+import json
+import os
+
+from market_series import (DailySeries, MarketSeriesCache, ResampleToDailyCloses, ApplyFactorFile,
+                           ReadInterestRates, SharpeRatio, SortinoRatio)
+from tools.archive import list_artifacts, open_artifact
+
+BACKTESTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backtests")
+
+def _archived_run(name):
+    """The daily closes of an archived run's Strategy Equity chart and LEAN's portfolio statistics for it"""
+    run_dir = os.path.join(BACKTESTS, name)
+    result = next(artifact for artifact in list_artifacts(run_dir) if artifact.endswith(".json") and artifact[:-5].isdigit())
+    with open_artifact(run_dir, result) as handle:
+        result = json.load(handle)
+    closes = {}
+    for time, *_, close in result["charts"]["Strategy Equity"]["series"]["Equity"]["values"]:
+        closes[datetime.fromtimestamp(time, timezone.utc).date()] = close
+    return list(closes.values()), min(closes), max(closes), result["totalPerformance"]["portfolioStatistics"]
+
+class TestMarketSeries:
+
+    def Test_CacheRoundTrip(self):
+        """Test that the binary cache restores both series exactly"""
+        cache = MarketSeriesCache(DailySeries([20100104, 20100105], [113.33, 113.63]),
+                                  DailySeries([20100101], [0.0025]))
+        restored = MarketSeriesCache.FromBytes(cache.ToBytes())
+
+        assert list(restored.benchmark.dates) == [20100104, 20100105], "Benchmark dates should round-trip"
+        assert list(restored.benchmark.values) == [113.33, 113.63], "Benchmark closes should round-trip"
+        assert list(restored.risk_free.values) == [0.0025], "Risk-free rates should round-trip"
+
+        try:
+            MarketSeriesCache.FromBytes(b"XXXX" + cache.ToBytes()[4:])
+            assert False, "A payload with the wrong magic should be rejected"
+        except ValueError:
+            pass
+
+    def Test_AsOfLookup(self):
+        """Test that lookups hold the last value over weekends and before the series starts"""
+        cache = MarketSeriesCache(DailySeries([20100104, 20100108], [100.0, 110.0]),
+                                  DailySeries([20100104], [0.01]))
+
+        assert cache.BenchmarkValue(date(2010, 1, 9)) == 110.0, "Saturday should use Friday's close"
+        assert cache.BenchmarkValue(date(2010, 1, 6)) == 100.0, "Mid-week gap should use the last close"
+        assert cache.BenchmarkValue(date(2010, 1, 1)) == 100.0, "Before the series starts use the first close"
+        assert cache.RiskFreeRate(date(2009, 12, 31)) == 0.0, "No rate before the series starts"
+        assert cache.LastDate() == date(2010, 1, 4), "Last date is the end of the shorter series"
+
+    def Test_ResampleAndAdjust(self):
+        """Test hourly bars resample to the day's last close and factor files adjust earlier dates"""
+        hourly = io.StringIO("20100104 10:00,1000000,1010000,990000,1005000,100\n"
+                             "20100104 16:00,1005000,1020000,1000000,1015000,100\n"
+                             "20100105 10:00,1015000,1020000,1010000,1010000,100\n")
+        series = ResampleToDailyCloses(hourly)
+        assert list(series.dates) == [20100104, 20100105], "One observation per day"
+        assert list(series.values) == [101.5, 101.0], "Daily value should be the last hourly close"
+
+        factors = io.StringIO("20100104,0.5,1,0\n20501231,1,1,0\n")
+        adjusted = ApplyFactorFile(series, factors)
+        assert list(adjusted.values) == [50.75, 101.0], "Factor rows apply to their own date and earlier dates"
+
+        factors = io.StringIO("20100105,0.5,1,0\n20501231,1,1,0\n")
+        adjusted = ApplyFactorFile(series, factors)
+        assert list(adjusted.values) == [50.75, 50.5], "Dates up to and including a factor row should be scaled"
+
+        rates = ReadInterestRates(io.StringIO("Date,Interest Rate\n2010-01-04,0.0025\n"))
+        assert list(rates.dates) == [20100104] and list(rates.values) == [0.0025], "Header should be skipped"
+
+    def Test_RatiosUseRiskFreeRate(self):
+        """Test Sharpe/Sortino subtract the average risk-free rate over the period"""
+        equity = [100.0, 101.0, 100.5, 102.0, 101.0, 103.0]
+        no_rate = MarketSeriesCache(DailySeries([20100101], [1.0]), DailySeries([20100101], [0.0]))
+        with_rate = MarketSeriesCache(DailySeries([20100101], [1.0]), DailySeries([20100101], [0.05]))
+        start, end = date(2010, 1, 1), date(2010, 1, 8)
+
+        assert SharpeRatio(equity, with_rate, start, end) < SharpeRatio(equity, no_rate, start, end), \
+            "A positive risk-free rate should lower the Sharpe ratio"
+        assert SortinoRatio(equity, no_rate, start, end) > SharpeRatio(equity, no_rate, start, end), \
+            "Sortino should exceed Sharpe when losses are smaller than gains"
+        assert SharpeRatio([100.0, 100.0, 100.0], no_rate, start, end) == 0.0, "Flat equity has no Sharpe"
+
+    def Test_RatiosMatchArchivedLeanStatistics(self):
+        """Test Sharpe/Sortino reproduce LEAN's statistics for archived runs, which compound the mean daily return"""
+        # LEAN's average risk-free rate over 2010-2024, implied by 2024-10-27_16-01-20's statistics; the
+        # other run's ratios only match with it when the annual return is compounded, not mean x 252
+        rate = MarketSeriesCache(DailySeries([20100101], [1.0]), DailySeries([20100101], [0.01668]))
+        for name in ("2024-10-23_21-14-51", "2024-10-27_16-01-20"):
+            equity, start, end, statistics = _archived_run(name)
+            assert abs(SharpeRatio(equity, rate, start, end) - float(statistics["sharpeRatio"])) < 0.0005, f"Sharpe of {name}"
+            assert abs(SortinoRatio(equity, rate, start, end) - float(statistics["sortinoRatio"])) < 0.0005, f"Sortino of {name}"
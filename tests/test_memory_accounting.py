@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+import sys
+
+from memory_accounting import DeepSize, MemoryAccountant
+
+class _Algorithm:
+    """Just enough of an algorithm for MemoryAccountant to sample and log against"""
+
+    def __init__(self, symbol_count):
+        self.symbols = [f"SYM{index}" for index in range(symbol_count)]
+        self.state = {symbol: [0.0] * 10 for symbol in self.symbols}
+        self.trades = []
+        self.Time = datetime(2020, 1, 1)
+        self.logs = []
+
+    def Log(self, message):
+        self.logs.append(message)
+
+class TestMemoryAccounting:
+
+    def Test_DeepSizeCountsSharedObjectsOnce(self):
+        """Test shared objects are charged to the first component and excluded objects are skipped"""
+        shared = [1.5, 2.5]
+        seen = set()
+        first = DeepSize({"a": shared}, seen)
+        second = DeepSize({"b": shared}, seen)
+
+        assert first >= sys.getsizeof(shared) + sys.getsizeof({}), "The first walk includes the shared list"
+        assert second < first, "The second walk doesn't count the shared list again"
+        assert DeepSize([shared], set(), exclude={id(shared)}) == sys.getsizeof([shared]), "Excluded objects are skipped"
+
+    def Test_SamplesScaleAndFlagGrowth(self):
+        """Test per-symbol components are scaled from the sample and steadily growing ones are flagged"""
+        algorithm = _Algorithm(500)
+        accountant = MemoryAccountant(algorithm, sample_every_days=1, warning_bytes=1)
+        accountant.AddComponent("state", lambda symbol: algorithm.state[symbol], per_symbol=True)
+        accountant.AddComponent("trades", lambda: algorithm.trades)
+
+        seen = set()
+        exact = sum(DeepSize(algorithm.state[symbol], seen) for symbol in algorithm.symbols)
+        sizes = accountant.Sample()
+        assert abs(sizes["state"] - exact) / exact < 0.05, f"Scaled estimate {sizes['state']} should be near {exact}"
+
+        for day in range(MemoryAccountant.LEAK_SAMPLES):
+            algorithm.Time += timedelta(days=1)
+            algorithm.trades.extend(f"trade {day} {index}" for index in range(20))
+            accountant.LogDaily()
+
+        assert accountant.Trend("trades") > 0, "Growing trade strings show a positive trend"
+        assert accountant.GrowingComponents() == ["trades"], "Only the trade list keeps growing"
+        assert any("WARNING: trades grew" in line for line in algorithm.logs), "The daily report warns about the leak"
+        assert any("above the" in line for line in algorithm.logs), "The size threshold warning is logged"
@@ -0,0 +1,49 @@
+import io
+import json
+import math
+
+from tools.order_events import load_order_events, load_intents, join_orders
+
+EVENTS = [
+    {"orderId": 1, "orderEventId": 1, "symbolValue": "AAPL", "time": 1268341200.0, "status": "submitted",
+     "direction": "buy", "quantity": 100.0, "fillQuantity": 0.0, "fillPrice": 0.0},
+    {"orderId": 1, "orderEventId": 2, "symbolValue": "AAPL", "time": 1268427600.0, "status": "filled",
+     "direction": "buy", "quantity": 100.0, "fillQuantity": 100.0, "fillPrice": 10.10, "orderFeeAmount": 1.0},
+    {"orderId": 2, "orderEventId": 1, "symbolValue": "AAPL", "time": 1268427600.0, "status": "submitted",
+     "direction": "sell", "quantity": -100.0, "fillQuantity": 0.0, "fillPrice": 0.0},
+    {"orderId": 3, "orderEventId": 1, "symbolValue": "AAPL", "time": 1344888000.0, "status": "submitted",
+     "direction": "buy", "quantity": 200.0, "fillQuantity": 0.0, "fillPrice": 0.0},
+    {"orderId": 3, "orderEventId": 2, "symbolValue": "AAPL", "time": 1344974400.0, "status": "filled",
+     "direction": "buy", "quantity": 200.0, "fillQuantity": 200.0, "fillPrice": 19.50, "orderFeeAmount": 1.0},
+]
+
+LOG = [
+    "2010-03-11 16:00:00 Entered Long: AAPL, Quantity: 100, Entry Price: $10.00, Stop: $9.00\n",
+    "2010-03-11 16:00:00   Entered Long: AAPL, Quantity: 100, Entry Price: $10.00, Stop: $9.00\n",
+    "2012-08-13 16:00:00 Entering Long: AAPL, Quantity: 200, Price: 19.4639455355751, Stop: 18.78076433980273\n",
+]
+
+class TestOrderEvents:
+
+    def Test_JoinSubmittedAndFilled(self):
+        """Test orders join their fills and intents into execution-cost metrics"""
+        events = load_order_events(io.StringIO(json.dumps(EVENTS)))
+        intents = load_intents(LOG)
+        orders = join_orders(events, intents)
+
+        assert len(intents) == 2, "Indented report copies of a trade should be ignored"
+        assert list(orders["order_id"]) == [1, 2, 3], "One record per submitted order"
+
+        entry = orders[0]
+        assert entry["fill_delay"] == 86400, "Fill delay is submission to last fill"
+        assert abs(entry["slippage"] - 0.10) < 1e-9, "Buying above the intended price is positive slippage"
+        assert abs(entry["slippage_bps"] - 100) < 1e-6, "0.10 on 10.00 is 100 bps"
+        assert abs(entry["fee_per_share"] - 0.01) < 1e-12, "Fee per share uses the filled quantity"
+
+        exit_order = orders[1]
+        assert math.isnan(exit_order["fill_time"]), "An unfilled order has no fill time"
+        assert math.isnan(exit_order["intended_price"]), "Liquidations have no logged intent"
+
+        older = orders[2]
+        assert abs(older["intended_price"] - 19.4639455355751) < 1e-9, "The older \"Entering ...\" log form is matched"
+        assert abs(older["slippage"] - (19.50 - 19.4639455355751)) < 1e-9, "Older runs get slippage too"
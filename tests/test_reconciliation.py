@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import lean_standin
+
+lean_standin.install()
+
+from AlgorithmImports import OrderStatus, OrderTicket, Symbol, TradeBar
+from main import TurtleTradingStrategy
+from reconciliation import MISSING_STOP, ORPHAN, QUANTITY_MISMATCH, STALE
+
+def _strategy(tickers):
+    """A strategy trading the tickers at $100 with N = $2 for each"""
+    strategy = TurtleTradingStrategy()
+    strategy.LogEnabled = False
+    strategy.Initialize()
+    for ticker in tickers:
+        symbol = Symbol(ticker) if ticker == "AAPL" else strategy.AddTradingSymbol(ticker)
+        strategy.Securities[symbol].Price = 100.0
+        for day in range(strategy.ATR_PERIOD + 1):
+            strategy.atrs[symbol].Update(TradeBar(datetime(2010, 1, 1) + timedelta(days=day), symbol, 100, 101, 99, 100, 1000))
+    return strategy
+
+def _book(strategy, symbol, quantity, stop=None):
+    strategy.entry_prices[symbol] = [100.0]
+    strategy.pyramid_level[symbol] = 1
+    strategy.last_add_price[symbol] = 100.0
+    strategy.position_quantity[symbol] = quantity
+    if stop is not None:
+        strategy.stop_losses[symbol] = stop
+
+class TestReconciliation:
+
+    def Test_ClassifiesAndRepairs(self):
+        """Test orphans, stale entries, missing stops and quantity mismatches are found in one pass and repaired"""
+        strategy = _strategy(["AAPL", "MSFT", "IBM", "TSLA", "NFLX"])
+        aapl, msft, ibm, tsla, nflx = (Symbol(ticker) for ticker in ("AAPL", "MSFT", "IBM", "TSLA", "NFLX"))
+        strategy.Portfolio.ApplyFill(aapl, 100, 95.0)     # Held, not in the book
+        _book(strategy, msft, 40, stop=96.0)              # In the book, not held
+        strategy.Portfolio.ApplyFill(ibm, -50, 100.0)
+        _book(strategy, ibm, -50)                         # No stop
+        strategy.Portfolio.ApplyFill(tsla, 80, 100.0)
+        _book(strategy, tsla, 100, stop=96.0)             # Book expects 100
+        strategy.Portfolio.ApplyFill(nflx, 10, 100.0)
+        _book(strategy, nflx, -10, stop=104.0)            # Held long, booked short
+        unready = strategy.AddTradingSymbol("AMZN")
+        strategy.Portfolio.ApplyFill(unready, 5, 100.0)   # Orphan without N
+
+        strategy.OnWarmupFinished()
+        assert strategy.pyramid_level[aapl] == 1 and strategy.stop_losses[aapl] == 96.0, "The orphan is booked as one unit, stop 2N below"
+        assert strategy.entry_prices[aapl] == [95.0] and strategy.position_quantity[aapl] == 100, "The orphan is booked at its average price"
+        assert msft not in strategy.pyramid_level and msft not in strategy.stop_losses, "The stale entry is removed"
+        assert strategy.stop_losses[ibm] == 104.0, "The missing stop is rebuilt 2N above the short"
+        assert strategy.position_quantity[tsla] == 80 and strategy.stop_losses[tsla] == 96.0, "The book adopts the holding, keeping its stop"
+        assert strategy.position_quantity[nflx] == 10 and strategy.stop_losses[nflx] == 96.0, "A reversed book is rebuilt in the held direction"
+        assert unready not in strategy.pyramid_level, "An orphan without N is left for OnData"
+
+        found = strategy.reconciler.Run("check")
+        assert found[ORPHAN] == [unready], "Only the orphan without N is found again"
+        assert not found[STALE] and not found[MISSING_STOP] and not found[QUANTITY_MISMATCH], "Everything else was repaired"
+
+    def Test_MatchingBookAndOpenOrders(self):
+        """Test a matching book takes the quick path, and an open order counts towards the holding"""
+        strategy = _strategy(["AAPL"])
+        aapl = Symbol("AAPL")
+        strategy.Portfolio.ApplyFill(aapl, 100, 100.0)
+        _book(strategy, aapl, 100, stop=96.0)
+        strategy.reconciler.Seed()
+        assert strategy.reconciler.Matches([]), "A matching book needs no batch classification"
+        assert not any(strategy.reconciler.Run().values()), "A matching book has no issues"
+
+        strategy.Portfolio.ApplyFill(aapl, -100, 100.0)
+        strategy.reconciler.RecordFill(aapl)
+        assert aapl not in strategy.reconciler.held, "The held set follows fills"
+        reentry = OrderTicket(1, aapl, 100, strategy.Time, OrderStatus.Submitted, 0.0)
+        symbols, holding, issues = strategy.reconciler.Classify([reentry])
+        assert holding.tolist() == [100.0], "The open order counts towards the holding"
+        assert not any(mask.any() for mask in issues.values()), "A position awaiting its fill is not stale"
@@ -0,0 +1,136 @@
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import tempfile
+import threading
+import time
+
+import lean_standin
+
+lean_standin.install()
+
+from lean_standin.data import RandomWalkBars
+from lean_standin.engine import Backtest
+from main import TurtleTradingStrategy
+from reporting import DailyReport, LogSink, RenderText, ReportPipeline, WebhookSink
+
+class _Webhook(BaseHTTPRequestHandler):
+    """Local HTTP stand-in for a webhook: fails the first `failures` POSTs with a 500, then records the rest"""
+
+    failures = 0
+    received = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if _Webhook.failures:
+            _Webhook.failures -= 1
+            self.send_response(500)
+        else:
+            _Webhook.received.append(json.loads(body))
+            self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+def _report(day):
+    return DailyReport(datetime(2010, 1, day, 16), 100.0, 100.0, 0.0, [], [], 100.0, 100.0, [(100.0, 100.0)])
+
+class _BlockedSink:
+    name = "blocked"
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.delivered = []
+
+    def Deliver(self, report):
+        self.release.wait()
+        self.delivered.append(report.time.day)
+
+class TestReporting:
+
+    def Test_DeliversToLogFileAndWebhook(self):
+        """Test every report of a backtest reaches the log, the report directory and a webhook"""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Webhook)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        _Webhook.failures, _Webhook.received = 0, []
+        directory = tempfile.mkdtemp()
+        try:
+            history = RandomWalkBars(["AAPL"], date(2009, 10, 1), 200, seed=7, drift=0.0008)
+            result = Backtest(TurtleTradingStrategy, history, end=date(2010, 1, 8), parameters={
+                "report-directory": directory, "report-webhook": f"http://127.0.0.1:{server.server_address[1]}/report"})
+            reporting = result.Algorithm.reporting
+        finally:
+            server.shutdown()
+
+        # A backtest delivers each report as it is captured, so none are dropped
+        assert reporting.submitted == reporting.delivered == result.TradingDays and not reporting.dropped, "Every report is delivered"
+        assert sum("===== Portfolio State as of" in line for line in result.Logs) == result.TradingDays, "Every report is logged"
+        assert "report-2010-01-08.html" in os.listdir(directory), "Reports are written as HTML, one per day"
+        last = _Webhook.received[-1]
+        assert len(_Webhook.received) == result.TradingDays and last["time"] == "2010-01-08 16:00:00" and last["text"].startswith("===== Portfolio State"), "The webhook gets the data and text rendering"
+
+    def Test_BackpressureNeverBlocks(self):
+        """Test a stalled sink never blocks Submit and drops the oldest reports, and failing sinks are retried"""
+        strategy = TurtleTradingStrategy()
+        sink = _BlockedSink()
+        pipeline = ReportPipeline(strategy, [sink], queue_size=3)
+        started = time.perf_counter()
+        pipeline.Submit(_report(1))
+        while pipeline.queue:
+            time.sleep(0.001)  # Until the worker is stuck delivering the first report
+        for day in range(2, 11):
+            pipeline.Submit(_report(day))
+        assert time.perf_counter() - started < 1, "Submit returns while the sink is stalled"
+        sink.release.set()
+        assert pipeline.Close(5)
+        assert sink.delivered == [1, 8, 9, 10], "The newest reports are kept"
+        assert pipeline.dropped == 6 and pipeline.delivered == 4, "Superseded reports are counted as dropped"
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Webhook)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        _Webhook.failures, _Webhook.received = 1, []
+        try:
+            retried = ReportPipeline(strategy, [WebhookSink(f"http://127.0.0.1:{server.server_address[1]}/report")], backoff=0.01)
+            retried.Submit(_report(1))
+            assert retried.Close(10) and retried.delivered == 1 and len(_Webhook.received) == 1, "A 500 is retried"
+        finally:
+            server.shutdown()
+
+        stuck = ReportPipeline(strategy, [_BlockedSink()], queue_size=3)
+        stuck.Submit(_report(1))
+        while stuck.queue:
+            time.sleep(0.001)
+        for day in range(2, 4):
+            stuck.Submit(_report(day))
+        assert not stuck.Close(0.05), "Close gives up on a stalled sink after its timeout"
+        assert any("still running after 0.05s: 2 reports queued, 3 of 3 not delivered" in line for line in strategy.Logs), \
+            "The reports left behind are logged"
+        stuck.sinks[0].release.set()
+
+        failing = ReportPipeline(strategy, [WebhookSink("http://127.0.0.1:9/unreachable", timeout=1)], attempts=2, backoff=0.01)
+        failing.Submit(_report(1))
+        assert failing.Close(10) and failing.failed == 1 and failing.delivered == 0, "An unreachable sink fails after its attempts"
+        assert any("not delivered to webhook after 2 attempts" in line for line in strategy.Logs), "The failure is logged"
+        assert RenderText(_report(1))[-1] == "  At $100.00 -> Use $100.00", "The text rendering ends with the drawdown levels"
+
+    def Test_BacktestNeverWaitsOnWebhook(self):
+        """Test a backtest's Submit logs at once and leaves a failing webhook, and its retries, to the worker"""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Webhook)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        _Webhook.failures, _Webhook.received = 100, []
+        strategy = TurtleTradingStrategy()
+        try:
+            pipeline = ReportPipeline(strategy, [LogSink(strategy), WebhookSink(f"http://127.0.0.1:{server.server_address[1]}/report")],
+                                      attempts=2, backoff=0.2, inline=True)
+            started = time.perf_counter()
+            for day in range(1, 4):
+                pipeline.Submit(_report(day))
+            assert time.perf_counter() - started < 0.1, "Submit returns while the webhook fails and backs off"
+            assert sum("===== Portfolio State" in line for line in strategy.Logs) == 3, "Each report is logged as it is submitted"
+            assert pipeline.Close(10) and pipeline.failed == 3 and pipeline.delivered == 0 and not pipeline.dropped, \
+                "Every report is kept for the webhook, which fails each after its attempts"
+        finally:
+            server.shutdown()
+            _Webhook.failures = 0
@@ -0,0 +1,88 @@
+from datetime import date
+
+import lean_standin
+
+lean_standin.install()
+
+from AlgorithmImports import Symbol
+from lean_standin.data import RandomWalkBars
+from lean_standin.engine import Backtest
+from main import TurtleTradingStrategy
+from risk_limits import ParseGroups, UnitLimits
+
+TICKERS = ["AAPL", "MSFT", "IBM", "XOM", "CVX", "JPM"]
+
+class _Basket(TurtleTradingStrategy):
+    """Trades TICKERS and, after each slice, compares the unit counts with a recount of the book"""
+
+    def Initialize(self):
+        super().Initialize()
+        for ticker in TICKERS[1:]:
+            self.AddTradingSymbol(ticker)
+        self.most_units = {1: 0, -1: 0}
+        self.miscounts = 0
+
+    def OnData(self, slice):
+        super().OnData(slice)
+        if not self.risk_limits:
+            return
+        recount = UnitLimits(self.risk_limits.limits, self.risk_limits.close_groups, self.risk_limits.loose_groups)
+        for symbol in self.symbols:
+            recount.Add(symbol)
+        recount.Rebuild(self.systems)
+        self.miscounts += recount.counts != {key: units for key, units in self.risk_limits.counts.items() if units}
+        for direction in (1, -1):
+            self.most_units[direction] = max(self.most_units[direction], self.risk_limits.Units(direction))
+
+class TestRiskLimits:
+
+    def Test_CountsAndLimits(self):
+        """Test each limit refuses the unit past it, in its direction only, and regrouping moves the units held"""
+        aapl, msft, ibm, xom, jpm = (Symbol(ticker) for ticker in ("AAPL", "MSFT", "IBM", "XOM", "JPM"))
+        assert ParseGroups("AAPL, MSFT;XOM,CVX") == {"AAPL": "AAPL", "MSFT": "AAPL", "XOM": "XOM", "CVX": "XOM"}
+        limits = UnitLimits((4, 6, 10, 12), ParseGroups("AAPL,MSFT"), ParseGroups("AAPL,MSFT,IBM,XOM"))
+        for symbol in (aapl, msft, ibm, xom, jpm):
+            limits.Add(symbol)
+
+        limits.Record("2", aapl, 3)
+        assert limits.Check(aapl, 1) is None, "The fourth unit in a market is allowed"
+        limits.Record("1", aapl, 1)
+        assert limits.Check(aapl, 1) == "market" and limits.Check(aapl, -1) is None, "The fifth is refused, short units are not"
+        limits.Record("2", msft, 2)
+        assert limits.Check(msft, 1) == "close group", "Six units in the close group"
+        limits.Record("2", ibm, 2)
+        limits.Record("2", xom, 2)
+        assert limits.Check(ibm, 1) == "loose group" and limits.Check(jpm, 1) is None, "Ten units in the loose group"
+        limits.Record("2", jpm, 2)
+        assert limits.Check(jpm, 1) == "direction" and limits.Units(1) == 12, "Twelve long units across the portfolio"
+
+        limits.Record("2", aapl, -2)
+        assert limits.Units(1) == 9 and limits.Units(-1) == 2 and limits.Check(jpm, 1) is None, "A reversal moves the units to the other side"
+        limits.SetGroups(jpm, "AAPL", "AAPL")
+        assert limits.Groups(jpm) == ("AAPL", "AAPL") and limits.counts[("close", "AAPL", 1)] == 5, "Regrouping moves the units held"
+        assert limits.counts[("close", "JPM", 1)] == 0 and limits.Units(1) == 9, "Out of the old group, the portfolio count unchanged"
+        for symbol in (aapl, msft, ibm, xom, jpm):
+            for system in ("1", "2"):
+                limits.Record(system, symbol, 0)
+        assert not any(limits.counts.values()) and not any(limits.units.values()), "Closing everything empties the counts"
+
+        try:
+            UnitLimits((4, 6, 10))
+            assert False, "Every limit is needed"
+        except ValueError:
+            pass
+
+    def Test_BacktestStaysWithinLimits(self):
+        """Test a basket backtest keeps the counts equal to the book and never exceeds a limit"""
+        history = RandomWalkBars(TICKERS, date(2009, 10, 1), 365 * 3, seed=19)
+        result = Backtest(_Basket, history, end=date(2012, 6, 30), parameters={
+            "unit-limits": "4,6,10,8", "close-groups": "AAPL,MSFT,IBM;XOM,CVX"})
+        strategy = result.Algorithm
+
+        assert strategy.miscounts == 0, "The incremental counts match a recount after every slice"
+        assert 0 < max(strategy.most_units.values()) <= 8, "Units on in one direction stay within the limit"
+        assert any("Unit limit reached" in line for line in result.Logs), "Units past a limit are refused and logged"
+        assert strategy.risk_limits.Groups(Symbol("CVX")) == ("XOM", "CVX"), "Groups come from the parameters"
+
+        unlimited = Backtest(_Basket, history, end=date(2012, 6, 30), log=False, parameters={"unit-limits": "off"})
+        assert unlimited.Algorithm.risk_limits is None and len(unlimited.Orders) != len(result.Orders), "Limits can be turned off"
@@ -0,0 +1,81 @@
+from datetime import date
+import threading
+import time
+
+import lean_standin
+
+lean_standin.install()
+
+from AlgorithmImports import ObjectStore
+from benchmarks.golden import SCENARIOS
+from lean_standin.engine import Backtest
+from sampling_profiler import PROFILE_KEY, SamplingProfiler
+
+class _Algorithm:
+    """An algorithm whose Work method samples its own stack"""
+
+    def __init__(self):
+        self.ObjectStore = ObjectStore()
+        self.logs = []
+
+    def Work(self, profiler):
+        return self._Helper(profiler)
+
+    def _Helper(self, profiler):
+        profiler.Sample()
+
+    def Busy(self, profiler, seconds):
+        profiler.Bind()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            sum(range(1000))
+
+    def Log(self, message):
+        self.logs.append(message)
+
+class TestSamplingProfiler:
+
+    def Test_StacksStartAtAlgorithmMethods(self):
+        """Test samples are trimmed to the outermost algorithm method and folded on save"""
+        algorithm = _Algorithm()
+        profiler = SamplingProfiler(algorithm)
+        profiler.target = threading.get_ident()
+
+        algorithm.Work(profiler)
+        algorithm.Work(profiler)
+        profiler.Sample()  # Outside the algorithm's methods
+        profiler.Save()
+
+        lines = algorithm.ObjectStore.Read(PROFILE_KEY).splitlines()
+        assert lines == ["test_sampling_profiler.py:Work;test_sampling_profiler.py:_Helper;sampling_profiler.py:Sample 2"], f"Unexpected folded stacks {lines}"
+        assert profiler.idle == 1, "Samples outside algorithm methods count as idle"
+        assert algorithm.logs[0].startswith("Sampling profiler: 2 strategy samples, 1 idle"), "Save logs a summary"
+
+    def Test_SamplesTheThreadThatBinds(self):
+        """Test a profiler started on one thread (LEAN's setup thread) samples the thread that binds it"""
+        algorithm = _Algorithm()
+        profiler = SamplingProfiler(algorithm, interval=0.001)
+        setup = threading.Thread(target=profiler.Start)
+        setup.start()
+        setup.join()
+        time.sleep(0.02)
+        assert profiler.target is None and profiler.idle == 0 and not profiler.stacks, "Nothing is sampled before binding"
+
+        worker = threading.Thread(target=algorithm.Busy, args=(profiler, 0.2))
+        worker.start()
+        worker.join()
+        profiler.Save()
+        assert profiler.target == worker.ident, "The binding thread is sampled"
+        assert any(codes[0].co_name == "Busy" for codes in profiler.stacks), "Its work is sampled, not only idle time"
+
+    def Test_ParameterEnablesProfilerInBacktest(self):
+        """Test the profile-sampling parameter attaches the profiler and saves OnData stacks at the end"""
+        scenario = SCENARIOS[-1]
+        result = Backtest(scenario.Strategy(), scenario.History(), end=date(2013, 1, 1), log=False,
+                          parameters={"profile-sampling": "true", "profile-interval-ms": "1"})
+
+        lines = result.Algorithm.ObjectStore.Read(PROFILE_KEY).splitlines()
+        assert lines, "A profiled run saves folded stacks"
+        assert any(line.startswith("main.py:OnData") for line in lines), "OnData stacks are sampled"
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines), "Every line ends with its sample count"
+        assert result.Algorithm.sampling_profiler.thread is None, "Sampling stops at the end of the run"
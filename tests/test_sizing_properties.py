@@ -0,0 +1,146 @@
+import lean_standin
+
+lean_standin.install()
+
+import numpy as np
+
+from AlgorithmImports import Security, Resolution, Symbol
+from main import TurtleTradingStrategy
+
+PEAKS = 1000            # Distinct peaks, each with its own drawdown map
+CASES_PER_PEAK = 2000   # 2,000,000 cases in total
+SAMPLE = 2000           # Cases cross-checked against, and monotonicity asserted on, the real methods
+SWEEP_PEAKS = 20        # Peaks whose values are swept in order through the real GetAvailablePortfolioValue
+MIN_VALUE = 100
+
+def _strategy():
+    strategy = TurtleTradingStrategy()
+    strategy.LogEnabled = False
+    strategy.Initialize()
+    return strategy
+
+def _peaks(rng):
+    """Log-uniform peaks from $10k to $100M"""
+    return np.exp(rng.uniform(np.log(1e4), np.log(1e8), PEAKS))
+
+def _set_portfolio(strategy, peak, value, drawdown_map=None):
+    """Give the real strategy a peak, its drawdown map and a current portfolio value"""
+    strategy.peak_portfolio_value = peak
+    strategy.drawdown_map = drawdown_map or strategy.CreateDrawdownMap(peak, MIN_VALUE)
+    strategy.Portfolio.TotalPortfolioValue = value
+
+def _map_arrays(strategy, peak):
+    """The real drawdown map for a peak as ascending (actual, effective) arrays"""
+    drawdown_map = strategy.CreateDrawdownMap(peak, MIN_VALUE)
+    actual = np.array(sorted(drawdown_map))
+    return actual, np.array([drawdown_map[key] for key in actual])
+
+def _effective_values(strategy, peaks, values):
+    """
+    Vectorized mirror of GetAvailablePortfolioValue: values[i] is looked up in the map built from
+    peaks[i // CASES_PER_PEAK]. Searching ascending keys with side="left" finds the level at or
+    just above the value, which is the level LookupEffectiveValue stops at; values above the peak
+    are a new peak and return themselves.
+    """
+    effective = np.empty_like(values)
+    for index, peak in enumerate(peaks):
+        block = slice(index * CASES_PER_PEAK, (index + 1) * CASES_PER_PEAK)
+        actual, levels = _map_arrays(strategy, peak)
+        positions = np.minimum(np.searchsorted(actual, values[block], side="left"), len(actual) - 1)
+        effective[block] = np.where(values[block] > peak, values[block], levels[positions])
+    return effective
+
+def _value_cases(rng, peaks):
+    """Current values from 30% to 130% of each peak, with exact map keys mixed in to hit the ties"""
+    strategy = _strategy()
+    ratios = rng.uniform(0.3, 1.3, PEAKS * CASES_PER_PEAK)
+    values = np.repeat(peaks, CASES_PER_PEAK) * ratios
+    for index, peak in enumerate(peaks):
+        actual, _ = _map_arrays(strategy, peak)
+        values[index * CASES_PER_PEAK:index * CASES_PER_PEAK + len(actual)] = actual
+    return strategy, values
+
+class TestSizingProperties:
+
+    def Test_DrawdownMapInvariants(self):
+        """Test every map level against the closed form and its ordering and floor invariants"""
+        strategy = _strategy()
+        for peak in _peaks(np.random.default_rng(35)):
+            actual, effective = _map_arrays(strategy, peak)
+            levels = np.arange(len(actual))[::-1]  # Ascending keys, so the deepest level comes first
+
+            # Level i: effective = peak * 0.8^i, actual = peak * (1 + 0.8^i) / 2
+            assert np.allclose(effective, peak * 0.8 ** levels, rtol=1e-12), f"Effective levels off for peak {peak}"
+            assert np.allclose(actual, peak * (1 + 0.8 ** levels) / 2, rtol=1e-12), f"Actual levels off for peak {peak}"
+            assert actual[-1] == peak and effective[-1] == peak, "The top level maps the peak to itself"
+            assert np.all(np.diff(actual) > 0) and np.all(np.diff(effective) > 0), "Levels must be strictly ordered"
+            assert np.all(effective <= actual), "Effective value never exceeds the actual value"
+            assert effective[0] >= MIN_VALUE and effective[0] * 0.8 <= MIN_VALUE, "Levels stop at min_value"
+
+    def Test_AvailableValueInvariants(self):
+        """Test monotonicity, bounds and the 2x drawdown rule over two million (peak, value) cases"""
+        rng = np.random.default_rng(36)
+        peaks = _peaks(rng)
+        strategy, values = _value_cases(rng, peaks)
+        effective = _effective_values(strategy, peaks, values)
+        case_peaks = np.repeat(peaks, CASES_PER_PEAK)
+
+        in_drawdown = values <= case_peaks
+        assert np.all(effective[~in_drawdown] == values[~in_drawdown]), "A new peak is used as-is"
+        assert np.all(effective[in_drawdown] <= case_peaks[in_drawdown]), "Effective value never exceeds the peak"
+        assert np.all(effective >= MIN_VALUE), "Effective value never drops below min_value"
+        drawdown = (case_peaks - values)[in_drawdown]
+        effective_drawdown = (case_peaks - effective)[in_drawdown]
+        assert np.all(effective_drawdown <= 2 * drawdown * (1 + 1e-12) + 1e-6), "Effective drawdown is at most twice the actual"
+
+        # The mirror must agree exactly with the real method
+        for index in rng.choice(len(values), SAMPLE, replace=False):
+            peak = peaks[index // CASES_PER_PEAK]
+            _set_portfolio(strategy, peak, values[index])
+            assert strategy.GetAvailablePortfolioValue() == effective[index], f"Mirror disagrees for peak {peak}, value {values[index]}"
+
+        # Monotonicity on the real method: each peak's values (map keys included) in ascending order
+        for index in rng.choice(PEAKS, SWEEP_PEAKS, replace=False):
+            peak = peaks[index]
+            drawdown_map = strategy.CreateDrawdownMap(peak, MIN_VALUE)
+            previous = 0.0
+            for value in np.sort(values[index * CASES_PER_PEAK:(index + 1) * CASES_PER_PEAK]):
+                _set_portfolio(strategy, peak, value, drawdown_map)
+                available = strategy.GetAvailablePortfolioValue()
+                assert available >= previous, f"Effective value fell from {previous} to {available} at {value} (peak {peak})"
+                previous = available
+
+    def Test_PositionSizeInvariants(self):
+        """Test quantity >= 1, risk <= RISK_PER_TRADE of the effective value, and monotonicity in N and equity on the real method"""
+        rng = np.random.default_rng(37)
+        peaks = _peaks(rng)
+        strategy, values = _value_cases(rng, peaks)
+        effective = _effective_values(strategy, peaks, values)
+        prices = np.exp(rng.uniform(np.log(1.0), np.log(5000.0), len(values)))
+        atrs = prices * rng.uniform(0.001, 0.2, len(values))
+        long_side = rng.random(len(values)) < 0.5
+        stops = np.where(long_side, prices - atrs * strategy.ATR_MULTIPLIER, prices + atrs * strategy.ATR_MULTIPLIER)
+
+        # Mirror of CalculatePositionSize, operation for operation
+        risk_amount = effective * strategy.RISK_PER_TRADE
+        risk_per_share = np.abs(prices - stops)
+        quantities = np.maximum(1, np.floor(risk_amount / risk_per_share))
+
+        assert np.all(quantities >= 1), "Quantity is at least one share"
+        floored = quantities == 1
+        assert np.all((quantities * risk_per_share <= risk_amount)[~floored]), "Risk never exceeds RISK_PER_TRADE of the effective value"
+
+        security = Security(Symbol("SIZE"), Resolution.Daily)
+        for index in rng.choice(len(values), SAMPLE, replace=False):
+            peak = peaks[index // CASES_PER_PEAK]
+            drawdown_map = strategy.CreateDrawdownMap(peak, MIN_VALUE)
+            security.Price = prices[index]
+            wider_stop = prices[index] + (stops[index] - prices[index]) * 1.5
+
+            _set_portfolio(strategy, peak, values[index], drawdown_map)
+            quantity = strategy.CalculatePositionSize(security, stops[index])
+            assert quantity == quantities[index], f"Mirror disagrees for case {index}"
+            _set_portfolio(strategy, peak, values[index], drawdown_map)
+            assert strategy.CalculatePositionSize(security, wider_stop) <= quantity, f"A wider stop (larger N) bought more shares in case {index}"
+            _set_portfolio(strategy, peak, values[index] * 1.5, drawdown_map)
+            assert strategy.CalculatePositionSize(security, stops[index]) >= quantity, f"More equity bought fewer shares in case {index}"
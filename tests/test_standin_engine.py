@@ -0,0 +1,58 @@
+from datetime import date
+
+import lean_standin
+
+lean_standin.install()
+
+from AlgorithmImports import QCAlgorithm, Resolution
+from lean_standin.data import RandomWalkBars
+from lean_standin.engine import Backtest
+from main import TurtleTradingStrategy
+
+class _Recorder(QCAlgorithm):
+    """Records the order in which the engine calls into the algorithm"""
+
+    def Initialize(self):
+        self.SetStartDate(2020, 1, 6)
+        self.SetEndDate(2020, 1, 12)
+        self.symbol = self.AddEquity("SPY", Resolution.Daily).Symbol
+        self.calls = []
+        self.Schedule.On(self.DateRules.EveryDay(), self.TimeRules.At(16, 0), lambda: self.calls.append(("close", self.Time)))
+        self.Schedule.On(self.DateRules.EveryDay(self.symbol), self.TimeRules.At(9, 0), lambda: self.calls.append(("open", self.Time)))
+
+    def OnData(self, slice):
+        self.calls.append(("data", slice.Time))
+
+class TestStandinEngine:
+
+    def Test_ScheduledEventsAndDataOrder(self):
+        """Test events fire every calendar day (symbol rules on trading days only) and before same-time data"""
+        result = Backtest(_Recorder, RandomWalkBars(["SPY"], date(2020, 1, 1), 30))
+        calls = result.Algorithm.calls
+
+        assert result.CalendarDays == 7 and result.TradingDays == 5, "Mon-Sun covers 7 days, 5 with bars"
+        assert sum(1 for name, _ in calls if name == "close") == 7, "EveryDay() fires on weekends too"
+        assert sum(1 for name, _ in calls if name == "open") == 5, "EveryDay(symbol) only fires on trading days"
+        monday = [(name, time.hour) for name, time in calls[:3]]
+        assert monday == [("open", 9), ("close", 16), ("data", 16)], f"Events due at the close run before its data, got {monday}"
+
+    def Test_StrategyRunsWholeLifecycle(self):
+        """Test the real strategy enters, pyramids and exits over a multi-year random walk, deterministically"""
+        history = RandomWalkBars(["AAPL"], date(2009, 11, 1), 365 * 6, seed=7)
+        first = Backtest(TurtleTradingStrategy, history, end=date(2015, 10, 1), log=False)
+        second = Backtest(TurtleTradingStrategy, history, end=date(2015, 10, 1), log=False)
+
+        assert len(first.Orders) > 10, "Six years of random walk should trade"
+        assert [order.Quantity for order in first.Orders] == [order.Quantity for order in second.Orders], "Runs must be deterministic"
+        assert first.Equity == second.Equity, "Equity curves must be deterministic"
+        assert first.Algorithm.stop_losses.keys() == first.Algorithm.pyramid_level.keys(), "Tracking stays consistent"
+        assert max(first.Algorithm.pyramid_level.values(), default=0) <= 4, "Never more than four units"
+
+    def Test_WarmUpPrecedesStartDate(self):
+        """Test warm-up days are delivered with IsWarmingUp set and no orders placed"""
+        history = RandomWalkBars(["AAPL"], date(2009, 11, 1), 120)
+        result = Backtest(TurtleTradingStrategy, history, end=date(2010, 1, 1))
+
+        assert result.CalendarDays == 56, "55 warm-up days before the start date, plus the start date"
+        assert not result.Orders, "Nothing trades during warm-up"
+        assert not any("Processing slice at 2009" in line for line in result.Logs), "OnData skips warm-up slices"
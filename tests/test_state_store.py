@@ -0,0 +1,107 @@
+from datetime import date
+
+import lean_standin
+
+lean_standin.install()
+
+from AlgorithmImports import ObjectStore, Symbol
+from lean_standin.data import RandomWalkBars
+from lean_standin.engine import Backtest
+from main import TurtleTradingStrategy
+from intent_journal import JOURNAL_KEY
+from state_store import RunKey, STATE_DELTA_KEY, STATE_KEY
+
+# Runs that are not live keep their state apart from the live deployment's
+STATE_KEY, STATE_DELTA_KEY = RunKey(STATE_KEY, False), RunKey(STATE_DELTA_KEY, False)
+
+def _strategy(object_store, **parameters):
+    strategy = TurtleTradingStrategy()
+    strategy.LogEnabled = False
+    strategy.ObjectStore = object_store
+    strategy.SetParameters(parameters)
+    strategy.Initialize()
+    return strategy
+
+def _contents(object_store):
+    object_store.ContainsKey(RunKey(JOURNAL_KEY, False))  # Picks up the journal file
+    return {key: object_store.ReadBytes(key) for key in object_store.Keys}
+
+def _book(strategy):
+    return (dict(strategy.stop_losses), dict(strategy.entry_prices), dict(strategy.pyramid_level),
+            dict(strategy.last_add_price), strategy.peak_portfolio_value)
+
+class TestStateStore:
+
+    def Test_SnapshotAndDeltaRestore(self):
+        """Test a restart restores the snapshot plus the day's delta, and ignores stale or unreadable state"""
+        store = ObjectStore()
+        strategy = _strategy(store, **{"persist-state": "true"})
+        aapl, msft = Symbol("AAPL"), strategy.AddTradingSymbol("MSFT")
+        strategy.stop_losses.update({aapl: 90.0, msft: 210.0})
+        strategy.entry_prices.update({aapl: [100.0, 102.5], msft: [200.0]})
+        strategy.pyramid_level.update({aapl: 2, msft: 1})
+        strategy.last_add_price.update({aapl: 102.5, msft: 200.0})
+        strategy.state_store.SaveSnapshot()
+        assert not strategy.state_store.SaveDelta(), "No delta is written when nothing changed"
+
+        # Intraday: add a unit to AAPL, close MSFT and reach a new peak
+        strategy.entry_prices[aapl].append(105.0)
+        strategy.pyramid_level[aapl], strategy.last_add_price[aapl], strategy.stop_losses[aapl] = 3, 105.0, 95.0
+        strategy.state_store.MarkDirty(aapl)
+        strategy.CleanupPosition(msft)
+        strategy.peak_portfolio_value = 1250000
+        assert strategy.state_store.SaveDelta(), "Changes since the snapshot are written as a delta"
+        assert store.ContainsKey(STATE_DELTA_KEY), "The delta is stored under its own key"
+
+        restored = _strategy(store, **{"restore-state": "true", "persist-state": "true"})
+        assert _book(restored) == _book(strategy), "Snapshot plus delta restores the book and peak"
+        assert restored.drawdown_map == restored.CreateDrawdownMap(1250000), "The drawdown map is rebuilt from the peak"
+        assert not store.ContainsKey(STATE_DELTA_KEY), "Restoring folds the delta into a new snapshot"
+
+        # A delta written against an older snapshot is ignored
+        stale = store.ReadBytes(STATE_KEY)
+        restored.stop_losses[aapl] = 97.0
+        restored.state_store.MarkDirty(aapl)
+        restored.state_store.SaveDelta()
+        restored.state_store.SaveSnapshot()
+        snapshot = store.ReadBytes(STATE_KEY)
+        store.SaveBytes(STATE_DELTA_KEY, b"TTSD" + stale[4:])
+        again = _strategy(store, **{"restore-state": "true", "persist-state": "true"})
+        assert again.stop_losses[aapl] == 97.0, "A delta with another snapshot's sequence is not applied"
+        assert store.ReadBytes(STATE_KEY) != snapshot, "The restored book is snapshotted again"
+
+        store.SaveBytes(STATE_KEY, b"TTSS\x09" + stale[5:])
+        empty = _strategy(store, **{"restore-state": "true"})
+        assert not empty.stop_losses and not empty.pyramid_level, "Unreadable state starts an empty book"
+
+    def Test_BacktestRestart(self):
+        """Test a strategy restarted mid-run picks up the stops and pyramid levels the first run left"""
+        history = RandomWalkBars(["AAPL"], date(2009, 10, 1), 900, seed=7, drift=0.0008)
+        store = ObjectStore()
+        first = Backtest(TurtleTradingStrategy, history, end=date(2010, 11, 27), log=False,
+                         parameters={"persist-state": "true"}, object_store=store)
+        assert first.Algorithm.pyramid_level, "The first run should end holding a position"
+
+        restarted = TurtleTradingStrategy()
+        restarted.LogEnabled = True
+        restarted.ObjectStore = store
+        restarted.SetParameters({"restore-state": "true"})
+        restarted.Initialize()
+        assert _book(restarted) == _book(first.Algorithm), "The restarted strategy has the first run's book"
+        assert any("Restored strategy state" in line for line in restarted.Logs), "The restore is logged"
+        assert STATE_KEY.startswith("turtle/backtest/") and RunKey("turtle/state.bin", True) == "turtle/state.bin", \
+            "Backtests keep their state apart from live state"
+
+    def Test_RestoreOnlyIsReadOnly(self):
+        """Test a backtest that restores without persisting leaves the ObjectStore untouched"""
+        history = RandomWalkBars(["AAPL"], date(2009, 10, 1), 900, seed=7, drift=0.0008)
+        store = ObjectStore()
+        first = Backtest(TurtleTradingStrategy, history, end=date(2010, 11, 27), log=False,
+                         parameters={"persist-state": "true"}, object_store=store)
+        saved = _contents(store)
+        assert STATE_KEY in saved and first.Algorithm.pyramid_level, "The first run persisted a position"
+
+        restored = Backtest(TurtleTradingStrategy, history, end=date(2011, 3, 1), log=False,
+                            parameters={"restore-state": "true"}, object_store=store)
+        assert restored.Algorithm.Time.date() > date(2010, 12, 1) and restored.Orders, "The restored run traded on"
+        assert _contents(store) == saved, "No snapshot, delta, checkpoint or journal record was written"
@@ -0,0 +1,78 @@
+from datetime import date
+import io
+import os
+import tempfile
+
+import numpy as np
+
+import lean_standin
+
+lean_standin.install()
+
+from lean_standin.data import ReadLeanDailyZip
+from lean_standin.engine import Backtest
+from main import TurtleTradingStrategy
+from market_series import ApplyFactorFile, DailySeries
+from tools.synthetic_data import generate, write_lean, write_npz, read_npz
+
+class TestSyntheticData:
+
+    def Test_ReproducibleAcrossChunkSizes(self):
+        """Test a seed gives the same symbols whatever the chunk size, and another seed different ones"""
+        whole = next(generate(12, 3, seed=5, chunk_symbols=12, split_rate=1.0))
+        chunks = list(generate(12, 3, seed=5, chunk_symbols=5, split_rate=1.0))
+
+        assert [chunk.first_index for chunk in chunks] == [0, 5, 10], "Chunks start at multiples of chunk_symbols"
+        assert sum((chunk.tickers for chunk in chunks), []) == whole.tickers, "Tickers do not depend on chunking"
+        for name in ("open", "high", "low", "close", "volume", "factor"):
+            assert np.array_equal(np.concatenate([getattr(chunk, name) for chunk in chunks]), getattr(whole, name),
+                                  equal_nan=True), f"{name} should not depend on chunking"
+        assert sum((chunk.splits for chunk in chunks), []) == whole.splits, "Splits should not depend on chunking"
+
+        other = next(generate(12, 3, seed=6, chunk_symbols=12))
+        assert not np.array_equal(other.close, whole.close, equal_nan=True), "Another seed gives other prices"
+
+        traded = ~np.isnan(whole.close)
+        assert np.all((whole.high >= np.fmax(whole.open, whole.close))[traded]), "High is the top of the bar"
+        assert np.all((whole.low <= np.fmin(whole.open, whole.close))[traded]), "Low is the bottom of the bar"
+        assert np.all(whole.low[traded] > 0) and np.all(whole.volume[~traded] == 0), "Prices are positive; halts have no volume"
+        assert whole.splits and (~traded).any(), "The universe should contain splits and halts"
+
+    def Test_LeanFormatRoundTrip(self):
+        """Test the zips hold the raw bars and the factor files adjust them back to split-adjusted closes"""
+        chunk = next(generate(6, 4, seed=9, split_rate=1.0))
+        with tempfile.TemporaryDirectory() as root:
+            write_lean(chunk, root)
+            folder = os.path.join(root, "equity", "usa")
+            for row, ticker in enumerate(chunk.tickers):
+                bars = ReadLeanDailyZip(os.path.join(folder, "daily", f"{ticker.lower()}.zip"))
+                traded = np.flatnonzero(~np.isnan(chunk.close[row]))
+                assert len(bars) == len(traded), f"{ticker}: one bar per traded day, none while halted"
+                closes = np.array([bar[4] for bar in bars])
+                assert np.allclose(closes, chunk.close[row, traded], atol=1e-4), f"{ticker}: raw closes in deci-cents"
+
+                with open(os.path.join(folder, "factor_files", f"{ticker.lower()}.csv")) as handle:
+                    lines = handle.read()
+                series = DailySeries([int(bar[0].strftime("%Y%m%d")) for bar in bars], closes.tolist())
+                adjusted = ApplyFactorFile(series, io.StringIO(lines))
+                expected = chunk.close[row, traded] * chunk.factor[row, traded]
+                assert np.allclose(adjusted.values, expected, rtol=1e-6, atol=1e-4), f"{ticker}: factor file adjusts the raw closes"
+                splits = sum(1 for split in chunk.splits if split[0] == ticker)
+                assert len(lines.splitlines()) == splits + 1, f"{ticker}: one factor row per split plus the final row"
+
+    def Test_ColumnarRoundTripFeedsBacktest(self):
+        """Test npz chunks read back unchanged and their history drives a backtest"""
+        chunks = list(generate(4, 3, seed=3, chunk_symbols=2, start=date(2009, 9, 1), listing_share=0.0))
+        with tempfile.TemporaryDirectory() as root:
+            for chunk in chunks:
+                write_npz(chunk, root)
+            restored = list(read_npz(root))
+        assert [chunk.tickers for chunk in restored] == [chunk.tickers for chunk in chunks], "Tickers round-trip"
+        for original, copy in zip(chunks, restored):
+            assert copy.first_index == original.first_index and copy.splits == original.splits, "Metadata round-trips"
+            assert np.array_equal(copy.close, original.close, equal_nan=True), "Prices round-trip"
+
+        history = restored[0].history()
+        history["AAPL"] = history.pop(restored[0].tickers[0])
+        result = Backtest(TurtleTradingStrategy, history, end=date(2011, 12, 31), log=False)
+        assert result.TradingDays > 400, "The synthetic history should drive the strategy through the backtest"
@@ -0,0 +1,85 @@
+from datetime import date, datetime, timedelta
+
+import lean_standin
+
+lean_standin.install()
+
+from AlgorithmImports import DonchianChannel, Slice, Symbol, TradeBar, TradeBars
+from lean_standin.data import RandomWalkBars
+from lean_standin.engine import Backtest, PushSlice
+from main import TurtleTradingStrategy
+from trading_systems import ChannelStore
+
+class TestTradingSystems:
+
+    def Test_ChannelStoreMatchesDonchian(self):
+        """Test the store's channels equal a DonchianChannel of each length on every bar, ties and flat runs included"""
+        aapl = Symbol("AAPL")
+        store = ChannelStore([20, 10, 55, 20])
+        store.Add(aapl)
+        channels = {length: (store.Channel(aapl, length), DonchianChannel(length)) for length in (10, 20, 55)}
+        assert store.lengths == [10, 20, 55], "Each length is stored once"
+
+        rows = RandomWalkBars(["AAPL"], date(2010, 1, 1), 400)["AAPL"]
+        rows[100:130] = [(day, 100, 101, 99, 100, 1000) for day, *_ in rows[100:130]]  # Equal highs and lows
+        for day, open_price, high, low, close, volume in rows:
+            time = datetime.combine(day, datetime.min.time())
+            bar = TradeBar(time, aapl, open_price, high, low, close, volume, timedelta(days=1))
+            store.Update(Slice(bar.EndTime, TradeBars({aapl: bar})))
+            for length, (stored, donchian) in channels.items():
+                donchian.Update(bar)
+                assert stored.IsReady == donchian.IsReady, f"Ready after {length} bars"
+                if donchian.IsReady:
+                    assert (stored.Upper.Current.Value, stored.Lower.Current.Value) == (donchian.Upper.Current.Value, donchian.Lower.Current.Value), \
+                        f"{length}-day channel on {day}"
+        assert len(store.symbols[aapl].high_index) <= 55, "Candidates never outlive the longest channel"
+
+    def Test_SystemsShareDataWithOwnBooks(self):
+        """Test both systems trade on one subscription and store, each with its own book adding up to the holding"""
+        history = RandomWalkBars(["AAPL"], date(2009, 10, 1), 365 * 4, seed=17, drift=0.0003, volatility=0.04)
+        aapl = Symbol("AAPL")
+        single = Backtest(TurtleTradingStrategy, history, end=date(2013, 6, 30), log=False)
+        both = Backtest(TurtleTradingStrategy, history, end=date(2013, 6, 30), log=False, parameters={"trading-systems": "1,2"})
+        strategy = both.Algorithm
+        system_1, system_2 = strategy.systems
+
+        assert len(strategy.Securities) == 1 and list(strategy.channel_store.symbols) == [aapl], "One subscription and store per symbol"
+        channel, expected = system_2.entry_channels[aapl], single.Algorithm.entry_channels[aapl]
+        assert (channel.Upper.Current.Value, channel.Lower.Current.Value) == (expected.Upper.Current.Value, expected.Lower.Current.Value), \
+            "System 2 reads the same 55-day channel from the store"
+        assert system_1.entry_channels[aapl] is system_2.exit_channels[aapl], "The 20-day channel is shared"
+
+        assert system_1.realized_profit and system_2.realized_profit, "Both systems trade"
+        books = sum(system.position_quantity.get(aapl, 0) for system in strategy.systems)
+        assert strategy.Portfolio[aapl].Quantity == books, "The holding is the sum of the systems' books"
+        profit = sum(system.Equity(0, strategy.Securities) for system in strategy.systems)
+        assert abs(profit - (strategy.Portfolio.TotalPortfolioValue - strategy.original_portfolio_value)) < 1e-6, \
+            "The systems' own profits add up to the portfolio's"
+        assert system_1.peak_portfolio_value != system_2.peak_portfolio_value, "Each system has its own throttle"
+
+        strategy = TurtleTradingStrategy()
+        strategy.LogEnabled = False
+        strategy.SetParameters({"trading-systems": "1,2", "persist-state": "true"})
+        try:
+            strategy.Initialize()
+            assert False, "State persistence is refused with several systems"
+        except ValueError:
+            pass
+
+    def Test_UnprotectedPositionClosedWithoutBar(self):
+        """Test a position without a stop is closed on a slice without the symbol's bar, in each system's book"""
+        aapl = Symbol("AAPL")
+        for parameters in ({}, {"trading-systems": "1,2"}):
+            strategy = TurtleTradingStrategy()
+            strategy.SetParameters(parameters)
+            strategy.Initialize()
+            strategy.IsWarmingUp = False
+            strategy.Securities[aapl].Price = 100.0
+            strategy.MarketOrder(aapl, 100)
+            strategy.systems[0].position_quantity[aapl] = 100
+            strategy.systems[0].pyramid_level[aapl] = 1
+
+            PushSlice(strategy, Slice(datetime(2010, 1, 5), TradeBars()))
+            assert strategy.Portfolio[aapl].Quantity == 0, f"The unprotected position is closed ({parameters})"
+            assert aapl not in strategy.systems[0].pyramid_level, "Its book is cleaned up"
+            assert any("no stop loss is set" in line for line in strategy.Logs), "The emergency exit is logged"
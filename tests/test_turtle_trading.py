@@ -1,3 +1,7 @@
+import lean_standin
+
+lean_standin.install()  # Plain Python runs use the stand-in; a no-op inside LEAN
+
 from AlgorithmImports import *
 from main import TurtleTradingStrategy
 
@@ -0,0 +1,4 @@
+"""
+Offline tooling for the Turtle Trading Strategy project. These modules run on a plain Python
+install against the archived runs in backtests/ and never import LEAN.
+"""
@@ -0,0 +1,263 @@
+"""
+Content-addressed, deduplicated archive for backtests/.
+
+Archiving a run moves its artifacts (logs, result JSON, the code/ snapshot, ...) into a shared blob
+store, gzip-compressed and named by the SHA-256 of their content, and leaves a small manifest.json
+in the run folder. Identical files across runs, like the repeated code/ snapshots, are stored once.
+Readers use open_artifact/list_artifacts, which serve a file from the run folder if it is still
+there and from the store otherwise, so analysis tools work on archived and unarchived runs alike.
+
+Usage:
+    python -m tools.archive archive [backtests_dir]   # archive every run
+    python -m tools.archive restore RUN_DIR           # materialise a run's files again
+    python -m tools.archive stats [backtests_dir]
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+
+MANIFEST_NAME = "manifest.json"
+STORE_NAME = ".store"
+MANIFEST_VERSION = 1
+CHUNK_SIZE = 1 << 20
+
+
+def iter_runs(backtests_dir):
+    """Yield every run folder under backtests_dir, oldest first (folders are named by timestamp)."""
+    for name in sorted(os.listdir(backtests_dir)):
+        path = os.path.join(backtests_dir, name)
+        if not name.startswith(".") and os.path.isdir(path):
+            yield path
+
+
+def read_manifest(run_dir):
+    """Return the run's manifest, or None if the run was never archived."""
+    path = os.path.join(run_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def _blob_path(store_dir, digest):
+    return os.path.join(store_dir, digest[:2], digest + ".gz")
+
+
+def _store_dir(run_dir, manifest):
+    return os.path.normpath(os.path.join(run_dir, manifest["store"]))
+
+
+def _fsync_directory(path):
+    """Make a rename or new entry in a directory durable (POSIX; Windows can't open directories)."""
+    if os.name != "posix":
+        return
+    handle = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(handle)
+    finally:
+        os.close(handle)
+
+
+def store_file(path, store_dir):
+    """
+    Stream a file into the store, hashing and compressing it in a single pass. A new blob is fsynced
+    and renamed into place, and its directory fsynced, before this returns, so the original can be
+    removed once the manifest is durable.
+
+    Returns:
+        tuple: (sha256 hex digest, original size, stored size)
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    handle, temporary = tempfile.mkstemp(dir=store_dir, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as compressed, open(path, "rb") as source:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    compressed.write(chunk)
+                    size += len(chunk)
+            raw.flush()
+            os.fsync(raw.fileno())
+
+        blob = _blob_path(store_dir, digest.hexdigest())
+        if os.path.exists(blob):
+            os.remove(temporary)  # Already stored by another run
+        else:
+            shard = os.path.dirname(blob)
+            if not os.path.isdir(shard):
+                os.makedirs(shard, exist_ok=True)
+                _fsync_directory(store_dir)
+            os.replace(temporary, blob)
+            _fsync_directory(shard)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return digest.hexdigest(), size, os.path.getsize(blob)
+
+
+def archive_run(run_dir, store_dir=None):
+    """
+    Move a run's artifacts into the store and write its manifest. Files added to an already archived
+    run are merged into the existing manifest.
+
+    Returns:
+        dict: The run's manifest
+    """
+    store_dir = store_dir or os.path.join(os.path.dirname(os.path.abspath(run_dir)), STORE_NAME)
+    manifest = read_manifest(run_dir) or {
+        "version": MANIFEST_VERSION,
+        "store": os.path.relpath(store_dir, run_dir),
+        "files": {},
+    }
+
+    archived = []
+    for root, _, names in os.walk(run_dir):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, run_dir).replace(os.sep, "/")
+            if relative == MANIFEST_NAME:
+                continue
+            digest, size, stored = store_file(path, _store_dir(run_dir, manifest))
+            manifest["files"][relative] = {"sha256": digest, "size": size, "stored": stored}
+            archived.append(path)
+
+    # The manifest must be durable before any original is removed (store_file made the blobs durable)
+    temporary = os.path.join(run_dir, MANIFEST_NAME + ".tmp")
+    with open(temporary, "w") as handle:
+        json.dump(manifest, handle, indent=1, sort_keys=True)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, os.path.join(run_dir, MANIFEST_NAME))
+    _fsync_directory(run_dir)
+
+    for path in archived:
+        os.remove(path)
+    for root, directories, _ in os.walk(run_dir, topdown=False):
+        for directory in directories:
+            path = os.path.join(root, directory)
+            if not os.listdir(path):
+                os.rmdir(path)
+    return manifest
+
+
+def list_artifacts(run_dir):
+    """List a run's artifact paths (relative, '/'-separated) whether archived or not."""
+    names = set()
+    manifest = read_manifest(run_dir)
+    if manifest is not None:
+        names.update(manifest["files"])
+    for root, _, files in os.walk(run_dir):
+        for name in files:
+            relative = os.path.relpath(os.path.join(root, name), run_dir).replace(os.sep, "/")
+            if relative != MANIFEST_NAME:
+                names.add(relative)
+    return sorted(names)
+
+
+def artifact_digest(run_dir, relative):
+    """SHA-256 of an artifact, read from the manifest when archived; None if it doesn't exist."""
+    manifest = read_manifest(run_dir)
+    if manifest is not None and relative in manifest["files"]:
+        return manifest["files"][relative]["sha256"]
+    path = os.path.join(run_dir, relative)
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def open_artifact(run_dir, relative, mode="r", errors="replace"):
+    """
+    Open a run artifact for reading, transparently decompressing it from the store if archived.
+
+    Args:
+        run_dir (str): Run folder
+        relative (str): Artifact path relative to the run folder, e.g. 'log.txt' or 'code/main.py'
+        mode (str): 'r' for text or 'rb' for bytes
+
+    Raises:
+        FileNotFoundError: If the run has no such artifact
+    """
+    path = os.path.join(run_dir, relative)
+    if os.path.exists(path):
+        return open(path, mode) if "b" in mode else open(path, mode, errors=errors)
+
+    manifest = read_manifest(run_dir)
+    if manifest is None or relative not in manifest["files"]:
+        raise FileNotFoundError(f"{relative} not found in {run_dir}")
+    stream = gzip.open(_blob_path(_store_dir(run_dir, manifest), manifest["files"][relative]["sha256"]), "rb")
+    return stream if "b" in mode else io.TextIOWrapper(stream, errors=errors)
+
+
+def restore_run(run_dir):
+    """Write every archived artifact back into the run folder and drop the manifest."""
+    manifest = read_manifest(run_dir)
+    if manifest is None:
+        return
+    for relative in manifest["files"]:
+        target = os.path.join(run_dir, relative)
+        if os.path.exists(target):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open_artifact(run_dir, relative, "rb") as source, open(target, "wb") as destination:
+            shutil.copyfileobj(source, destination, CHUNK_SIZE)
+    os.remove(os.path.join(run_dir, MANIFEST_NAME))
+
+
+def store_stats(backtests_dir):
+    """
+    Summarise deduplication and compression for every archived run.
+
+    Returns:
+        dict: Logical bytes referenced by manifests, unique bytes, and bytes on disk in the store
+    """
+    logical, unique, stored = 0, {}, {}
+    for run_dir in iter_runs(backtests_dir):
+        manifest = read_manifest(run_dir)
+        if manifest is None:
+            continue
+        for entry in manifest["files"].values():
+            logical += entry["size"]
+            unique[entry["sha256"]] = entry["size"]
+            stored[entry["sha256"]] = entry["stored"]
+    return {"logical_bytes": logical, "unique_bytes": sum(unique.values()),
+            "stored_bytes": sum(stored.values()), "blobs": len(unique)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Content-addressed archive for backtests/")
+    commands = parser.add_subparsers(dest="command", required=True)
+    archive = commands.add_parser("archive", help="Archive every run")
+    archive.add_argument("backtests_dir", nargs="?", default="backtests")
+    restore = commands.add_parser("restore", help="Restore one run's files")
+    restore.add_argument("run_dir")
+    stats = commands.add_parser("stats", help="Show deduplication and compression")
+    stats.add_argument("backtests_dir", nargs="?", default="backtests")
+    arguments = parser.parse_args(argv)
+
+    if arguments.command == "archive":
+        for run_dir in iter_runs(arguments.backtests_dir):
+            manifest = archive_run(run_dir)
+            print(f"Archived {run_dir}: {len(manifest['files'])} files")
+    elif arguments.command == "restore":
+        restore_run(arguments.run_dir)
+        print(f"Restored {arguments.run_dir}")
+    if arguments.command in ("archive", "stats"):
+        stats = store_stats(arguments.backtests_dir)
+        print(f"{stats['logical_bytes']:,} bytes referenced, {stats['unique_bytes']:,} unique, "
+              f"{stats['stored_bytes']:,} on disk in {stats['blobs']} blobs")
+
+
+if __name__ == "__main__":
+    main()
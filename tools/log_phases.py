@@ -0,0 +1,164 @@
+"""
+Split LEAN engine logs (backtests/<run>/log.txt) into startup and run phases and compare the
+phase durations across every archived run.
+
+Usage:
+    python -m tools.log_phases [backtests_dir] [--tolerance 0.25] [--min-delta-ms 50]
+"""
+from datetime import datetime
+import argparse
+import os
+import statistics
+
+from tools.archive import artifact_digest, iter_runs, list_artifacts, open_artifact
+
+# Phases in the order the engine logs them. Each phase starts at the first line containing its
+# marker and ends where the next phase that appears in the log starts; the last one ends at the
+# final timestamped line.
+PHASES = [
+    ("config", "Engine.Main(): LEAN ALGORITHMIC TRADING ENGINE"),           # Config.GetValue, JobQueue, leaky bucket
+    ("python_import", "PythonInitializer.Initialize(): start"),             # Python runtime start, importing main.py
+    ("initialize", "BacktestingSetupHandler.Setup(): Setting up job"),      # Initialize(), including the in-line Test_* runs
+    ("data_feed", "JOB HANDLERS:"),                                         # Data feed, workers, internal benchmark feed
+    ("warmup", "Algorithm starting warm up..."),
+    ("main_loop", "Algorithm finished warming up."),
+    ("results", "BacktestingResultHandler.Exit(): starting..."),            # Saving logs, statistics, disposal
+]
+
+PHASE_NAMES = [name for name, _ in PHASES]
+
+
+def _parse_timestamp(line):
+    """Parse the '2024-10-27T23:13:10.7959030Z' prefix of an engine log line, or None."""
+    if len(line) < 28 or line[4] != "-" or line[10] != "T":
+        return None
+    try:
+        return datetime.fromisoformat(line[:26])  # Engine logs 7 fractional digits; keep microseconds
+    except ValueError:
+        return None
+
+
+def analyze_log(lines):
+    """
+    Stream an engine log and measure each phase.
+
+    Args:
+        lines: Iterable of log lines (a file object works)
+
+    Returns:
+        dict: Phase name -> duration in milliseconds, or None for phases missing from the log
+    """
+    starts = {}
+    next_phase = 0
+    last_timestamped = None
+
+    for line in lines:
+        if line[:4].isdigit():
+            last_timestamped = line
+        # Strategy log lines are the bulk of the file and never carry phase markers
+        if next_phase >= len(PHASES) or " Log: " in line:
+            continue
+        for index in range(next_phase, len(PHASES)):
+            if PHASES[index][1] in line:
+                starts[PHASES[index][0]] = _parse_timestamp(line)
+                next_phase = index + 1
+                break
+
+    durations = dict.fromkeys(PHASE_NAMES)
+    found = [name for name in PHASE_NAMES if starts.get(name) is not None]
+    end = _parse_timestamp(last_timestamped) if last_timestamped else None
+    for position, name in enumerate(found):
+        finish = starts[found[position + 1]] if position + 1 < len(found) else end
+        if finish is not None:
+            durations[name] = (finish - starts[name]).total_seconds() * 1000
+    return durations
+
+
+def code_version(run_dir):
+    """Short hash of the run's archived main.py, used to group runs by code version."""
+    digest = artifact_digest(run_dir, "code/main.py")
+    return digest[:8] if digest else "unknown"
+
+
+def analyze_runs(backtests_dir):
+    """
+    Analyze every archived run that has an engine log.
+
+    Returns:
+        list[dict]: One entry per run, oldest first, with 'run', 'version' and 'phases'
+    """
+    runs = []
+    for run_dir in iter_runs(backtests_dir):
+        if "log.txt" not in list_artifacts(run_dir):
+            continue
+        with open_artifact(run_dir, "log.txt") as handle:
+            phases = analyze_log(handle)
+        runs.append({"run": os.path.basename(run_dir), "version": code_version(run_dir), "phases": phases})
+    return runs
+
+
+def find_regressions(runs, tolerance=0.25, min_delta_ms=50):
+    """
+    Compare each code version with the previous one, phase by phase, using the median duration of
+    each version's runs.
+
+    Returns:
+        list[tuple]: (version, previous_version, phase, previous_ms, current_ms) for every phase that
+        got slower by more than the tolerance and by at least min_delta_ms
+    """
+    versions = []
+    durations = {}
+    for run in runs:
+        if run["version"] not in durations:
+            versions.append(run["version"])
+            durations[run["version"]] = {name: [] for name in PHASE_NAMES}
+        for name, value in run["phases"].items():
+            if value is not None:
+                durations[run["version"]][name].append(value)
+
+    regressions = []
+    for previous, current in zip(versions, versions[1:]):
+        for name in PHASE_NAMES:
+            if not durations[previous][name] or not durations[current][name]:
+                continue
+            before = statistics.median(durations[previous][name])
+            after = statistics.median(durations[current][name])
+            if after - before >= min_delta_ms and after > before * (1 + tolerance):
+                regressions.append((current, previous, name, before, after))
+    return regressions
+
+
+def format_report(runs, regressions):
+    """Render the per-run phase table and the regression list as text."""
+    header = f"{'run':<20} {'version':<9}" + "".join(f"{name:>14}" for name in PHASE_NAMES)
+    lines = [header, "-" * len(header)]
+    for run in runs:
+        cells = "".join(f"{'-':>14}" if run["phases"][name] is None else f"{run['phases'][name]:>14.1f}"
+                        for name in PHASE_NAMES)
+        lines.append(f"{run['run']:<20} {run['version']:<9}{cells}")
+
+    lines.append("")
+    if regressions:
+        lines.append("Phase regressions between code versions (median ms):")
+        for current, previous, name, before, after in regressions:
+            lines.append(f"  {previous} -> {current}  {name}: {before:.1f} -> {after:.1f} (+{after - before:.1f})")
+    else:
+        lines.append("No phase regressions between code versions")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report engine phase durations across archived backtests")
+    parser.add_argument("backtests_dir", nargs="?", default="backtests")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Relative slowdown that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=50, help="Ignore slowdowns smaller than this")
+    arguments = parser.parse_args(argv)
+
+    runs = analyze_runs(arguments.backtests_dir)
+    regressions = find_regressions(runs, arguments.tolerance, arguments.min_delta_ms)
+    print(format_report(runs, regressions))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
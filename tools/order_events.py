@@ -0,0 +1,237 @@
+"""
+Load LEAN order events (backtests/<run>/<id>-order-events.json) into typed NumPy arrays and measure
+execution cost: submission-to-fill delay, slippage against the price the strategy logged when it
+decided to trade (EnterLong/EnterShort/AddToLong/AddToShort), and fees per share.
+
+Usage:
+    python -m tools.order_events [backtests_dir]
+"""
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+
+from tools.archive import iter_runs, list_artifacts, open_artifact
+
+EXCHANGE_TIME_ZONE = ZoneInfo("America/New_York")  # Algorithm log times are in exchange time
+
+STATUS_CODES = {"new": 0, "submitted": 1, "partiallyFilled": 2, "filled": 3, "canceled": 4,
+                "none": 5, "invalid": 6, "cancelPending": 7, "updateSubmitted": 8}
+
+EVENT_DTYPE = np.dtype([
+    ("order_id", "i4"),
+    ("event_id", "i4"),
+    ("symbol", "U16"),
+    ("time", "f8"),           # Epoch seconds (UTC)
+    ("status", "i1"),         # STATUS_CODES
+    ("direction", "i1"),      # +1 buy, -1 sell
+    ("quantity", "f8"),       # Signed order quantity
+    ("fill_quantity", "f8"),  # Signed quantity filled by this event
+    ("fill_price", "f8"),
+    ("fee", "f8"),
+])
+
+ORDER_DTYPE = np.dtype([
+    ("order_id", "i4"),
+    ("symbol", "U16"),
+    ("submit_time", "f8"),
+    ("fill_time", "f8"),        # Time of the last fill, NaN if never filled
+    ("quantity", "f8"),
+    ("filled", "f8"),
+    ("fill_price", "f8"),       # Volume-weighted across fills
+    ("fee", "f8"),
+    ("intended_price", "f8"),   # Price the strategy logged for the order, NaN for exits/liquidations
+    ("fill_delay", "f8"),       # Seconds from submission to the last fill
+    ("slippage", "f8"),         # Per share, positive when the fill was worse than intended
+    ("slippage_bps", "f8"),
+    ("fee_per_share", "f8"),
+])
+
+# "2010-03-11 16:00:00 Entered Long: AAPL, Quantity: 40868, Entry Price: $6.93, Stop: ..." and the older
+# "2010-03-11 16:00:00 Entering Long: AAPL, Quantity: 40868, Price: 6.93, Stop: ..." form. Indented copies
+# from the daily report are deliberately not matched.
+INTENT_PATTERN = re.compile(
+    r"^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d) (Entered|Entering|Added to) (Long|Short): ([^,]+),.*?"
+    r"Quantity: (\d+), (?:Entry )?Price: \$?([0-9.eE+-]+)")
+
+
+def load_order_events(source):
+    """
+    Parse an order-events JSON file straight into a structured array.
+
+    Args:
+        source: Path or open file of a LEAN *-order-events.json
+
+    Returns:
+        np.ndarray: EVENT_DTYPE records in file order
+    """
+    if isinstance(source, str):
+        with open(source) as handle:
+            events = json.load(handle)
+    else:
+        events = json.load(source)
+
+    records = np.empty(len(events), dtype=EVENT_DTYPE)
+    for index, event in enumerate(events):
+        fill_quantity = event.get("fillQuantity", 0.0)
+        records[index] = (event["orderId"], event["orderEventId"], event["symbolValue"], event["time"],
+                          STATUS_CODES.get(event["status"], -1), 1 if event["direction"] == "buy" else -1,
+                          event["quantity"], fill_quantity, event.get("fillPrice", 0.0),
+                          event.get("orderFeeAmount", 0.0))
+    return records
+
+
+def load_intents(lines):
+    """
+    Extract the strategy's order intents from its algorithm log (<id>-log.txt).
+
+    Returns:
+        list[tuple]: (epoch seconds, symbol, signed quantity, intended price) in log order
+    """
+    intents = []
+    for line in lines:
+        match = INTENT_PATTERN.match(line)
+        if match is None:
+            continue
+        when, _, side, symbol, quantity, price = match.groups()
+        local_time = datetime.strptime(when, "%Y-%m-%d %H:%M:%S").replace(tzinfo=EXCHANGE_TIME_ZONE)
+        sign = 1 if side == "Long" else -1
+        intents.append((local_time.timestamp(), symbol.strip(), sign * float(quantity), float(price)))
+    return intents
+
+
+def join_orders(events, intents=()):
+    """
+    Join submitted and fill events by orderId and compute execution-cost metrics.
+
+    Args:
+        events (np.ndarray): EVENT_DTYPE records from load_order_events
+        intents: Output of load_intents; each intent is matched to the first unmatched order
+            submitted at the same time for the same symbol and signed quantity
+
+    Returns:
+        np.ndarray: ORDER_DTYPE records, one per submitted order, in orderId order
+    """
+    submitted = events[events["status"] == STATUS_CODES["submitted"]]
+    submitted = submitted[np.unique(submitted["order_id"], return_index=True)[1]]
+    orders = np.zeros(len(submitted), dtype=ORDER_DTYPE)
+    orders["order_id"] = submitted["order_id"]
+    orders["symbol"] = submitted["symbol"]
+    orders["submit_time"] = submitted["time"]
+    orders["quantity"] = submitted["quantity"]
+    orders["fill_time"] = np.nan
+    orders["intended_price"] = np.nan
+
+    # Aggregate fills per order; both partial and complete fills carry a fill quantity
+    fills = events[(events["fill_quantity"] != 0)]
+    position = np.searchsorted(orders["order_id"], fills["order_id"])
+    known = (position < len(orders))
+    known[known] &= orders["order_id"][position[known]] == fills["order_id"][known]
+    fills, position = fills[known], position[known]
+
+    filled = np.bincount(position, weights=fills["fill_quantity"], minlength=len(orders))
+    notional = np.bincount(position, weights=fills["fill_quantity"] * fills["fill_price"], minlength=len(orders))
+    orders["filled"] = filled
+    orders["fee"] = np.bincount(position, weights=fills["fee"], minlength=len(orders))
+    has_fill = filled != 0
+    orders["fill_price"] = np.where(has_fill, notional / np.where(has_fill, filled, 1), np.nan)
+    last_fill = np.full(len(orders), -np.inf)
+    np.maximum.at(last_fill, position, fills["time"])
+    orders["fill_time"] = np.where(has_fill, last_fill, np.nan)
+
+    unmatched = {}
+    for index, order in enumerate(orders):
+        unmatched.setdefault((order["submit_time"], order["symbol"], order["quantity"]), []).append(index)
+    for when, symbol, quantity, price in intents:
+        candidates = unmatched.get((when, symbol, quantity))
+        if candidates:
+            orders["intended_price"][candidates.pop(0)] = price
+
+    direction = np.sign(orders["quantity"])
+    orders["fill_delay"] = orders["fill_time"] - orders["submit_time"]
+    orders["slippage"] = (orders["fill_price"] - orders["intended_price"]) * direction
+    orders["slippage_bps"] = orders["slippage"] / orders["intended_price"] * 10000
+    orders["fee_per_share"] = np.where(has_fill, orders["fee"] / np.abs(np.where(has_fill, filled, 1)), np.nan)
+    return orders
+
+
+def analyze_run(run_dir):
+    """
+    Load one archived run's orders with their intents.
+
+    Returns:
+        np.ndarray: ORDER_DTYPE records, empty if the run has no order events
+    """
+    artifacts = list_artifacts(run_dir)
+    names = [name for name in artifacts if name.endswith("-order-events.json")]
+    if not names:
+        return np.zeros(0, dtype=ORDER_DTYPE)
+    with open_artifact(run_dir, names[0]) as handle:
+        events = load_order_events(handle)
+
+    intents = []
+    log_name = names[0].replace("-order-events.json", "-log.txt")
+    if log_name in artifacts:
+        with open_artifact(run_dir, log_name) as handle:
+            intents = load_intents(handle)
+    return join_orders(events, intents)
+
+
+def analyze_runs(backtests_dir):
+    """
+    Batch every run under backtests_dir.
+
+    Returns:
+        tuple: (run names, np.ndarray of ORDER_DTYPE records for all runs, np.ndarray of run indices)
+    """
+    names, batches = [], []
+    for run_dir in iter_runs(backtests_dir):
+        orders = analyze_run(run_dir)
+        if len(orders):
+            names.append(os.path.basename(run_dir))
+            batches.append(orders)
+    if not batches:
+        return names, np.zeros(0, dtype=ORDER_DTYPE), np.zeros(0, dtype="i4")
+    run_index = np.concatenate([np.full(len(batch), index, dtype="i4") for index, batch in enumerate(batches)])
+    return names, np.concatenate(batches), run_index
+
+
+def _nanmean(values):
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if len(values) else float("nan")
+
+
+def format_report(names, orders, run_index):
+    """Render per-run and overall execution-cost summaries as text."""
+    header = (f"{'run':<20} {'orders':>6} {'filled':>6} {'delay h':>8} {'slip bps':>9} "
+              f"{'fees $':>10} {'fee/shr':>8}")
+    lines = [header, "-" * len(header)]
+
+    def summary(label, selection):
+        filled = selection[~np.isnan(selection["fill_time"])]
+        lines.append(f"{label:<20} {len(selection):>6} {len(filled):>6} "
+                     f"{_nanmean(selection['fill_delay']) / 3600:>8.1f} {_nanmean(selection['slippage_bps']):>9.2f} "
+                     f"{selection['fee'].sum():>10.2f} {_nanmean(selection['fee_per_share']):>8.4f}")
+
+    for index, name in enumerate(names):
+        summary(name, orders[run_index == index])
+    lines.append("-" * len(header))
+    summary("all runs", orders)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Execution-cost analytics across archived backtests")
+    parser.add_argument("backtests_dir", nargs="?", default="backtests")
+    arguments = parser.parse_args(argv)
+
+    names, orders, run_index = analyze_runs(arguments.backtests_dir)
+    print(format_report(names, orders, run_index))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Seeded synthetic daily equity data for stress and scale testing.
+
+Each symbol's price path is a sequence of regimes, either trending (drifting random walk) or
+mean-reverting (AR(1) deviations around the level the regime started at). It is overlaid with
+overnight gaps, stock splits, trading halts and late listings. Symbols are generated in chunks of
+`chunk_symbols` and every symbol draws from its own generator seeded with (seed, symbol index), so
+the output is reproducible and does not depend on the chunk size or on how many symbols are made.
+
+Output is streamed chunk by chunk, as either
+    lean - LEAN's daily format: equity/usa/daily/<ticker>.zip with raw (unadjusted) prices in
+           deci-cents, plus factor_files/ and map_files/ so LEAN (and market_series) can adjust them
+    npz  - columnar NumPy archives, chunk_<n>.npz with [symbol, day] arrays of raw OHLCV, the
+           split-adjustment factor per day, tickers and yyyymmdd dates
+
+Usage:
+    python -m tools.synthetic_data OUT_DIR [--symbols 100] [--years 10] [--seed 0] [--format lean|npz]
+"""
+from datetime import date, timedelta
+import argparse
+import glob
+import io
+import os
+import time
+import zipfile
+
+import numpy as np
+
+START = date(1990, 1, 1)
+SPLIT_RATIOS = (2, 3, 4, 7)
+MEAN_REVERSION_LAGS = 150   # Kernel length for the AR(1) deviations; phi^150 is negligible for phi <= 0.97
+
+
+class Chunk:
+    """
+    A block of symbols over the shared calendar. Arrays are [symbol, day]; halted and not-yet-listed
+    days are NaN (volume 0). Prices are raw: multiply by `factor` for split-adjusted prices.
+    """
+
+    def __init__(self, first_index, tickers, dates, open, high, low, close, volume, factor, splits):
+        self.first_index = first_index  # int - index of the first symbol in the whole universe
+        self.tickers = tickers          # list[str]
+        self.dates = dates              # ndarray[int32] - yyyymmdd trading days
+        self.open = open                # ndarray[float64]
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume            # ndarray[int64]
+        self.factor = factor            # ndarray[float64] - raw price * factor = split-adjusted price
+        self.splits = splits            # list[(ticker, day index, ratio)] - ratio-for-1 splits effective that day
+
+    def history(self, adjusted=True):
+        """
+        Bars in the form lean_standin.engine.Backtest takes.
+
+        Returns:
+            dict: ticker -> list of (date, open, high, low, close, volume), traded days only
+        """
+        days = [date(value // 10000, value // 100 % 100, value % 100) for value in self.dates.tolist()]
+        history = {}
+        for row, ticker in enumerate(self.tickers):
+            scale = self.factor[row] if adjusted else np.ones(len(days))
+            traded = np.flatnonzero(~np.isnan(self.close[row]))
+            history[ticker] = [(days[day], self.open[row, day] * scale[day], self.high[row, day] * scale[day],
+                                self.low[row, day] * scale[day], self.close[row, day] * scale[day],
+                                int(self.volume[row, day] / scale[day])) for day in traded.tolist()]
+        return history
+
+
+def trading_days(start, years):
+    """Weekdays from start for the given number of years, as yyyymmdd integers."""
+    end = start.replace(year=start.year + years)
+    days = np.arange(np.datetime64(start), np.datetime64(end))
+    days = days[np.is_busday(days)]
+    years_, months, days_of_month = (days.astype("datetime64[Y]").astype(int) + 1970,
+                                     days.astype("datetime64[M]").astype(int) % 12 + 1,
+                                     (days - days.astype("datetime64[M]")).astype(int) + 1)
+    return (years_ * 10000 + months * 100 + days_of_month).astype(np.int32)
+
+
+def _log_closes(rng, length, volatility, trend_share):
+    """Log close path built from alternating trending and mean-reverting regimes."""
+    log_close = np.empty(length)
+    start_level = np.log(rng.uniform(5, 200))
+    level, position = start_level, 0
+    while position < length:
+        size = min(length - position, 20 + int(rng.geometric(1 / 250)))
+        shocks = rng.standard_normal(size) * volatility
+        if rng.random() < trend_share:
+            # Trend; lean back toward the starting level once the price is far from it
+            distance = level - start_level
+            direction = -np.sign(distance) if abs(distance) > 2.5 else rng.choice((-1.0, 1.0))
+            segment = level + np.cumsum(direction * rng.uniform(0.0003, 0.0015) + shocks)
+        else:
+            phi = rng.uniform(0.85, 0.97)
+            kernel = phi ** np.arange(min(MEAN_REVERSION_LAGS, size))
+            segment = level + np.convolve(shocks, kernel)[:size]
+        log_close[position:position + size] = segment
+        level, position = segment[-1], position + size
+    return log_close
+
+
+def _symbol(rng, days, gap_rate, split_rate, halt_rate, listing_share, trend_share):
+    """One symbol's raw OHLCV, adjustment factor and splits over `days` trading days."""
+    volatility = rng.uniform(0.01, 0.04)
+    log_close = _log_closes(rng, days, volatility, trend_share)
+
+    # Overnight gaps: a jump that moves the open and carries into every later price
+    jumps = np.where(rng.random(days) < gap_rate, rng.normal(0, 4 * volatility, days), 0.0)
+    log_close += np.cumsum(jumps)
+    log_close = np.maximum(log_close, np.log(0.05))
+    log_open = np.empty(days)
+    log_open[0] = log_close[0]
+    log_open[1:] = log_close[:-1] + jumps[1:] + rng.normal(0, 0.3 * volatility, days - 1)
+    wicks = np.abs(rng.normal(0, 0.5 * volatility, (2, days)))
+    log_high = np.maximum(log_open, log_close) + wicks[0]
+    log_low = np.minimum(log_open, log_close) - wicks[1]
+    volume_adjusted = rng.lognormal(np.log(rng.uniform(1e5, 1e7)), 0.5, days)
+
+    # Splits: raw prices before a split are `ratio` times the adjusted price
+    split_days = np.flatnonzero(rng.random(days) < split_rate / 252)
+    split_days = split_days[split_days > 0]
+    ratios = rng.choice(SPLIT_RATIOS, len(split_days)).astype(float)
+    factor = np.ones(days)
+    for day, ratio in zip(split_days, ratios):
+        factor[:day] /= ratio
+
+    tradable = np.ones(days, dtype=bool)
+    if rng.random() < listing_share:
+        tradable[:rng.integers(1, max(2, days // 2))] = False
+    for onset in np.flatnonzero(rng.random(days) < halt_rate):
+        tradable[onset:onset + rng.integers(1, 11)] = False
+
+    prices = [np.where(tradable, np.exp(series) / factor, np.nan) for series in (log_open, log_high, log_low, log_close)]
+    volume = np.where(tradable, np.round(volume_adjusted * factor), 0).astype(np.int64)
+    return prices, volume, factor, list(zip(split_days.tolist(), ratios.astype(int).tolist()))
+
+
+def generate(symbols=100, years=10, seed=0, chunk_symbols=256, start=START, gap_rate=0.01, split_rate=0.05,
+             halt_rate=0.0005, listing_share=0.2, trend_share=0.5):
+    """
+    Yield the universe chunk by chunk.
+
+    Args:
+        symbols (int): Symbols in the universe (tickers SYN00000, SYN00001, ...)
+        years (int): Calendar years of weekday trading days from `start`
+        seed (int): Base seed; symbol i draws from default_rng([seed, i])
+        chunk_symbols (int): Symbols per chunk; bounds memory at about 60 bytes x chunk x days
+        gap_rate (float): Chance per day of an overnight gap of about 4 daily volatilities
+        split_rate (float): Splits per symbol per year
+        halt_rate (float): Chance per day of a 1-10 day trading halt
+        listing_share (float): Share of symbols that list partway through the first half
+        trend_share (float): Share of regimes that trend rather than mean-revert
+
+    Yields:
+        Chunk
+    """
+    dates = trading_days(start, years)
+    days = len(dates)
+    for first in range(0, symbols, chunk_symbols):
+        indices = range(first, min(symbols, first + chunk_symbols))
+        fields = np.empty((4, len(indices), days))
+        volume = np.empty((len(indices), days), dtype=np.int64)
+        factor = np.empty((len(indices), days))
+        tickers, splits = [], []
+        for row, index in enumerate(indices):
+            rng = np.random.default_rng([seed, index])
+            prices, volume[row], factor[row], symbol_splits = _symbol(rng, days, gap_rate, split_rate, halt_rate,
+                                                                      listing_share, trend_share)
+            fields[:, row] = prices
+            tickers.append(f"SYN{index:05d}")
+            splits.extend((tickers[-1], day, ratio) for day, ratio in symbol_splits)
+        yield Chunk(first, tickers, dates, fields[0], fields[1], fields[2], fields[3], volume, factor, splits)
+
+
+def write_lean(chunk, root):
+    """
+    Write a chunk in LEAN's daily equity layout under root (e.g. the Lean data folder).
+
+    Factor file rows follow LEAN's convention: a row's factors apply to its own date and every
+    earlier date back to the previous row, so each split gets a row dated the last trading day
+    before it, with the cumulative split factor for that day and the raw close as reference price.
+    """
+    base = os.path.join(root, "equity", "usa")
+    for folder in ("daily", "factor_files", "map_files"):
+        os.makedirs(os.path.join(base, folder), exist_ok=True)
+
+    scaled = [np.round(field * 10000) for field in (chunk.open, chunk.high, chunk.low, chunk.close)]
+    for row, ticker in enumerate(chunk.tickers):
+        name = ticker.lower()
+        traded = np.flatnonzero(~np.isnan(chunk.close[row]))
+        lines = io.StringIO()
+        for day in traded.tolist():
+            lines.write(f"{chunk.dates[day]} 00:00,{scaled[0][row, day]:.0f},{scaled[1][row, day]:.0f},"
+                        f"{scaled[2][row, day]:.0f},{scaled[3][row, day]:.0f},{chunk.volume[row, day]}\n")
+        with zipfile.ZipFile(os.path.join(base, "daily", f"{name}.zip"), "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(f"{name}.csv", lines.getvalue())
+
+        factor_rows = []
+        for day in np.flatnonzero(np.diff(chunk.factor[row]) != 0).tolist():
+            reference = chunk.close[row, day]
+            factor_rows.append(f"{chunk.dates[day]},1,{chunk.factor[row, day]:.10g},"
+                               f"{0 if np.isnan(reference) else reference:.4f}")
+        with open(os.path.join(base, "factor_files", f"{name}.csv"), "w") as handle:
+            handle.write("\n".join(factor_rows + ["20501231,1,1,0"]) + "\n")
+
+        first_day = chunk.dates[traded[0]] if len(traded) else chunk.dates[0]
+        with open(os.path.join(base, "map_files", f"{name}.csv"), "w") as handle:
+            handle.write(f"{first_day},{name}\n20501231,{name}\n")
+
+
+def write_npz(chunk, root):
+    """Write a chunk as root/chunk_<first symbol index>.npz."""
+    os.makedirs(root, exist_ok=True)
+    np.savez(os.path.join(root, f"chunk_{chunk.first_index:05d}.npz"), tickers=np.array(chunk.tickers),
+             dates=chunk.dates, open=chunk.open, high=chunk.high, low=chunk.low, close=chunk.close,
+             volume=chunk.volume, factor=chunk.factor,
+             splits=np.array([(chunk.tickers.index(ticker), day, ratio) for ticker, day, ratio in chunk.splits],
+                             dtype=np.int64).reshape(-1, 3))
+
+
+def read_npz(root):
+    """Yield the chunks written by write_npz, in symbol order."""
+    for path in sorted(glob.glob(os.path.join(root, "chunk_*.npz"))):
+        with np.load(path) as data:
+            tickers = data["tickers"].tolist()
+            first_index = int(os.path.basename(path)[6:11])
+            splits = [(tickers[row], day, ratio) for row, day, ratio in data["splits"].tolist()]
+            yield Chunk(first_index, tickers, data["dates"], data["open"], data["high"], data["low"], data["close"],
+                        data["volume"], data["factor"], splits)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic daily equity data")
+    parser.add_argument("out", help="Output folder (the Lean data folder for --format lean)")
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-symbols", type=int, default=256)
+    parser.add_argument("--format", choices=("lean", "npz"), default="lean")
+    parser.add_argument("--start", type=date.fromisoformat, default=START)
+    arguments = parser.parse_args(argv)
+
+    writer = write_lean if arguments.format == "lean" else write_npz
+    started, bars = time.perf_counter(), 0
+    for chunk in generate(arguments.symbols, arguments.years, arguments.seed, arguments.chunk_symbols, arguments.start):
+        writer(chunk, arguments.out)
+        bars += int(np.count_nonzero(~np.isnan(chunk.close)))
+        print(f"{chunk.first_index + len(chunk.tickers):,}/{arguments.symbols:,} symbols, {bars:,} bars, "
+              f"{time.perf_counter() - started:.1f}s", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
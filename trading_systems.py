@@ -0,0 +1,210 @@
+# region imports
+from bisect import bisect_left
+from operator import attrgetter
+# endregion
+
+# The Turtle rule sets: name -> (entry channel, exit channel) lengths in days
+SYSTEM_CHANNELS = {"1": (20, 10), "2": (55, 20)}
+
+
+class _Band:
+    """One side of a stored channel, read as channel.Upper.Current.Value like DonchianChannel's bands."""
+
+    __slots__ = ("Value", "Current")
+
+    def __init__(self):
+        self.Value = 0.0
+        self.Current = self
+
+
+class StoredChannel:
+    """The DonchianChannel attributes OnData reads (Upper, Lower, IsReady), for one length in a ChannelStore."""
+
+    __slots__ = ("length", "Upper", "Lower", "IsReady")
+
+    def __init__(self, length):
+        self.length = length
+        self.Upper = _Band()
+        self.Lower = _Band()
+        self.IsReady = False
+
+
+class _Extremes:
+    """
+    A symbol's candidate highs and lows over the longest channel: bar indices with decreasing highs
+    (and increasing lows), so the highest high of the last n bars is the first candidate inside them.
+    """
+
+    def __init__(self):
+        self.count = 0          # int - bars seen
+        self.high_index = []    # List[int] - bar index of each candidate high, ascending
+        self.high_value = []    # List[float] - candidate highs, descending
+        self.low_index = []     # List[int] - bar index of each candidate low, ascending
+        self.low_value = []     # List[float] - candidate lows, ascending
+        self.channels = []      # List[StoredChannel] - one per length the systems read
+
+
+class ChannelStore:
+    """
+    One rolling high/low store per symbol serving every channel length the trading systems use, in
+    place of a DonchianChannel per system and length. Each bar is pushed once: it evicts the older
+    highs it tops (lows it undercuts) and the bars past the longest length, so a symbol keeps a
+    handful of candidates; each length's channel is then the first candidate inside it, found by
+    bisecting the candidates' bar indices. Values match DonchianChannel's, current bar included.
+    """
+
+    def __init__(self, lengths):
+        """
+        Args:
+            lengths (iterable[int]): Channel lengths to serve, in bars
+        """
+        self.lengths = sorted(set(lengths))
+        self.longest = self.lengths[-1]
+        self.symbols = {}  # Dictionary[Symbol, _Extremes] - candidates and channels per symbol
+
+    def Add(self, symbol):
+        """Start storing a symbol's highs and lows, with a channel for each length."""
+        extremes = self.symbols[symbol] = _Extremes()
+        extremes.channels = [StoredChannel(length) for length in self.lengths]
+
+    def Channel(self, symbol, length):
+        """
+        Returns:
+            StoredChannel: The symbol's channel for `length`, kept current as bars are pushed
+        """
+        return self.symbols[symbol].channels[self.lengths.index(length)]
+
+    def Update(self, slice):
+        """Push each stored symbol's bar in the slice and refresh its channels."""
+        for symbol, bar in slice.Bars.items():
+            extremes = self.symbols.get(symbol)
+            if extremes is not None:
+                self._Push(extremes, bar.High, bar.Low)
+
+    def _Push(self, extremes, high, low):
+        index = extremes.count
+        extremes.count += 1
+        high_index, high_value = extremes.high_index, extremes.high_value
+        while high_value and high_value[-1] <= high:
+            high_index.pop()
+            high_value.pop()
+        high_index.append(index)
+        high_value.append(high)
+        low_index, low_value = extremes.low_index, extremes.low_value
+        while low_value and low_value[-1] >= low:
+            low_index.pop()
+            low_value.pop()
+        low_index.append(index)
+        low_value.append(low)
+
+        oldest = index - self.longest + 1
+        if high_index[0] < oldest:
+            expired = bisect_left(high_index, oldest)
+            del high_index[:expired], high_value[:expired]
+        if low_index[0] < oldest:
+            expired = bisect_left(low_index, oldest)
+            del low_index[:expired], low_value[:expired]
+
+        for channel in extremes.channels:
+            first = index - channel.length + 1
+            channel.Upper.Value = high_value[bisect_left(high_index, first)]
+            channel.Lower.Value = low_value[bisect_left(low_index, first)]
+            channel.IsReady = extremes.count >= channel.length
+
+
+class TradingSystem:
+    """
+    One Turtle rule set and what it trades with: its channels, position book, drawdown-map throttle
+    and the day's trades. The strategy reads these through attributes of the same names bound to the
+    system being evaluated (ActiveSystemAttribute), so the order methods serve every system.
+
+    With several systems a symbol's holding is the sum of the systems' positions, so each system also
+    keeps the cost of its open positions and its realized profit: its own equity, for its throttle.
+    """
+
+    def __init__(self, name, entry_length, exit_length):
+        """
+        Args:
+            name (str): Key in SYSTEM_CHANNELS, shown in logs and reports
+            entry_length (int): Entry channel length in days
+            exit_length (int): Exit channel length in days
+        """
+        self.name = name
+        self.entry_length = entry_length
+        self.exit_length = exit_length
+
+        # Technical Indicators - DonchianChannel indicators, or StoredChannel views with several systems
+        self.entry_channels = {}     # Dictionary[Symbol, DonchianChannel] - Entry channel per symbol
+        self.exit_channels = {}      # Dictionary[Symbol, DonchianChannel] - Exit channel per symbol
+
+        # Position Management - See the strategy's Initialize
+        self.stop_losses = {}        # Dictionary[Symbol, float] - Stop loss price for each position
+        self.entry_prices = {}       # Dictionary[Symbol, List[float]] - Entry price of each unit of a position
+        self.pyramid_level = {}      # Dictionary[Symbol, int] - Pyramid level of each position (1-4 levels)
+        self.last_add_price = {}     # Dictionary[Symbol, float] - Price at which a unit was last added
+        self.position_quantity = {}  # Dictionary[Symbol, float] - Signed quantity of each position
+        self.daily_trades = []       # List[str] - The day's trades, for the daily report
+
+        # Drawdown throttle - Peak value and drawdown map, set up by the strategy
+        self.peak_portfolio_value = 0.0
+        self.drawdown_map = {}
+
+        # Own profit and loss - Only kept with several systems
+        self.cost_basis = {}         # Dictionary[Symbol, float] - Signed cost of each open position at the prices ordered
+        self.realized_profit = 0.0   # float - Profit of the positions closed so far
+
+    def RecordOrder(self, symbol, quantity, price):
+        """Account for an order in the cost basis, realizing the profit when it closes the position."""
+        held = self.position_quantity.get(symbol, 0)
+        if held + quantity == 0:
+            self.realized_profit += held * price - self.cost_basis.pop(symbol, 0.0)
+        else:
+            self.cost_basis[symbol] = self.cost_basis.get(symbol, 0.0) + quantity * price
+
+    def Equity(self, starting_value, securities):
+        """
+        Returns:
+            float: The starting value plus the system's realized profit and the open profit of its positions
+        """
+        open_profit = sum(quantity * securities[symbol].Price - self.cost_basis.get(symbol, 0.0)
+                          for symbol, quantity in self.position_quantity.items())
+        return starting_value + self.realized_profit + open_profit
+
+
+class SystemPosition:
+    """A system's share of a holding, read from its book, with the SecurityHolding members OnData uses."""
+
+    __slots__ = ("system", "security")
+
+    def __init__(self, system, security):
+        self.system = system
+        self.security = security
+
+    @property
+    def Quantity(self):
+        return self.system.position_quantity.get(self.security.Symbol, 0)
+
+    @property
+    def Invested(self):
+        return self.Quantity != 0
+
+    @property
+    def IsLong(self):
+        return self.Quantity > 0
+
+    @property
+    def IsShort(self):
+        return self.Quantity < 0
+
+    @property
+    def AveragePrice(self):
+        quantity = self.Quantity
+        return self.system.cost_basis.get(self.security.Symbol, 0.0) / quantity if quantity else 0.0
+
+    def total_close_profit(self):
+        return self.Quantity * self.security.Price - self.system.cost_basis.get(self.security.Symbol, 0.0)
+
+
+def ActiveSystemAttribute(name):
+    """A strategy attribute that reads and assigns `name` on the trading system being evaluated (algorithm.system)."""
+    return property(attrgetter(f"system.{name}"), lambda algorithm, value: setattr(algorithm.system, name, value))